@@ -31,9 +31,9 @@ source activate test-environment
 # wradlib optional dependencies:
 # - xmltodict
 # pyrad optional dependencies:
-# - pandas shapely dask bokeh memory_profiler
+# - pandas shapely dask bokeh memory_profiler numba numexpr
 conda install -c https://conda.binstar.org/jjhelmus trmm_rsl
-conda install -c conda-forge numpy scipy matplotlib netcdf4 h5py pytest basemap cartopy gdal pyproj wradlib xmltodict pandas shapely dask bokeh memory_profiler imageio xarray scikit-learn pysolar 
+conda install -c conda-forge numpy scipy matplotlib netcdf4 h5py pytest basemap cartopy gdal pyproj wradlib xmltodict pandas shapely dask bokeh memory_profiler imageio xarray scikit-learn pysolar numba numexpr
 
 # export global variables
 export RSL_PATH="$HOME/miniconda/envs/test-environment"
@@ -46,6 +46,7 @@ import datetime
 
 from warnings import warn
 from copy import deepcopy
+from functools import lru_cache
 import numpy as np
 
 from pyart.config import get_metadata
@@ -1009,10 +1010,12 @@ def get_datatype_odim(datatype):
     return {datatype_odim: field_name}
 
 
+@lru_cache(maxsize=256)
 def get_fieldname_pyart(datatype):
     """
     maps the config file radar data type name into the corresponding rainbow
-    Py-ART field name
+    Py-ART field name. The mapping is memoized since it is looked up for
+    every product and dataset
 
     Parameters
     ----------
@@ -61,6 +61,7 @@ Spectral data functions
     process_rhohv
     process_Doppler_velocity
     process_Doppler_width
+    process_Doppler_moments
     process_ifft
 
 IQ data functions
@@ -261,6 +262,7 @@ from .process_spectra import process_differential_phase
 from .process_spectra import process_rhohv, process_Doppler_velocity
 from .process_spectra import process_Doppler_width, process_spectra_ang_avg
 from .process_spectra import process_spectral_noise, process_noise_power
+from .process_spectra import process_Doppler_moments
 
 from .process_iq import process_raw_iq, process_reflectivity_iq
 from .process_iq import process_differential_reflectivity_iq
@@ -0,0 +1,287 @@
+"""
+pyrad.proc._spectra_kernels
+===========================
+
+Numba kernels used to speed up the processing of spectral data. The kernels
+are only compiled if Numba is available. Otherwise they are plain Python
+functions and the processing functions should use their NumPy counterparts
+instead. The numexpr kernels can be used if numexpr is available.
+
+.. autosummary::
+    :toctree: generated/
+
+    mask_low_magnitude
+    mask_low_power
+    mask_Doppler_bins
+    merge_masks
+    spectral_rhohv
+    Doppler_moments
+    spectral_rhohv_numexpr
+
+"""
+
+import numpy as np
+
+try:
+    from numba import njit, prange
+    _NUMBA_AVAILABLE = True
+except ImportError:
+    _NUMBA_AVAILABLE = False
+    prange = range
+
+    def njit(*args, **kwargs):
+        """
+        Replacement of the numba njit decorator when numba is not available
+
+        """
+        def decorator(func):
+            return func
+        return decorator
+
+try:
+    import numexpr as ne
+    _NUMEXPR_AVAILABLE = True
+except ImportError:
+    _NUMEXPR_AVAILABLE = False
+
+
+@njit(parallel=True, nogil=True, cache=True)
+def mask_low_magnitude(data, data_mask, threshold, out_mask):
+    """
+    Flags the samples whose magnitude is below or equal to a threshold or
+    are masked
+
+    Parameters
+    ----------
+    data : 3D array of complex
+        the data
+    data_mask : 3D array of bool
+        the mask of the data
+    threshold : float
+        the magnitude threshold
+    out_mask : 3D array of bool
+        the mask where the flagged samples are set to True. Modified in place
+
+    """
+    # compare squared magnitudes to avoid the square root
+    threshold2 = threshold*threshold if threshold >= 0. else -1.
+    nrays, ngates, npulses = data.shape
+    for i in prange(nrays):
+        for j in range(ngates):
+            for k in range(npulses):
+                if data_mask[i, j, k]:
+                    out_mask[i, j, k] = True
+                elif (data[i, j, k].real*data[i, j, k].real +
+                      data[i, j, k].imag*data[i, j, k].imag <= threshold2):
+                    out_mask[i, j, k] = True
+
+
+@njit(parallel=True, nogil=True, cache=True)
+def mask_low_power(signal, noise, clipping_factor, out_mask):
+    """
+    Flags the samples whose power is below or equal to the noise power
+    multiplied by a clipping factor
+
+    Parameters
+    ----------
+    signal : 3D array of complex
+        the complex signal [ADU]
+    noise : 3D array of floats
+        the noise power [ADU]
+    clipping_factor : float
+        the factor by which the noise power is multiplied
+    out_mask : 3D array of bool
+        the mask where the flagged samples are set to True. Modified in place
+
+    """
+    nrays, ngates, npulses = signal.shape
+    for i in prange(nrays):
+        for j in range(ngates):
+            for k in range(npulses):
+                pwr = (signal[i, j, k].real*signal[i, j, k].real +
+                       signal[i, j, k].imag*signal[i, j, k].imag)
+                if pwr <= noise[i, j, k]*clipping_factor:
+                    out_mask[i, j, k] = True
+
+
+@njit(parallel=True, nogil=True, cache=True)
+def mask_Doppler_bins(Doppler_mask, out_mask):
+    """
+    Flags the Doppler bins of each ray at all range gates
+
+    Parameters
+    ----------
+    Doppler_mask : 2D array of bool
+        the Doppler bins to flag for each ray (nrays, npulses)
+    out_mask : 3D array of bool
+        the mask where the flagged samples are set to True. Modified in place
+
+    """
+    nrays, ngates, npulses = out_mask.shape
+    for i in prange(nrays):
+        for j in range(ngates):
+            for k in range(npulses):
+                if Doppler_mask[i, k]:
+                    out_mask[i, j, k] = True
+
+
+@njit(parallel=True, nogil=True, cache=True)
+def merge_masks(mask, out_mask):
+    """
+    Flags the samples flagged in another mask
+
+    Parameters
+    ----------
+    mask : 3D array of bool
+        the mask with the samples to flag
+    out_mask : 3D array of bool
+        the mask where the flagged samples are set to True. Modified in place
+
+    """
+    nrays, ngates, npulses = out_mask.shape
+    for i in prange(nrays):
+        for j in range(ngates):
+            for k in range(npulses):
+                if mask[i, j, k]:
+                    out_mask[i, j, k] = True
+
+
+@njit(parallel=True, nogil=True, cache=True)
+def spectral_rhohv(signal_h, signal_v, noise_h, noise_v, subtract_noise,
+                   out_data, out_mask):
+    """
+    Computes the spectral co-polar correlation coefficient
+
+    Parameters
+    ----------
+    signal_h, signal_v : 3D array of complex
+        the horizontal and vertical complex signals [ADU]
+    noise_h, noise_v : 3D array of floats
+        the horizontal and vertical noise power [ADU]. Only used if
+        subtract_noise is True
+    subtract_noise : bool
+        If True the noise is subtracted from the signal power
+    out_data : 3D array of complex
+        the spectral co-polar correlation coefficient. Modified in place
+    out_mask : 3D array of bool
+        the mask where the bins without valid signal power are set to True.
+        Modified in place
+
+    """
+    nrays, ngates, npulses = signal_h.shape
+    for i in prange(nrays):
+        for j in range(ngates):
+            for k in range(npulses):
+                s_h = signal_h[i, j, k]
+                s_v = signal_v[i, j, k]
+                pwr_h = s_h.real*s_h.real+s_h.imag*s_h.imag
+                pwr_v = s_v.real*s_v.real+s_v.imag*s_v.imag
+                if subtract_noise:
+                    pwr_h -= noise_h[i, j, k]
+                    pwr_v -= noise_v[i, j, k]
+                if pwr_h <= 0. or pwr_v <= 0.:
+                    out_mask[i, j, k] = True
+                else:
+                    out_data[i, j, k] = s_h*np.conj(s_v)/np.sqrt(pwr_h*pwr_v)
+
+
+@njit(parallel=True, nogil=True, cache=True)
+def Doppler_moments(sdBZ, sdBZ_mask, Doppler_velocity, velocity_mask,
+                    out_dBZ, out_vel, out_width, out_dBZ_mask, out_vel_mask):
+    """
+    Computes the reflectivity, the Doppler velocity and the Doppler spectrum
+    width from the spectral reflectivity. The linear power of each Doppler
+    bin is computed once and kept for the second moment. As in
+    pyart.retrieve, the velocity moments are normalized by the power of all
+    the valid bins, while the bins with a masked Doppler velocity do not
+    contribute to their sums
+
+    Parameters
+    ----------
+    sdBZ : 3D array of floats
+        the spectral reflectivity [dBZ]
+    sdBZ_mask : 3D array of bool
+        the mask of the spectral reflectivity
+    Doppler_velocity : 2D array of floats
+        the Doppler velocity of each bin (nrays, npulses) [m/s]
+    velocity_mask : 2D array of bool
+        the mask of the Doppler velocity bins
+    out_dBZ, out_vel, out_width : 2D array of floats
+        the reflectivity [dBZ], Doppler velocity [m/s] and spectrum width
+        [m/s]. Modified in place
+    out_dBZ_mask, out_vel_mask : 2D array of bool
+        the masks where the gates without valid reflectivity or valid
+        velocity and spectrum width are set to True. Modified in place
+
+    """
+    nrays, ngates, npulses = sdBZ.shape
+    for i in prange(nrays):
+        s_lin = np.empty(npulses)
+        for j in range(ngates):
+            pwr = 0.
+            pwr_vel = 0.
+            nvalid = 0
+            for k in range(npulses):
+                if sdBZ_mask[i, j, k]:
+                    s_lin[k] = 0.
+                    continue
+                s_lin[k] = 10.**(0.1*sdBZ[i, j, k])
+                pwr += s_lin[k]
+                if not velocity_mask[i, k]:
+                    pwr_vel += s_lin[k]*Doppler_velocity[i, k]
+                    nvalid += 1
+
+            if pwr <= 0.:
+                out_dBZ_mask[i, j] = True
+                out_vel_mask[i, j] = True
+                continue
+            out_dBZ[i, j] = 10.*np.log10(pwr)
+            if nvalid == 0:
+                out_vel_mask[i, j] = True
+                continue
+
+            mean = pwr_vel/pwr
+            var = 0.
+            for k in range(npulses):
+                if not sdBZ_mask[i, j, k] and not velocity_mask[i, k]:
+                    delta = Doppler_velocity[i, k]-mean
+                    var += s_lin[k]*delta*delta
+            out_vel[i, j] = mean
+            out_width[i, j] = np.sqrt(var/pwr)
+
+
+def spectral_rhohv_numexpr(signal_h, signal_v, noise_h, noise_v,
+                           subtract_noise, out_data, out_mask):
+    """
+    Computes the spectral co-polar correlation coefficient with numexpr.
+    Same interface as spectral_rhohv
+
+    Parameters
+    ----------
+    signal_h, signal_v : 3D array of complex
+        the horizontal and vertical complex signals [ADU]
+    noise_h, noise_v : 3D array of floats
+        the horizontal and vertical noise power [ADU]. Only used if
+        subtract_noise is True
+    subtract_noise : bool
+        If True the noise is subtracted from the signal power
+    out_data : 3D array of complex
+        the spectral co-polar correlation coefficient. Modified in place
+    out_mask : 3D array of bool
+        the mask where the bins without valid signal power are set to True.
+        Modified in place
+
+    """
+    if subtract_noise:
+        pwr_h = ne.evaluate('real(signal_h)**2+imag(signal_h)**2-noise_h')
+        pwr_v = ne.evaluate('real(signal_v)**2+imag(signal_v)**2-noise_v')
+    else:
+        pwr_h = ne.evaluate('real(signal_h)**2+imag(signal_h)**2')
+        pwr_v = ne.evaluate('real(signal_v)**2+imag(signal_v)**2')
+    out_mask |= ne.evaluate(
+        '(pwr_h <= 0) | (pwr_v <= 0)',
+        local_dict={'pwr_h': pwr_h, 'pwr_v': pwr_v})
+    out_data[:] = ne.evaluate(
+        'where(out_mask, 0, signal_h*conj(signal_v)/sqrt(pwr_h*pwr_v))',
+        local_dict={'out_mask': out_mask, 'signal_h': signal_h,
+                    'signal_v': signal_v, 'pwr_h': pwr_h, 'pwr_v': pwr_v})
@@ -70,6 +70,7 @@ def get_process_func(dataset_type, dsname):
                 'DEALIAS_FOURDD': process_dealias_fourdd
                 'DEALIAS_REGION': process_dealias_region_based
                 'DEALIAS_UNWRAP': process_dealias_unwrap_phase
+                'DOPPLER_MOMENTS': process_Doppler_moments
                 'DOPPLER_VELOCITY': process_Doppler_velocity
                 'DOPPLER_VELOCITY_IQ': process_Doppler_velocity_iq
                 'DOPPLER_WIDTH': process_Doppler_width
@@ -419,6 +420,8 @@ def get_process_func(dataset_type, dsname):
         func_name = 'process_Doppler_velocity'
     elif dataset_type == 'DOPPLER_WIDTH':
         func_name = 'process_Doppler_width'
+    elif dataset_type == 'DOPPLER_MOMENTS':
+        func_name = 'process_Doppler_moments'
     elif dataset_type == 'POL_VARIABLES_IQ':
         func_name = 'process_pol_variables_iq'
     elif dataset_type == 'REFLECTIVITY_IQ':
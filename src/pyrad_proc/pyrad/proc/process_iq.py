@@ -31,6 +31,7 @@ from netCDF4 import num2date
 import pyart
 
 from ..io.io_aux import get_datatype_fields, get_fieldname_pyart
+from ..util.radar_utils import get_moments_radar
 
 
 def process_raw_iq(procstatus, dscfg, radar_list=None):
@@ -219,7 +220,7 @@ def process_reflectivity_iq(procstatus, dscfg, radar_list=None):
         reflectivity_field += '_vv'
 
     # prepare for exit
-    new_dataset = {'radar_out': pyart.util.radar_from_spectra(radar)}
+    new_dataset = {'radar_out': get_moments_radar(radar)}
     new_dataset['radar_out'].add_field(reflectivity_field, dBZ)
 
     return new_dataset, ind_rad
@@ -276,7 +277,7 @@ def process_st1_iq(procstatus, dscfg, radar_list=None):
         st1_field += '_vv'
 
     # prepare for exit
-    new_dataset = {'radar_out': pyart.util.radar_from_spectra(radar)}
+    new_dataset = {'radar_out': get_moments_radar(radar)}
     new_dataset['radar_out'].add_field(st1_field, st1)
 
     return new_dataset, ind_rad
@@ -333,7 +334,7 @@ def process_st2_iq(procstatus, dscfg, radar_list=None):
         st2_field += '_vv'
 
     # prepare for exit
-    new_dataset = {'radar_out': pyart.util.radar_from_spectra(radar)}
+    new_dataset = {'radar_out': get_moments_radar(radar)}
     new_dataset['radar_out'].add_field(st2_field, st2)
 
     return new_dataset, ind_rad
@@ -389,7 +390,7 @@ def process_wbn_iq(procstatus, dscfg, radar_list=None):
         wbn_field += '_vv'
 
     # prepare for exit
-    new_dataset = {'radar_out': pyart.util.radar_from_spectra(radar)}
+    new_dataset = {'radar_out': get_moments_radar(radar)}
     new_dataset['radar_out'].add_field(wbn_field, wbn)
 
     return new_dataset, ind_rad
@@ -465,7 +466,7 @@ def process_differential_reflectivity_iq(procstatus, dscfg, radar_list=None):
         noise_h_field=noise_h_field, noise_v_field=noise_v_field)
 
     # prepare for exit
-    new_dataset = {'radar_out': pyart.util.radar_from_spectra(radar)}
+    new_dataset = {'radar_out': get_moments_radar(radar)}
     new_dataset['radar_out'].add_field('differential_reflectivity', zdr)
 
     return new_dataset, ind_rad
@@ -521,7 +522,7 @@ def process_mean_phase_iq(procstatus, dscfg, radar_list=None):
         mean_phase_field += '_vv'
 
     # prepare for exit
-    new_dataset = {'radar_out': pyart.util.radar_from_spectra(radar)}
+    new_dataset = {'radar_out': get_moments_radar(radar)}
     new_dataset['radar_out'].add_field(mean_phase_field, mph)
 
     return new_dataset, ind_rad
@@ -585,7 +586,7 @@ def process_differential_phase_iq(procstatus, dscfg, radar_list=None):
         signal_v_field=signal_v_field)
 
     # prepare for exit
-    new_dataset = {'radar_out': pyart.util.radar_from_spectra(radar)}
+    new_dataset = {'radar_out': get_moments_radar(radar)}
     new_dataset['radar_out'].add_field(
         'uncorrected_differential_phase', uphidp)
 
@@ -659,7 +660,7 @@ def process_rhohv_iq(procstatus, dscfg, radar_list=None):
         noise_h_field=noise_h_field, noise_v_field=noise_v_field)
 
     # prepare for exit
-    new_dataset = {'radar_out': pyart.util.radar_from_spectra(radar)}
+    new_dataset = {'radar_out': get_moments_radar(radar)}
     new_dataset['radar_out'].add_field('cross_correlation_ratio', rhohv)
 
     return new_dataset, ind_rad
@@ -723,7 +724,7 @@ def process_Doppler_velocity_iq(procstatus, dscfg, radar_list=None):
         vel_field += '_vv'
 
     # prepare for exit
-    new_dataset = {'radar_out': pyart.util.radar_from_spectra(radar)}
+    new_dataset = {'radar_out': get_moments_radar(radar)}
     new_dataset['radar_out'].add_field(vel_field, vel)
 
     return new_dataset, ind_rad
@@ -793,7 +794,7 @@ def process_Doppler_width_iq(procstatus, dscfg, radar_list=None):
         width_field += '_vv'
 
     # prepare for exit
-    new_dataset = {'radar_out': pyart.util.radar_from_spectra(radar)}
+    new_dataset = {'radar_out': get_moments_radar(radar)}
     new_dataset['radar_out'].add_field(width_field, width)
 
     return new_dataset, ind_rad
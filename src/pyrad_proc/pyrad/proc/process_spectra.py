@@ -29,17 +29,67 @@ Functions to processes spectral data.
     process_rhohv
     process_Doppler_velocity
     process_Doppler_width
+    process_Doppler_moments
+    _append_rays
+    _fast_add_field
+    _clone_data_shared_buffer
+    _prepare_spectra
+    _compute_spectral_rhohv
+    _get_Doppler_moments
+    _compute_pol_variables
+    _get_cached_field
+    _copy_field
+    _get_fieldname
+    _parse_datatypes
+    _get_ind_rad
+    _parse_datatype_descrs
+    _extract_pol_fields
 
 """
 
-from copy import deepcopy
+from collections import namedtuple
+from copy import deepcopy, copy
+from functools import lru_cache
 from warnings import warn
+from weakref import WeakKeyDictionary
 import numpy as np
 from netCDF4 import num2date
 
 import pyart
 
 from ..io.io_aux import get_datatype_fields, get_fieldname_pyart
+from ..util.radar_utils import clone_without_fields, get_moments_radar
+from ._spectra_kernels import _NUMBA_AVAILABLE, mask_low_magnitude
+from ._spectra_kernels import mask_low_power, mask_Doppler_bins, merge_masks
+from ._spectra_kernels import spectral_rhohv, Doppler_moments
+from ._spectra_kernels import _NUMEXPR_AVAILABLE, spectral_rhohv_numexpr
+
+# Py-ART field names of the data types already looked up
+_FIELDNAME_CACHE = dict()
+
+# Doppler moments of each spectra object, shared by the moment processing
+# functions, together with the data they were computed from. The entries are
+# removed when the spectra object is deleted
+_DOPPLER_MOMENTS_CACHE = WeakKeyDictionary()
+
+# polarimetric variables computed from each spectra object, keyed by the
+# field name and the parameters of the computation, together with the input
+# data they were computed from
+_POL_VARIABLES_CACHE = WeakKeyDictionary()
+
+# input fields of the polarimetric processing functions and the data types
+# fulfilling each role
+_PolFields = namedtuple(
+    '_PolFields', ('signal_h', 'signal_v', 'noise_h', 'noise_v', 'pwr_h',
+                   'pwr_v', 'srhohv'))
+_PolFields.__new__.__defaults__ = (None, )*7
+_POL_DATATYPE_ROLES = {
+    'ShhADU': 'signal_h', 'ShhADUu': 'signal_h',
+    'SvvADU': 'signal_v', 'SvvADUu': 'signal_v',
+    'sNADUh': 'noise_h', 'sNADUv': 'noise_v',
+    'sPhhADU': 'pwr_h', 'sPhhADUu': 'pwr_h',
+    'sPvvADU': 'pwr_v', 'sPvvADUu': 'pwr_v',
+    'sRhoHV': 'srhohv', 'sRhoHVu': 'srhohv'}
 
 
 def process_raw_spectra(procstatus, dscfg, radar_list=None):
@@ -52,7 +102,16 @@ def process_raw_spectra(procstatus, dscfg, radar_list=None):
         Processing status: 0 initializing, 1 processing volume,
         2 post-processing
     dscfg : dictionary of dictionaries
-        data set configuration
+        data set configuration. Accepted configuration keywords::
+
+        datatype : list of string. Dataset keyword
+            The input data types
+        copy_output : bool. Dataset keyword
+            If True the output is a deep copy of the input spectra object.
+            Otherwise the output is a shallow copy that has its own fields
+            dictionary but shares the field data with the input. In that
+            case the field data should not be modified in place by the
+            products. Default False
     radar_list : list of spectra objects
         Optional. list of spectra objects
 
@@ -75,7 +134,13 @@ def process_raw_spectra(procstatus, dscfg, radar_list=None):
     if (radar_list is None) or (radar_list[ind_rad] is None):
         warn('ERROR: No valid radar')
         return None, None
-    new_dataset = {'radar_out': deepcopy(radar_list[ind_rad])}
+    psr = radar_list[ind_rad]
+
+    if dscfg.get('copy_output', False):
+        new_dataset = {'radar_out': deepcopy(psr)}
+    else:
+        new_dataset = {'radar_out': clone_without_fields(psr)}
+        new_dataset['radar_out'].fields = copy(psr.fields)
 
     return new_dataset, ind_rad
 
@@ -107,9 +172,11 @@ def process_ifft(procstatus, dscfg, radar_list=None):
     """
 
     if procstatus != 1:
+        if procstatus == 0:
+            _parse_datatypes(dscfg)
         return None, None
 
-    radarnr, _, datatype, _, _ = get_datatype_fields(dscfg['datatype'][0])
+    radarnr = _parse_datatypes(dscfg)[0][0]
     ind_rad = int(radarnr[5:8])-1
     if (radar_list is None) or (radar_list[ind_rad] is None):
         warn('ERROR: No valid radar')
@@ -134,9 +201,7 @@ def process_ifft(procstatus, dscfg, radar_list=None):
 
     fields_in_list = []
     fields_out_list = []
-    for datatypedescr in dscfg['datatype']:
-        radarnr, _, datatype, _, _ = get_datatype_fields(datatypedescr)
-        field_name = get_fieldname_pyart(datatype)
+    for radarnr, datatype, field_name in _parse_datatypes(dscfg):
         if field_name not in radar.fields:
             warn(field_name+' not in radar')
             continue
@@ -226,14 +291,15 @@ def process_spectra_point(procstatus, dscfg, radar_list=None):
 
     """
     if procstatus == 0:
+        _parse_datatypes(dscfg)
+        _get_ind_rad(dscfg)
         return None, None
 
     field_names = []
-    for datatypedescr in dscfg['datatype']:
-        radarnr, _, datatype, _, _ = get_datatype_fields(datatypedescr)
-        field_names.append(get_fieldname_pyart(datatype))
+    for radarnr, datatype, field_name in _parse_datatypes(dscfg):
+        field_names.append(field_name)
 
-    ind_rad = int(radarnr[5:8])-1
+    ind_rad = _get_ind_rad(dscfg)
 
     if procstatus == 2:
         if dscfg['initialized'] == 0:
@@ -306,48 +372,47 @@ def process_spectra_point(procstatus, dscfg, radar_list=None):
         lat = lat[0]
 
     d_az = np.abs(psr.azimuth['data'] - az)
-    if np.min(d_az) > azi_tol:
+    d_az_min = d_az.min()
+    if d_az_min > azi_tol:
         warn(' No psr bin found for point (az, el, r):(' +
              str(az)+', '+str(el)+', '+str(r) +
-             '). Minimum distance to psr azimuth '+str(d_az) +
+             '). Minimum distance to psr azimuth '+str(d_az_min) +
              ' larger than tolerance')
         return None, None
 
     d_el = np.abs(psr.elevation['data'] - el)
-    if np.min(d_el) > ele_tol:
+    d_el_min = d_el.min()
+    if d_el_min > ele_tol:
         warn(' No psr bin found for point (az, el, r):(' +
              str(az)+', '+str(el)+', '+str(r) +
-             '). Minimum distance to psr elevation '+str(d_el) +
+             '). Minimum distance to psr elevation '+str(d_el_min) +
              ' larger than tolerance')
         return None, None
 
     d_r = np.abs(psr.range['data'] - r)
-    if np.min(d_r) > rng_tol:
+    d_r_min = d_r.min()
+    if d_r_min > rng_tol:
         warn(' No psr bin found for point (az, el, r):(' +
              str(az)+', '+str(el)+', '+str(r) +
-             '). Minimum distance to psr range bin '+str(d_r) +
+             '). Minimum distance to psr range bin '+str(d_r_min) +
              ' larger than tolerance')
         return None, None
 
     if single_point:
-        ind_ray = np.argmin(np.abs(psr.azimuth['data'] - az) +
-                            np.abs(psr.elevation['data'] - el))
+        # d_az is not needed anymore. Reuse its buffer for the distance
+        ind_ray = np.argmin(np.add(d_az, d_el, out=d_az))
     else:
         ind_ray = np.where(np.logical_and(
             d_az <= azi_tol, d_el <= ele_tol))[0]
-    ind_rng = np.argmin(np.abs(psr.range['data'] - r))
+    ind_rng = np.argmin(d_r)
     nrays = ind_ray.size
 
-    time_poi = num2date(psr.time['data'][ind_ray], psr.time['units'],
-                        psr.time['calendar'])
-    if nrays > 1:
-        time_ref = time_poi[0]
-    else:
-        time_ref = time_poi
-        time_poi = np.array([time_poi])
+    time_poi = np.atleast_1d(psr.time['data'][ind_ray])
 
     # initialize dataset
     if not dscfg['initialized']:
+        time_ref = num2date(
+            time_poi[0], psr.time['units'], psr.time['calendar'])
         psr_poi = deepcopy(psr)
 
         # prepare space for field
@@ -389,120 +454,75 @@ def process_spectra_point(procstatus, dscfg, radar_list=None):
         dscfg['global_data'] = {
             'psr_poi': psr_poi,
             'point_coordinates_WGS84_lon_lat_alt': [lon, lat, alt],
-            'antenna_coordinates_az_el_r': [az, el, r]}
+            'antenna_coordinates_az_el_r': [az, el, r],
+            'ray_buffers': {'fields': dict()},
+            'time_offset': (None, 0.)}
 
         dscfg['initialized'] = 1
 
     psr_poi = dscfg['global_data']['psr_poi']
+    buffers = dscfg['global_data']['ray_buffers']
+
+    # ray dependent data is accumulated in buffers that grow geometrically.
+    # psr_poi only holds views of the filled part of the buffers
+    nrays_filled = psr_poi.nrays
     psr_poi.sweep_end_ray_index['data'][0] += nrays
     psr_poi.rays_per_sweep['data'][0] += nrays
     psr_poi.nrays += nrays
-    psr_poi.azimuth['data'] = np.append(
-        psr_poi.azimuth['data'], np.zeros(nrays)+az)
-    psr_poi.elevation['data'] = np.append(
-        psr_poi.elevation['data'], np.zeros(nrays)+el)
-    start_time = num2date(
-        0, psr_poi.time['units'], psr_poi.time['calendar'])
-    for i in range(nrays):
-        psr_poi.time['data'] = np.append(
-            psr_poi.time['data'], (time_poi[i] - start_time).total_seconds())
-
-    psr_poi.gate_longitude['data'] = (
-        np.ones((psr_poi.nrays, psr_poi.ngates), dtype='float64')*lon)
-    psr_poi.gate_latitude['data'] = (
-        np.ones((psr_poi.nrays, psr_poi.ngates), dtype='float64')*lat)
+    psr_poi.azimuth['data'] = _append_rays(
+        buffers, 'azimuth', np.zeros(nrays)+az, nrays_filled)
+    psr_poi.elevation['data'] = _append_rays(
+        buffers, 'elevation', np.zeros(nrays)+el, nrays_filled)
+
+    # offset [s] between the time reference of the psr and that of the time
+    # series. It is only recomputed when the psr time reference changes
+    time_units, time_offset = dscfg['global_data']['time_offset']
+    if time_units != psr.time['units']:
+        time_units = psr.time['units']
+        time_offset = (
+            num2date(0., time_units, psr.time['calendar']) -
+            num2date(0., psr_poi.time['units'], psr_poi.time['calendar'])
+            ).total_seconds()
+        dscfg['global_data']['time_offset'] = (time_units, time_offset)
+    psr_poi.time['data'] = _append_rays(
+        buffers, 'time', time_poi+time_offset, nrays_filled)
+
+    psr_poi.gate_longitude['data'] = np.broadcast_to(
+        np.float64(lon), (psr_poi.nrays, psr_poi.ngates))
+    psr_poi.gate_latitude['data'] = np.broadcast_to(
+        np.float64(lat), (psr_poi.nrays, psr_poi.ngates))
     psr_poi.gate_altitude['data'] = np.broadcast_to(
         alt, (psr_poi.nrays, psr_poi.ngates))
 
+    psr_fields = psr.fields
+    poi_fields = psr_poi.fields
+    field_buffers = buffers['fields']
     for field_name in field_names:
-        dtype = psr_poi.fields[field_name]['data'].dtype
-        if field_name not in psr.fields:
+        poi_field = poi_fields[field_name]
+        if field_name not in psr_fields:
             warn('Field '+field_name+' not in psr object')
             poi_data = np.ma.masked_all(
-                (nrays, 1, psr.npulses_max), dtype=dtype)
+                (nrays, 1, psr.npulses_max), dtype=poi_field['data'].dtype)
         else:
-            poi_data = psr.fields[field_name]['data'][ind_ray, ind_rng, :]
+            poi_data = psr_fields[field_name]['data'][ind_ray, ind_rng, :]
             poi_data = poi_data.reshape(nrays, 1, psr.npulses_max)
 
-        # Put data in radar object
-        if np.size(psr_poi.fields[field_name]['data']) == 0:
-            psr_poi.fields[field_name]['data'] = poi_data.reshape(
-                nrays, 1, psr_poi.npulses_max)
-        else:
-            if psr_poi.npulses_max == psr.npulses_max:
-                psr_poi.fields[field_name]['data'] = np.ma.append(
-                    psr_poi.fields[field_name]['data'], poi_data, axis=0)
-            elif psr.npulses_max < psr_poi.npulses_max:
-                poi_data_aux = np.ma.masked_all(
-                    (nrays, 1, psr_poi.npulses_max), dtype=dtype)
-                for i in range(nrays):
-                    poi_data_aux[i, 0, 0:psr.npulses_max] = poi_data[i, 0, :]
-                psr_poi.fields[field_name]['data'] = np.ma.append(
-                    psr_poi.fields[field_name]['data'], poi_data_aux, axis=0)
-            else:
-                poi_data_aux = np.ma.masked_all(
-                    (psr_poi.nrays, 1, psr.npulses_max), dtype=dtype)
-                poi_data_aux[
-                    :psr_poi.nrays-nrays, :, 0:psr_poi.npulses_max] = (
-                        psr_poi.fields[field_name]['data'])
-                poi_data_aux[psr_poi.nrays-nrays:, :, :] = poi_data
-                psr_poi.fields[field_name]['data'] = poi_data_aux
-
-    psr_poi.npulses['data'] = np.append(
-        psr_poi.npulses['data'], psr.npulses['data'][ind_ray])
-    if psr_poi.Doppler_velocity is not None:
-        if np.size(psr_poi.Doppler_velocity['data']) == 0:
-            psr_poi.Doppler_velocity['data'] = (
-                psr.Doppler_velocity['data'][ind_ray, :].reshape(
-                    nrays, psr_poi.npulses_max))
-        else:
-            Doppler_data = psr.Doppler_velocity['data'][ind_ray, :]
-            Doppler_data = Doppler_data.reshape(nrays, psr.npulses_max)
-
-            if psr_poi.npulses_max == psr.npulses_max:
-                psr_poi.Doppler_velocity['data'] = np.ma.append(
-                    psr_poi.Doppler_velocity['data'],
-                    Doppler_data, axis=0)
-            elif psr.npulses_max < psr_poi.npulses_max:
-                Doppler_aux = np.ma.masked_all((nrays, psr_poi.npulses_max))
-                for i in range(nrays):
-                    Doppler_aux[i, 0:psr.npulses_max] = Doppler_data[i, :]
-                psr_poi.Doppler_velocity['data'] = np.ma.append(
-                    psr_poi.Doppler_velocity['data'], Doppler_aux, axis=0)
-            else:
-                Doppler_aux = np.ma.masked_all(
-                    (psr_poi.nrays, psr.npulses_max))
-                Doppler_aux[:psr_poi.nrays-nrays, 0:psr_poi.npulses_max] = (
-                    psr_poi.Doppler_velocity['data'])
-                Doppler_aux[psr_poi.nrays-nrays:, :] = Doppler_data
-                psr_poi.Doppler_velocity['data'] = Doppler_aux
+        poi_field['data'] = _append_rays(
+            field_buffers, field_name, poi_data, nrays_filled)
 
+    psr_poi.npulses['data'] = _append_rays(
+        buffers, 'npulses',
+        np.atleast_1d(psr.npulses['data'][ind_ray]), nrays_filled)
+    if psr_poi.Doppler_velocity is not None:
+        psr_poi.Doppler_velocity['data'] = _append_rays(
+            buffers, 'Doppler_velocity',
+            psr.Doppler_velocity['data'][ind_ray, :].reshape(
+                nrays, psr.npulses_max), nrays_filled)
     if psr_poi.Doppler_frequency is not None:
-        if np.size(psr_poi.Doppler_frequency['data']) == 0:
-            psr_poi.Doppler_frequency['data'] = (
-                psr.Doppler_frequency['data'][ind_ray, :].reshape(
-                    nrays, psr_poi.npulses_max))
-        else:
-            Doppler_data = psr.Doppler_frequency['data'][ind_ray, :]
-            Doppler_data = Doppler_data.reshape(nrays, psr.npulses_max)
-
-            if psr_poi.npulses_max == psr.npulses_max:
-                psr_poi.Doppler_frequency['data'] = np.ma.append(
-                    psr_poi.Doppler_frequency['data'],
-                    Doppler_data, axis=0)
-            elif psr.npulses_max < psr_poi.npulses_max:
-                Doppler_aux = np.ma.masked_all((nrays, psr_poi.npulses_max))
-                for i in range(nrays):
-                    Doppler_aux[i, 0:psr.npulses_max] = Doppler_data[i, :]
-                psr_poi.Doppler_frequency['data'] = np.ma.append(
-                    psr_poi.Doppler_frequency['data'], Doppler_aux, axis=0)
-            else:
-                Doppler_aux = np.ma.masked_all(
-                    (psr_poi.nrays, psr.npulses_max))
-                Doppler_aux[0:psr_poi.nrays-nrays, 0:psr_poi.npulses_max] = (
-                    psr_poi.Doppler_frequency['data'])
-                Doppler_aux[psr_poi.nrays-nrays:, :] = Doppler_data
-                psr_poi.Doppler_frequency['data'] = Doppler_aux
+        psr_poi.Doppler_frequency['data'] = _append_rays(
+            buffers, 'Doppler_frequency',
+            psr.Doppler_frequency['data'][ind_ray, :].reshape(
+                nrays, psr.npulses_max), nrays_filled)
 
     psr_poi.npulses_max = max(psr_poi.npulses_max, psr.npulses_max)
 
@@ -552,14 +572,16 @@ def process_filter_0Doppler(procstatus, dscfg, radar_list=None):
     """
 
     if procstatus != 1:
+        if procstatus == 0:
+            _parse_datatypes(dscfg)
+            _get_ind_rad(dscfg)
         return None, None
 
     field_name_list = []
-    for datatypedescr in dscfg['datatype']:
-        radarnr, _, datatype, _, _ = get_datatype_fields(datatypedescr)
-        field_name_list.append(get_fieldname_pyart(datatype))
+    for radarnr, datatype, field_name in _parse_datatypes(dscfg):
+        field_name_list.append(field_name)
 
-    ind_rad = int(radarnr[5:8])-1
+    ind_rad = _get_ind_rad(dscfg)
     if (radar_list is None) or (radar_list[ind_rad] is None):
         warn('ERROR: No valid radar')
         return None, None
@@ -573,27 +595,35 @@ def process_filter_0Doppler(procstatus, dscfg, radar_list=None):
     else:
         axis = psr.Doppler_frequency['data']
 
+    # Doppler bins to filter (nrays, npulses_max)
+    dopp_mask = np.ma.filled(np.logical_and(
+        axis >= -filter_width/2., axis <= filter_width/2.), fill_value=False)
+    if not _NUMBA_AVAILABLE:
+        # shape (nrays, 1, npulses_max) to broadcast along the range gates
+        dopp_mask = np.expand_dims(dopp_mask, axis=1)
+
+    psr_fields = psr.fields
     fields = dict()
     for field_name in field_name_list:
-        if field_name not in psr.fields:
+        if field_name not in psr_fields:
             warn('Unable to filter 0-Doppler. Missing field '+field_name)
             continue
 
         field_name_aux = field_name.replace('unfiltered_', '')
         field = pyart.config.get_metadata(field_name_aux)
-        field['data'] = deepcopy(psr.fields[field_name]['data'])
-        for ray in range(psr.nrays):
-            ind = np.ma.where(np.logical_and(
-                axis[ray, :] >= -filter_width/2.,
-                axis[ray, :] <= filter_width/2.))
-            field['data'][ray, :, ind] = np.ma.masked
+        field['data'] = _clone_data_shared_buffer(
+            psr_fields[field_name]['data'])
+        field_mask = field['data'].mask
+        if _NUMBA_AVAILABLE:
+            mask_Doppler_bins(dopp_mask, field_mask)
+        else:
+            np.logical_or(field_mask, dopp_mask, out=field_mask)
         fields.update({field_name_aux: field})
 
-    # prepare for exit
-    new_dataset = {'radar_out': deepcopy(psr)}
-    new_dataset['radar_out'].fields = dict()
-    for field_name in fields.keys():
-        new_dataset['radar_out'].add_field(field_name, fields[field_name])
+    # prepare for exit. The fields have the shape of the input fields so
+    # they can be assigned directly without validation
+    new_dataset = {'radar_out': clone_without_fields(psr)}
+    new_dataset['radar_out'].fields = fields
 
     return new_dataset, ind_rad
 
@@ -628,54 +658,77 @@ def process_filter_srhohv(procstatus, dscfg, radar_list=None):
     """
 
     if procstatus != 1:
+        if procstatus == 0:
+            _parse_datatypes(dscfg)
+            _get_ind_rad(dscfg)
         return None, None
 
     field_name_list = []
     sRhoHV_found = False
-    for datatypedescr in dscfg['datatype']:
-        radarnr, _, datatype, _, _ = get_datatype_fields(datatypedescr)
+    for radarnr, datatype, field_name in _parse_datatypes(dscfg):
         if datatype in ('sRhoHV', 'sRhoHVu') and not sRhoHV_found:
-            sRhoHV_field = get_fieldname_pyart(datatype)
+            sRhoHV_field = field_name
             sRhoHV_found = True
         else:
-            field_name_list.append(get_fieldname_pyart(datatype))
+            field_name_list.append(field_name)
 
     if not sRhoHV_found:
         warn('sRhoHV field is required for sRhoHV filtering')
         return None, None
 
-    ind_rad = int(radarnr[5:8])-1
+    ind_rad = _get_ind_rad(dscfg)
     if (radar_list is None) or (radar_list[ind_rad] is None):
         warn('ERROR: No valid radar')
         return None, None
     psr = radar_list[ind_rad]
 
-    if sRhoHV_field not in psr.fields:
+    psr_fields = psr.fields
+    if sRhoHV_field not in psr_fields:
         warn('Unable to obtain apply sRhoHV filter. Missing field ' +
              sRhoHV_field)
         return None, None
 
     sRhoHV_threshold = dscfg.get('sRhoHV_threshold', 0.9)
-    sRhoHV = psr.fields[sRhoHV_field]['data']
+    sRhoHV = psr_fields[sRhoHV_field]['data']
+
+    # the filter mask is the same for all fields. Compute it only once
+    sRhoHV_data = np.ma.getdata(sRhoHV)
+    sRhoHV_mask = np.ma.getmaskarray(sRhoHV)
+    if _NUMBA_AVAILABLE:
+        bad = np.zeros(sRhoHV_data.shape, dtype=bool)
+        mask_low_magnitude(sRhoHV_data, sRhoHV_mask, sRhoHV_threshold, bad)
+    else:
+        # compare squared magnitudes to avoid the square root
+        threshold2 = (
+            sRhoHV_threshold*sRhoHV_threshold if sRhoHV_threshold >= 0.
+            else -1.)
+        bad = (
+            sRhoHV_data.real*sRhoHV_data.real +
+            sRhoHV_data.imag*sRhoHV_data.imag <= threshold2)
+        bad |= sRhoHV_mask
 
     fields = dict()
     for field_name in field_name_list:
-        if field_name not in psr.fields:
+        if field_name not in psr_fields:
             warn('Unable to filter according to sRhoHV. Missing field ' +
                  field_name)
             continue
 
         field_name_aux = field_name.replace('unfiltered_', '')
         field = pyart.config.get_metadata(field_name_aux)
-        field['data'] = deepcopy(psr.fields[field_name]['data'])
-        field['data'][np.ma.abs(sRhoHV) <= sRhoHV_threshold] = np.ma.masked
+        field['data'] = _clone_data_shared_buffer(
+            psr_fields[field_name]['data'])
+        field_mask = field['data'].mask
+        if _NUMBA_AVAILABLE:
+            merge_masks(bad, field_mask)
+        else:
+            np.logical_or(field_mask, bad, out=field_mask)
         fields.update({field_name_aux: field})
 
-    # prepare for exit
-    new_dataset = {'radar_out': deepcopy(psr)}
-    new_dataset['radar_out'].fields = dict()
-    for field_name in fields.keys():
-        new_dataset['radar_out'].add_field(field_name, fields[field_name])
+    # prepare for exit. The fields have the shape of the input fields so
+    # they can be assigned directly without validation
+    new_dataset = {'radar_out': clone_without_fields(psr)}
+    new_dataset['radar_out'].fields = fields
 
     return new_dataset, ind_rad
 
@@ -710,61 +763,85 @@ def process_filter_spectra_noise(procstatus, dscfg, radar_list=None):
     """
 
     if procstatus != 1:
+        if procstatus == 0:
+            _parse_datatypes(dscfg)
+            _get_ind_rad(dscfg)
         return None, None
 
     field_name_list = []
     signal_found = False
     noise_found = False
-    for datatypedescr in dscfg['datatype']:
-        radarnr, _, datatype, _, _ = get_datatype_fields(datatypedescr)
+    for radarnr, datatype, field_name in _parse_datatypes(dscfg):
         if (datatype in ('ShhADU', 'SvvADU', 'ShhADUu', 'SvvADUu') and
                 not signal_found):
-            signal_field = get_fieldname_pyart(datatype)
+            signal_field = field_name
             signal_found = True
         elif datatype in ('sNADUh', 'sNADUv') and not noise_found:
-            noise_field = get_fieldname_pyart(datatype)
+            noise_field = field_name
             noise_found = True
         else:
-            field_name_list.append(get_fieldname_pyart(datatype))
+            field_name_list.append(field_name)
 
     if not signal_found or not noise_found:
         warn('Signal and noise fields are required for noise filtering')
         return None, None
 
-    ind_rad = int(radarnr[5:8])-1
+    ind_rad = _get_ind_rad(dscfg)
     if (radar_list is None) or (radar_list[ind_rad] is None):
         warn('ERROR: No valid radar')
         return None, None
     psr = radar_list[ind_rad]
 
-    if signal_field not in psr.fields or noise_field not in psr.fields:
+    psr_fields = psr.fields
+    if signal_field not in psr_fields or noise_field not in psr_fields:
         warn('Unable to obtain apply spectral noise filter. Missing fields')
         return None, None
 
     clipping_level = dscfg.get('clipping_level', 10.)
 
-    # get Doppler bins below clipping level
-    clip_pwr = (
-        psr.fields[noise_field]['data']*np.power(10., 0.1*clipping_level))
-
-    s_pwr = pyart.retrieve.compute_spectral_power(
-        psr, units='ADU', signal_field=signal_field,
-        noise_field=noise_field)
-
-    mask = np.ma.less_equal(s_pwr['data'], clip_pwr)
+    # get Doppler bins below clipping level. The signal power [ADU] is
+    # compared with the clipping power without computing the spectral power
+    # field. Bins where the signal or the noise are masked are also filtered
+    signal = psr_fields[signal_field]['data']
+    noise = psr_fields[noise_field]['data']
+    signal_data = np.ma.getdata(signal)
+    noise_data = np.ma.getdata(noise)
+    clipping_factor = np.power(10., 0.1*clipping_level)
+
+    mask = np.ma.getmaskarray(signal) | np.ma.getmaskarray(noise)
+    if noise_data.shape[-1] > 1 and noise_data.strides[-1] == 0:
+        # the noise is replicated along the pulse axis. Use a single plane
+        # so that the clipping power is not computed for each Doppler bin
+        noise_data = noise_data[:, :, :1]
+    if _NUMBA_AVAILABLE:
+        mask_low_power(
+            signal_data, np.broadcast_to(noise_data, signal_data.shape),
+            clipping_factor, mask)
+    else:
+        mask |= (
+            signal_data.real*signal_data.real +
+            signal_data.imag*signal_data.imag <= noise_data*clipping_factor)
 
     # filter data
-    new_dataset = {'radar_out': deepcopy(psr)}
-    new_dataset['radar_out'].fields = dict()
+    fields = dict()
     for field_name in field_name_list:
-        if field_name not in psr.fields:
+        if field_name not in psr_fields:
             warn('Unable to filter field '+field_name)
             continue
 
-        new_dataset['radar_out'].add_field(
-            field_name, psr.fields[field_name])
-        new_dataset['radar_out'].fields[field_name]['data'][mask] = (
-            np.ma.masked)
+        field = copy(psr_fields[field_name])
+        field['data'] = _clone_data_shared_buffer(field['data'])
+        field_mask = field['data'].mask
+        if _NUMBA_AVAILABLE:
+            merge_masks(mask, field_mask)
+        else:
+            np.logical_or(field_mask, mask, out=field_mask)
+        fields.update({field_name: field})
+
+    # prepare for exit. The fields have the shape of the input fields so
+    # they can be assigned directly without validation
+    new_dataset = {'radar_out': clone_without_fields(psr)}
+    new_dataset['radar_out'].fields = fields
 
     return new_dataset, ind_rad
 
@@ -802,14 +879,16 @@ def process_spectra_ang_avg(procstatus, dscfg, radar_list=None):
     """
 
     if procstatus != 1:
+        if procstatus == 0:
+            _parse_datatypes(dscfg)
+            _get_ind_rad(dscfg)
         return None, None
 
     field_name_list = []
-    for datatypedescr in dscfg['datatype']:
-        radarnr, _, datatype, _, _ = get_datatype_fields(datatypedescr)
-        field_name_list.append(get_fieldname_pyart(datatype))
+    for radarnr, datatype, field_name in _parse_datatypes(dscfg):
+        field_name_list.append(field_name)
 
-    ind_rad = int(radarnr[5:8])-1
+    ind_rad = _get_ind_rad(dscfg)
     if (radar_list is None) or (radar_list[ind_rad] is None):
         warn('ERROR: No valid radar')
         return None, None
@@ -890,6 +969,12 @@ def process_spectral_power(procstatus, dscfg, radar_list=None):
         smooth_window : int or None
             Size of the moving Gaussian smoothing window. If none no smoothing
             will be applied
+        fp32_spectra : bool. Dataset keyword
+            If True complex128 spectra are cast to complex64 before the
+            computation. Default False
+        validate_add_field : bool. Dataset keyword
+            If True the output fields are added to the output object with
+            the validation of Py-ART. Default False
     radar_list : list of spectra objects
         Optional. list of spectra objects
 
@@ -903,17 +988,19 @@ def process_spectral_power(procstatus, dscfg, radar_list=None):
     """
 
     if procstatus != 1:
+        if procstatus == 0:
+            _parse_datatypes(dscfg)
+            _get_ind_rad(dscfg)
         return None, None
 
     noise_field = None
-    for datatypedescr in dscfg['datatype']:
-        radarnr, _, datatype, _, _ = get_datatype_fields(datatypedescr)
+    for radarnr, datatype, field_name in _parse_datatypes(dscfg):
         if datatype in ('ShhADU', 'SvvADU', 'ShhADUu', 'SvvADUu'):
-            signal_field = get_fieldname_pyart(datatype)
+            signal_field = field_name
         elif datatype in ('sNADUh', 'sNADUv'):
-            noise_field = get_fieldname_pyart(datatype)
+            noise_field = field_name
 
-    ind_rad = int(radarnr[5:8])-1
+    ind_rad = _get_ind_rad(dscfg)
     if (radar_list is None) or (radar_list[ind_rad] is None):
         warn('ERROR: No valid radar')
         return None, None
@@ -928,15 +1015,18 @@ def process_spectral_power(procstatus, dscfg, radar_list=None):
     subtract_noise = dscfg.get('subtract_noise', False)
     smooth_window = dscfg.get('smooth_window', None)
 
+    psr_in = _prepare_spectra(
+        psr, (signal_field, ), fp32=dscfg.get('fp32_spectra', False))
+
     s_pwr = pyart.retrieve.compute_spectral_power(
-        psr, units=units, subtract_noise=subtract_noise,
+        psr_in, units=units, subtract_noise=subtract_noise,
         smooth_window=smooth_window, signal_field=signal_field,
         noise_field=noise_field)
 
     # prepare for exit
-    new_dataset = {'radar_out': deepcopy(psr)}
-    new_dataset['radar_out'].fields = dict()
-    new_dataset['radar_out'].add_field(s_pwr['standard_name'], s_pwr)
+    new_dataset = {'radar_out': clone_without_fields(psr)}
+    _fast_add_field(
+        new_dataset['radar_out'], s_pwr['standard_name'], s_pwr, dscfg)
 
     return new_dataset, ind_rad
 
@@ -964,6 +1054,12 @@ def process_spectral_noise(procstatus, dscfg, radar_list=None):
         nnoise_min : int
             Minimum number of samples to consider the estimated noise power
             valid
+        fp32_spectra : bool. Dataset keyword
+            If True complex128 spectra are cast to complex64 before the
+            computation. Default False
+        validate_add_field : bool. Dataset keyword
+            If True the output fields are added to the output object with
+            the validation of Py-ART. Default False
     radar_list : list of spectra objects
         Optional. list of spectra objects
 
@@ -977,14 +1073,16 @@ def process_spectral_noise(procstatus, dscfg, radar_list=None):
     """
 
     if procstatus != 1:
+        if procstatus == 0:
+            _parse_datatypes(dscfg)
+            _get_ind_rad(dscfg)
         return None, None
 
-    for datatypedescr in dscfg['datatype']:
-        radarnr, _, datatype, _, _ = get_datatype_fields(datatypedescr)
+    for radarnr, datatype, field_name in _parse_datatypes(dscfg):
         if datatype in ('ShhADU', 'SvvADU', 'ShhADUu', 'SvvADUu'):
-            signal_field = get_fieldname_pyart(datatype)
+            signal_field = field_name
 
-    ind_rad = int(radarnr[5:8])-1
+    ind_rad = _get_ind_rad(dscfg)
     if (radar_list is None) or (radar_list[ind_rad] is None):
         warn('ERROR: No valid radar')
         return None, None
@@ -1000,14 +1098,17 @@ def process_spectral_noise(procstatus, dscfg, radar_list=None):
     rmin = dscfg.get('rmin', 0.)
     nnoise_min = dscfg.get('nnoise_min', 100)
 
+    psr_in = _prepare_spectra(
+        psr, (signal_field, ), fp32=dscfg.get('fp32_spectra', False))
+
     s_pwr = pyart.retrieve.compute_spectral_noise(
-        psr, units=units, navg=navg, rmin=rmin, nnoise_min=nnoise_min,
+        psr_in, units=units, navg=navg, rmin=rmin, nnoise_min=nnoise_min,
         signal_field=signal_field)
 
     # prepare for exit
-    new_dataset = {'radar_out': deepcopy(psr)}
-    new_dataset['radar_out'].fields = dict()
-    new_dataset['radar_out'].add_field(s_pwr['standard_name'], s_pwr)
+    new_dataset = {'radar_out': clone_without_fields(psr)}
+    _fast_add_field(
+        new_dataset['radar_out'], s_pwr['standard_name'], s_pwr, dscfg)
 
     return new_dataset, ind_rad
 
@@ -1026,6 +1127,12 @@ def process_spectral_phase(procstatus, dscfg, radar_list=None):
 
         datatype : list of string. Dataset keyword
             The input data types
+        fp32_spectra : bool. Dataset keyword
+            If True complex128 spectra are cast to complex64 before the
+            computation. Default False
+        validate_add_field : bool. Dataset keyword
+            If True the output fields are added to the output object with
+            the validation of Py-ART. Default False
     radar_list : list of spectra objects
         Optional. list of spectra objects
 
@@ -1039,14 +1146,16 @@ def process_spectral_phase(procstatus, dscfg, radar_list=None):
     """
 
     if procstatus != 1:
+        if procstatus == 0:
+            _parse_datatypes(dscfg)
+            _get_ind_rad(dscfg)
         return None, None
 
-    for datatypedescr in dscfg['datatype']:
-        radarnr, _, datatype, _, _ = get_datatype_fields(datatypedescr)
+    for radarnr, datatype, field_name in _parse_datatypes(dscfg):
         if datatype in ('ShhADU', 'SvvADU', 'ShhADUu', 'SvvADUu'):
-            signal_field = get_fieldname_pyart(datatype)
+            signal_field = field_name
 
-    ind_rad = int(radarnr[5:8])-1
+    ind_rad = _get_ind_rad(dscfg)
     if (radar_list is None) or (radar_list[ind_rad] is None):
         warn('ERROR: No valid radar')
         return None, None
@@ -1057,13 +1166,16 @@ def process_spectral_phase(procstatus, dscfg, radar_list=None):
              signal_field)
         return None, None
 
+    psr_in = _prepare_spectra(
+        psr, (signal_field, ), fp32=dscfg.get('fp32_spectra', False))
+
     s_phase = pyart.retrieve.compute_spectral_phase(
-        psr, signal_field=signal_field)
+        psr_in, signal_field=signal_field)
 
     # prepare for exit
-    new_dataset = {'radar_out': deepcopy(psr)}
-    new_dataset['radar_out'].fields = dict()
-    new_dataset['radar_out'].add_field(s_phase['standard_name'], s_phase)
+    new_dataset = {'radar_out': clone_without_fields(psr)}
+    _fast_add_field(
+        new_dataset['radar_out'], s_phase['standard_name'], s_phase, dscfg)
 
     return new_dataset, ind_rad
 
@@ -1087,6 +1199,12 @@ def process_spectral_reflectivity(procstatus, dscfg, radar_list=None):
         smooth_window : int or None
             Size of the moving Gaussian smoothing window. If none no smoothing
             will be applied
+        fp32_spectra : bool. Dataset keyword
+            If True complex128 spectra are cast to complex64 before the
+            computation. Default False
+        validate_add_field : bool. Dataset keyword
+            If True the output fields are added to the output object with
+            the validation of Py-ART. Default False
     radar_list : list of spectra objects
         Optional. list of spectra objects
 
@@ -1100,25 +1218,27 @@ def process_spectral_reflectivity(procstatus, dscfg, radar_list=None):
     """
 
     if procstatus != 1:
+        if procstatus == 0:
+            _parse_datatypes(dscfg)
+            _get_ind_rad(dscfg)
         return None, None
 
     noise_field = None
     signal_field = None
     pwr_field = None
-    for datatypedescr in dscfg['datatype']:
-        radarnr, _, datatype, _, _ = get_datatype_fields(datatypedescr)
+    for radarnr, datatype, field_name in _parse_datatypes(dscfg):
         if datatype in ('ShhADU', 'SvvADU', 'ShhADUu', 'SvvADUu'):
-            signal_field = get_fieldname_pyart(datatype)
+            signal_field = field_name
         elif datatype in ('sNADUh', 'sNADUv'):
-            noise_field = get_fieldname_pyart(datatype)
+            noise_field = field_name
         elif datatype in ('sPhhADU', 'sPvvADU', 'sPhhADUu', 'sPvvADUu'):
-            pwr_field = get_fieldname_pyart(datatype)
+            pwr_field = field_name
 
     if pwr_field is None and signal_field is None:
         warn('Either signal or power fields must be specified')
         return None, None
 
-    ind_rad = int(radarnr[5:8])-1
+    ind_rad = _get_ind_rad(dscfg)
     if (radar_list is None) or (radar_list[ind_rad] is None):
         warn('ERROR: No valid radar')
         return None, None
@@ -1141,15 +1261,18 @@ def process_spectral_reflectivity(procstatus, dscfg, radar_list=None):
     subtract_noise = dscfg.get('subtract_noise', False)
     smooth_window = dscfg.get('smooth_window', None)
 
+    psr_in = _prepare_spectra(
+        psr, (signal_field, ), fp32=dscfg.get('fp32_spectra', False))
+
     sdBZ = pyart.retrieve.compute_spectral_reflectivity(
-        psr, compute_power=compute_power, subtract_noise=subtract_noise,
+        psr_in, compute_power=compute_power, subtract_noise=subtract_noise,
         smooth_window=smooth_window, pwr_field=pwr_field,
         signal_field=signal_field, noise_field=noise_field)
 
     # prepare for exit
-    new_dataset = {'radar_out': deepcopy(psr)}
-    new_dataset['radar_out'].fields = dict()
-    new_dataset['radar_out'].add_field(sdBZ['standard_name'], sdBZ)
+    new_dataset = {'radar_out': clone_without_fields(psr)}
+    _fast_add_field(
+        new_dataset['radar_out'], sdBZ['standard_name'], sdBZ, dscfg)
 
     return new_dataset, ind_rad
 
@@ -1174,6 +1297,12 @@ def process_spectral_differential_reflectivity(procstatus, dscfg,
         smooth_window : int or None
             Size of the moving Gaussian smoothing window. If none no smoothing
             will be applied
+        fp32_spectra : bool. Dataset keyword
+            If True complex128 spectra are cast to complex64 before the
+            computation. Default False
+        validate_add_field : bool. Dataset keyword
+            If True the output fields are added to the output object with
+            the validation of Py-ART. Default False
     radar_list : list of spectra objects
         Optional. list of spectra objects
 
@@ -1187,30 +1316,20 @@ def process_spectral_differential_reflectivity(procstatus, dscfg,
     """
 
     if procstatus != 1:
+        if procstatus == 0:
+            _parse_datatypes(dscfg)
+            _get_ind_rad(dscfg)
         return None, None
 
-    noise_h_field = None
-    noise_v_field = None
-    signal_h_field = None
-    signal_v_field = None
-    pwr_h_field = None
-    pwr_v_field = None
-    for datatypedescr in dscfg['datatype']:
-        radarnr, _, datatype, _, _ = get_datatype_fields(datatypedescr)
-        if datatype in ('ShhADU', 'ShhADUu'):
-            signal_h_field = get_fieldname_pyart(datatype)
-        elif datatype in ('SvvADU', 'SvvADUu'):
-            signal_v_field = get_fieldname_pyart(datatype)
-        elif datatype == 'sNADUh':
-            noise_h_field = get_fieldname_pyart(datatype)
-        elif datatype == 'sNADUv':
-            noise_v_field = get_fieldname_pyart(datatype)
-        elif datatype in ('sPhhADU', 'sPhhADUu'):
-            pwr_h_field = get_fieldname_pyart(datatype)
-        elif datatype in ('sPvvADU', 'sPvvADUu'):
-            pwr_v_field = get_fieldname_pyart(datatype)
+    pol_fields = _extract_pol_fields(_parse_datatypes(dscfg))
+    signal_h_field = pol_fields.signal_h
+    signal_v_field = pol_fields.signal_v
+    noise_h_field = pol_fields.noise_h
+    noise_v_field = pol_fields.noise_v
+    pwr_h_field = pol_fields.pwr_h
+    pwr_v_field = pol_fields.pwr_v
 
-    ind_rad = int(radarnr[5:8])-1
+    ind_rad = _get_ind_rad(dscfg)
     if (radar_list is None) or (radar_list[ind_rad] is None):
         warn('ERROR: No valid radar')
         return None, None
@@ -1234,17 +1353,21 @@ def process_spectral_differential_reflectivity(procstatus, dscfg,
     subtract_noise = dscfg.get('subtract_noise', False)
     smooth_window = dscfg.get('smooth_window', None)
 
+    psr_in = _prepare_spectra(
+        psr, (signal_h_field, signal_v_field),
+        fp32=dscfg.get('fp32_spectra', False))
+
     sZDR = pyart.retrieve.compute_spectral_differential_reflectivity(
-        psr, compute_power=compute_power, subtract_noise=subtract_noise,
+        psr_in, compute_power=compute_power, subtract_noise=subtract_noise,
         smooth_window=smooth_window, pwr_h_field=pwr_h_field,
         pwr_v_field=pwr_v_field, signal_h_field=signal_h_field,
         signal_v_field=signal_v_field, noise_h_field=noise_h_field,
         noise_v_field=noise_v_field)
 
     # prepare for exit
-    new_dataset = {'radar_out': deepcopy(psr)}
-    new_dataset['radar_out'].fields = dict()
-    new_dataset['radar_out'].add_field(sZDR['standard_name'], sZDR)
+    new_dataset = {'radar_out': clone_without_fields(psr)}
+    _fast_add_field(
+        new_dataset['radar_out'], sZDR['standard_name'], sZDR, dscfg)
 
     return new_dataset, ind_rad
 
@@ -1263,6 +1386,12 @@ def process_spectral_differential_phase(procstatus, dscfg, radar_list=None):
 
         datatype : list of string. Dataset keyword
             The input data types
+        fp32_spectra : bool. Dataset keyword
+            If True complex128 spectra are cast to complex64 before the
+            computation. Default False
+        validate_add_field : bool. Dataset keyword
+            If True the output fields are added to the output object with
+            the validation of Py-ART. Default False
     radar_list : list of spectra objects
         Optional. list of spectra objects
 
@@ -1276,21 +1405,17 @@ def process_spectral_differential_phase(procstatus, dscfg, radar_list=None):
     """
 
     if procstatus != 1:
+        if procstatus == 0:
+            _parse_datatypes(dscfg)
+            _get_ind_rad(dscfg)
         return None, None
 
-    signal_h_field = None
-    signal_v_field = None
-    srhohv_field = None
-    for datatypedescr in dscfg['datatype']:
-        radarnr, _, datatype, _, _ = get_datatype_fields(datatypedescr)
-        if datatype in ('ShhADU', 'ShhADUu'):
-            signal_h_field = get_fieldname_pyart(datatype)
-        elif datatype in ('SvvADU', 'SvvADUu'):
-            signal_v_field = get_fieldname_pyart(datatype)
-        elif datatype in ('sRhoHV', 'sRhoHVu'):
-            srhohv_field = get_fieldname_pyart(datatype)
+    pol_fields = _extract_pol_fields(_parse_datatypes(dscfg))
+    signal_h_field = pol_fields.signal_h
+    signal_v_field = pol_fields.signal_v
+    srhohv_field = pol_fields.srhohv
 
-    ind_rad = int(radarnr[5:8])-1
+    ind_rad = _get_ind_rad(dscfg)
     if (radar_list is None) or (radar_list[ind_rad] is None):
         warn('ERROR: No valid radar')
         return None, None
@@ -1310,14 +1435,18 @@ def process_spectral_differential_phase(procstatus, dscfg, radar_list=None):
              'Missing fields')
         return None, None
 
+    psr_in = _prepare_spectra(
+        psr, (signal_h_field, signal_v_field),
+        fp32=dscfg.get('fp32_spectra', False))
+
     sPhiDP = pyart.retrieve.compute_spectral_differential_phase(
-        psr, use_rhohv=use_rhohv, srhohv_field=srhohv_field,
+        psr_in, use_rhohv=use_rhohv, srhohv_field=srhohv_field,
         signal_h_field=signal_h_field, signal_v_field=signal_v_field)
 
     # prepare for exit
-    new_dataset = {'radar_out': deepcopy(psr)}
-    new_dataset['radar_out'].fields = dict()
-    new_dataset['radar_out'].add_field(sPhiDP['standard_name'], sPhiDP)
+    new_dataset = {'radar_out': clone_without_fields(psr)}
+    _fast_add_field(
+        new_dataset['radar_out'], sPhiDP['standard_name'], sPhiDP, dscfg)
 
     return new_dataset, ind_rad
 
@@ -1338,6 +1467,12 @@ def process_spectral_rhohv(procstatus, dscfg, radar_list=None):
             The input data types
         subtract_noise : Bool
             If True noise will be subtracted from the signal
+        fp32_spectra : bool. Dataset keyword
+            If True complex128 spectra are cast to complex64 before the
+            computation. Default False
+        validate_add_field : bool. Dataset keyword
+            If True the output fields are added to the output object with
+            the validation of Py-ART. Default False
     radar_list : list of spectra objects
         Optional. list of spectra objects
 
@@ -1351,22 +1486,18 @@ def process_spectral_rhohv(procstatus, dscfg, radar_list=None):
     """
 
     if procstatus != 1:
+        if procstatus == 0:
+            _parse_datatypes(dscfg)
+            _get_ind_rad(dscfg)
         return None, None
 
-    noise_h_field = None
-    noise_v_field = None
-    for datatypedescr in dscfg['datatype']:
-        radarnr, _, datatype, _, _ = get_datatype_fields(datatypedescr)
-        if datatype in ('ShhADU', 'ShhADUu'):
-            signal_h_field = get_fieldname_pyart(datatype)
-        elif datatype in ('SvvADU', 'SvvADUu'):
-            signal_v_field = get_fieldname_pyart(datatype)
-        elif datatype == 'sNADUh':
-            noise_h_field = get_fieldname_pyart(datatype)
-        elif datatype == 'sNADUv':
-            noise_v_field = get_fieldname_pyart(datatype)
+    pol_fields = _extract_pol_fields(_parse_datatypes(dscfg))
+    signal_h_field = pol_fields.signal_h
+    signal_v_field = pol_fields.signal_v
+    noise_h_field = pol_fields.noise_h
+    noise_v_field = pol_fields.noise_v
 
-    ind_rad = int(radarnr[5:8])-1
+    ind_rad = _get_ind_rad(dscfg)
     if (radar_list is None) or (radar_list[ind_rad] is None):
         warn('ERROR: No valid radar')
         return None, None
@@ -1379,15 +1510,31 @@ def process_spectral_rhohv(procstatus, dscfg, radar_list=None):
 
     subtract_noise = dscfg.get('subtract_noise', False)
 
-    sRhoHV = pyart.retrieve.compute_spectral_rhohv(
-        psr, subtract_noise=subtract_noise, signal_h_field=signal_h_field,
-        signal_v_field=signal_v_field, noise_h_field=noise_h_field,
-        noise_v_field=noise_v_field)
+    psr_in = _prepare_spectra(
+        psr, (signal_h_field, signal_v_field),
+        fp32=dscfg.get('fp32_spectra', False))
+
+    fast_path = _NUMEXPR_AVAILABLE
+    if _NUMBA_AVAILABLE:
+        fast_path = (
+            psr_in.fields[signal_h_field]['data'].dtype == np.complex64 and
+            psr_in.fields[signal_v_field]['data'].dtype == np.complex64)
+    if fast_path and (not subtract_noise or (noise_h_field in psr_in.fields and
+                                             noise_v_field in psr_in.fields)):
+        sRhoHV = _compute_spectral_rhohv(
+            psr_in, subtract_noise=subtract_noise,
+            signal_h_field=signal_h_field, signal_v_field=signal_v_field,
+            noise_h_field=noise_h_field, noise_v_field=noise_v_field)
+    else:
+        sRhoHV = pyart.retrieve.compute_spectral_rhohv(
+            psr_in, subtract_noise=subtract_noise,
+            signal_h_field=signal_h_field, signal_v_field=signal_v_field,
+            noise_h_field=noise_h_field, noise_v_field=noise_v_field)
 
     # prepare for exit
-    new_dataset = {'radar_out': deepcopy(psr)}
-    new_dataset['radar_out'].fields = dict()
-    new_dataset['radar_out'].add_field(sRhoHV['standard_name'], sRhoHV)
+    new_dataset = {'radar_out': clone_without_fields(psr)}
+    _fast_add_field(
+        new_dataset['radar_out'], sRhoHV['standard_name'], sRhoHV, dscfg)
 
     return new_dataset, ind_rad
 
@@ -1413,6 +1560,9 @@ def process_pol_variables(procstatus, dscfg, radar_list=None):
             will be applied
         variables : list of str
             list of variables to compute. Default dBZ
+        fp32_spectra : bool. Dataset keyword
+            If True complex128 spectra are cast to complex64 before the
+            computation. Default False
     radar_list : list of spectra objects
         Optional. list of spectra objects
 
@@ -1425,33 +1575,21 @@ def process_pol_variables(procstatus, dscfg, radar_list=None):
 
     """
     if procstatus != 1:
+        if procstatus == 0:
+            _parse_datatypes(dscfg)
+            _get_ind_rad(dscfg)
         return None, None
 
-    noise_h_field = None
-    noise_v_field = None
-    signal_h_field = None
-    signal_v_field = None
-    pwr_h_field = None
-    pwr_v_field = None
-    srhohv_field = None
-    for datatypedescr in dscfg['datatype']:
-        radarnr, _, datatype, _, _ = get_datatype_fields(datatypedescr)
-        if datatype in ('ShhADU', 'ShhADUu'):
-            signal_h_field = get_fieldname_pyart(datatype)
-        elif datatype in ('SvvADU', 'SvvADUu'):
-            signal_v_field = get_fieldname_pyart(datatype)
-        elif datatype == 'sNADUh':
-            noise_h_field = get_fieldname_pyart(datatype)
-        elif datatype == 'sNADUv':
-            noise_v_field = get_fieldname_pyart(datatype)
-        elif datatype in ('sPhhADU', 'sPhhADUu'):
-            pwr_h_field = get_fieldname_pyart(datatype)
-        elif datatype in ('sPvvADU', 'sPvvADUu'):
-            pwr_v_field = get_fieldname_pyart(datatype)
-        elif datatype in ('sRhoHV', 'sRhoHVu'):
-            srhohv_field = get_fieldname_pyart(datatype)
+    pol_fields = _extract_pol_fields(_parse_datatypes(dscfg))
+    signal_h_field = pol_fields.signal_h
+    signal_v_field = pol_fields.signal_v
+    noise_h_field = pol_fields.noise_h
+    noise_v_field = pol_fields.noise_v
+    pwr_h_field = pol_fields.pwr_h
+    pwr_v_field = pol_fields.pwr_v
+    srhohv_field = pol_fields.srhohv
 
-    ind_rad = int(radarnr[5:8])-1
+    ind_rad = _get_ind_rad(dscfg)
     if (radar_list is None) or (radar_list[ind_rad] is None):
         warn('ERROR: No valid radar')
         return None, None
@@ -1479,10 +1617,11 @@ def process_pol_variables(procstatus, dscfg, radar_list=None):
 
     fields_list = []
     for variable in variables:
-        fields_list.append(get_fieldname_pyart(variable))
+        fields_list.append(_get_fieldname(variable))
 
-    radar = pyart.retrieve.compute_pol_variables(
-        psr, fields_list, use_pwr=use_pwr, subtract_noise=subtract_noise,
+    radar = _compute_pol_variables(
+        psr, fields_list, fp32=dscfg.get('fp32_spectra', False),
+        use_pwr=use_pwr, subtract_noise=subtract_noise,
         smooth_window=smooth_window, srhohv_field=srhohv_field,
         pwr_h_field=pwr_h_field, pwr_v_field=pwr_v_field,
         signal_h_field=signal_h_field, signal_v_field=signal_v_field,
@@ -1517,6 +1656,12 @@ def process_noise_power(procstatus, dscfg, radar_list=None):
         nnoise_min : int
             Minimum number of samples to consider the estimated noise power
             valid
+        fp32_spectra : bool. Dataset keyword
+            If True complex128 spectra are cast to complex64 before the
+            computation. Default False
+        validate_add_field : bool. Dataset keyword
+            If True the output fields are added to the output object with
+            the validation of Py-ART. Default False
     radar_list : list of spectra objects
         Optional. list of spectra objects
 
@@ -1530,14 +1675,16 @@ def process_noise_power(procstatus, dscfg, radar_list=None):
     """
 
     if procstatus != 1:
+        if procstatus == 0:
+            _parse_datatypes(dscfg)
+            _get_ind_rad(dscfg)
         return None, None
 
-    for datatypedescr in dscfg['datatype']:
-        radarnr, _, datatype, _, _ = get_datatype_fields(datatypedescr)
+    for radarnr, datatype, field_name in _parse_datatypes(dscfg):
         if datatype in ('ShhADU', 'SvvADU', 'ShhADUu', 'SvvADUu'):
-            signal_field = get_fieldname_pyart(datatype)
+            signal_field = field_name
 
-    ind_rad = int(radarnr[5:8])-1
+    ind_rad = _get_ind_rad(dscfg)
     if (radar_list is None) or (radar_list[ind_rad] is None):
         warn('ERROR: No valid radar')
         return None, None
@@ -1553,13 +1700,17 @@ def process_noise_power(procstatus, dscfg, radar_list=None):
     rmin = dscfg.get('rmin', 0.)
     nnoise_min = dscfg.get('nnoise_min', 100)
 
+    psr_in = _prepare_spectra(
+        psr, (signal_field, ), fp32=dscfg.get('fp32_spectra', False))
+
     noise = pyart.retrieve.compute_noise_power(
-        psr, units=units, navg=navg, rmin=rmin, nnoise_min=nnoise_min,
+        psr_in, units=units, navg=navg, rmin=rmin, nnoise_min=nnoise_min,
         signal_field=signal_field)
 
     # prepare for exit
-    new_dataset = {'radar_out': pyart.util.radar_from_spectra(psr)}
-    new_dataset['radar_out'].add_field(noise['standard_name'], noise)
+    new_dataset = {'radar_out': get_moments_radar(psr)}
+    _fast_add_field(
+        new_dataset['radar_out'], noise['standard_name'], noise, dscfg)
 
     return new_dataset, ind_rad
 
@@ -1578,6 +1729,9 @@ def process_reflectivity(procstatus, dscfg, radar_list=None):
 
         datatype : list of string. Dataset keyword
             The input data types
+        validate_add_field : bool. Dataset keyword
+            If True the output fields are added to the output object with
+            the validation of Py-ART. Default False
     radar_list : list of spectra objects
         Optional. list of spectra objects
 
@@ -1591,14 +1745,16 @@ def process_reflectivity(procstatus, dscfg, radar_list=None):
     """
 
     if procstatus != 1:
+        if procstatus == 0:
+            _parse_datatypes(dscfg)
+            _get_ind_rad(dscfg)
         return None, None
 
-    for datatypedescr in dscfg['datatype']:
-        radarnr, _, datatype, _, _ = get_datatype_fields(datatypedescr)
+    for radarnr, datatype, field_name in _parse_datatypes(dscfg):
         if datatype in ('sdBZ', 'sdBZv', 'sdBuZ', 'sdBuZv'):
-            sdBZ_field = get_fieldname_pyart(datatype)
+            sdBZ_field = field_name
 
-    ind_rad = int(radarnr[5:8])-1
+    ind_rad = _get_ind_rad(dscfg)
     if (radar_list is None) or (radar_list[ind_rad] is None):
         warn('ERROR: No valid radar')
         return None, None
@@ -1609,9 +1765,6 @@ def process_reflectivity(procstatus, dscfg, radar_list=None):
              'Missing field '+sdBZ_field)
         return None, None
 
-    dBZ = pyart.retrieve.compute_reflectivity(
-        psr, sdBZ_field=sdBZ_field)
-
     reflectivity_field = 'reflectivity'
     if datatype in ('sdBZv', 'sdBuZv'):
         reflectivity_field += 'vv'
@@ -1619,9 +1772,17 @@ def process_reflectivity(procstatus, dscfg, radar_list=None):
     if datatype in ('sdBuZ', 'sdBuZv'):
         reflectivity_field = 'unfiltered_'+reflectivity_field
 
+    if _NUMBA_AVAILABLE and psr.Doppler_velocity is not None:
+        dBZ = pyart.config.get_metadata(reflectivity_field)
+        dBZ['data'] = _get_Doppler_moments(psr, sdBZ_field)[0]
+    else:
+        dBZ = pyart.retrieve.compute_reflectivity(
+            psr, sdBZ_field=sdBZ_field)
+
     # prepare for exit
-    new_dataset = {'radar_out': pyart.util.radar_from_spectra(psr)}
-    new_dataset['radar_out'].add_field(reflectivity_field, dBZ)
+    new_dataset = {'radar_out': get_moments_radar(psr)}
+    _fast_add_field(
+        new_dataset['radar_out'], reflectivity_field, dBZ, dscfg)
 
     return new_dataset, ind_rad
 
@@ -1641,6 +1802,9 @@ def process_differential_reflectivity(procstatus, dscfg, radar_list=None):
 
         datatype : list of string. Dataset keyword
             The input data types
+        validate_add_field : bool. Dataset keyword
+            If True the output fields are added to the output object with
+            the validation of Py-ART. Default False
     radar_list : list of spectra objects
         Optional. list of spectra objects
 
@@ -1654,16 +1818,18 @@ def process_differential_reflectivity(procstatus, dscfg, radar_list=None):
     """
 
     if procstatus != 1:
+        if procstatus == 0:
+            _parse_datatypes(dscfg)
+            _get_ind_rad(dscfg)
         return None, None
 
-    for datatypedescr in dscfg['datatype']:
-        radarnr, _, datatype, _, _ = get_datatype_fields(datatypedescr)
+    for radarnr, datatype, field_name in _parse_datatypes(dscfg):
         if datatype in ('sdBZ', 'sdBuZ'):
-            sdBZ_field = get_fieldname_pyart(datatype)
+            sdBZ_field = field_name
         elif datatype in ('sdBZv', 'sdBuZv'):
-            sdBZv_field = get_fieldname_pyart(datatype)
+            sdBZv_field = field_name
 
-    ind_rad = int(radarnr[5:8])-1
+    ind_rad = _get_ind_rad(dscfg)
     if (radar_list is None) or (radar_list[ind_rad] is None):
         warn('ERROR: No valid radar')
         return None, None
@@ -1674,16 +1840,25 @@ def process_differential_reflectivity(procstatus, dscfg, radar_list=None):
              'Missing fields.')
         return None, None
 
-    zdr = pyart.retrieve.compute_differential_reflectivity(
-        psr, sdBZ_field=sdBZ_field, sdBZv_field=sdBZv_field)
-
     zdr_field = 'differential_reflectivity'
     if 'unfiltered' in sdBZ_field:
         zdr_field = 'unfiltered_'+zdr_field
 
+    if _NUMBA_AVAILABLE and psr.Doppler_velocity is not None:
+        # the horizontal and vertical reflectivities are shared with the
+        # other moments of the same spectra
+        zdr = pyart.config.get_metadata(zdr_field)
+        zdr['data'] = (
+            _get_Doppler_moments(psr, sdBZ_field)[0] -
+            _get_Doppler_moments(psr, sdBZv_field)[0])
+    else:
+        zdr = pyart.retrieve.compute_differential_reflectivity(
+            psr, sdBZ_field=sdBZ_field, sdBZv_field=sdBZv_field)
+
     # prepare for exit
-    new_dataset = {'radar_out': pyart.util.radar_from_spectra(psr)}
-    new_dataset['radar_out'].add_field(zdr_field, zdr)
+    new_dataset = {'radar_out': get_moments_radar(psr)}
+    _fast_add_field(
+        new_dataset['radar_out'], zdr_field, zdr, dscfg)
 
     return new_dataset, ind_rad
 
@@ -1703,6 +1878,9 @@ def process_differential_phase(procstatus, dscfg, radar_list=None):
 
         datatype : list of string. Dataset keyword
             The input data types
+        validate_add_field : bool. Dataset keyword
+            If True the output fields are added to the output object with
+            the validation of Py-ART. Default False
     radar_list : list of spectra objects
         Optional. list of spectra objects
 
@@ -1716,16 +1894,18 @@ def process_differential_phase(procstatus, dscfg, radar_list=None):
     """
 
     if procstatus != 1:
+        if procstatus == 0:
+            _parse_datatypes(dscfg)
+            _get_ind_rad(dscfg)
         return None, None
 
-    for datatypedescr in dscfg['datatype']:
-        radarnr, _, datatype, _, _ = get_datatype_fields(datatypedescr)
+    for radarnr, datatype, field_name in _parse_datatypes(dscfg):
         if datatype in ('sdBZ', 'sdBZv', 'sdBuZ', 'sdBuZv'):
-            sdBZ_field = get_fieldname_pyart(datatype)
+            sdBZ_field = field_name
         elif datatype in ('sPhiDP', 'sPhiDPu'):
-            sPhiDP_field = get_fieldname_pyart(datatype)
+            sPhiDP_field = field_name
 
-    ind_rad = int(radarnr[5:8])-1
+    ind_rad = _get_ind_rad(dscfg)
     if (radar_list is None) or (radar_list[ind_rad] is None):
         warn('ERROR: No valid radar')
         return None, None
@@ -1743,8 +1923,9 @@ def process_differential_phase(procstatus, dscfg, radar_list=None):
         uphidp_field = 'uncorrected_unfiltered_differential_phase'
 
     # prepare for exit
-    new_dataset = {'radar_out': pyart.util.radar_from_spectra(psr)}
-    new_dataset['radar_out'].add_field(uphidp_field, uphidp)
+    new_dataset = {'radar_out': get_moments_radar(psr)}
+    _fast_add_field(
+        new_dataset['radar_out'], uphidp_field, uphidp, dscfg)
 
     return new_dataset, ind_rad
 
@@ -1765,6 +1946,12 @@ def process_rhohv(procstatus, dscfg, radar_list=None):
             The input data types
         subtract_noise : Bool
             If True noise will be subtracted from the signal
+        fp32_spectra : bool. Dataset keyword
+            If True complex128 spectra are cast to complex64 before the
+            computation. Default False
+        validate_add_field : bool. Dataset keyword
+            If True the output fields are added to the output object with
+            the validation of Py-ART. Default False
     radar_list : list of spectra objects
         Optional. list of spectra objects
 
@@ -1777,33 +1964,21 @@ def process_rhohv(procstatus, dscfg, radar_list=None):
 
     """
     if procstatus != 1:
+        if procstatus == 0:
+            _parse_datatypes(dscfg)
+            _get_ind_rad(dscfg)
         return None, None
 
-    noise_h_field = None
-    noise_v_field = None
-    signal_h_field = None
-    signal_v_field = None
-    pwr_h_field = None
-    pwr_v_field = None
-    srhohv_field = None
-    for datatypedescr in dscfg['datatype']:
-        radarnr, _, datatype, _, _ = get_datatype_fields(datatypedescr)
-        if datatype in ('ShhADU', 'ShhADUu'):
-            signal_h_field = get_fieldname_pyart(datatype)
-        elif datatype in ('SvvADU', 'SvvADUu'):
-            signal_v_field = get_fieldname_pyart(datatype)
-        elif datatype == 'sNADUh':
-            noise_h_field = get_fieldname_pyart(datatype)
-        elif datatype == 'sNADUv':
-            noise_v_field = get_fieldname_pyart(datatype)
-        elif datatype in ('sPhhADU', 'sPhhADUu'):
-            pwr_h_field = get_fieldname_pyart(datatype)
-        elif datatype in ('sPvvADU', 'sPvvADUu'):
-            pwr_v_field = get_fieldname_pyart(datatype)
-        elif datatype in ('sRhoHV', 'sRhoHVu'):
-            srhohv_field = get_fieldname_pyart(datatype)
+    pol_fields = _extract_pol_fields(_parse_datatypes(dscfg))
+    signal_h_field = pol_fields.signal_h
+    signal_v_field = pol_fields.signal_v
+    noise_h_field = pol_fields.noise_h
+    noise_v_field = pol_fields.noise_v
+    pwr_h_field = pol_fields.pwr_h
+    pwr_v_field = pol_fields.pwr_v
+    srhohv_field = pol_fields.srhohv
 
-    ind_rad = int(radarnr[5:8])-1
+    ind_rad = _get_ind_rad(dscfg)
     if (radar_list is None) or (radar_list[ind_rad] is None):
         warn('ERROR: No valid radar')
         return None, None
@@ -1833,16 +2008,21 @@ def process_rhohv(procstatus, dscfg, radar_list=None):
 
     subtract_noise = dscfg.get('subtract_noise', False)
 
+    psr_in = _prepare_spectra(
+        psr, (signal_h_field, signal_v_field),
+        fp32=dscfg.get('fp32_spectra', False))
+
     rhohv = pyart.retrieve.compute_rhohv(
-        psr, use_rhohv=use_rhohv, subtract_noise=subtract_noise,
+        psr_in, use_rhohv=use_rhohv, subtract_noise=subtract_noise,
         srhohv_field=srhohv_field, pwr_h_field=pwr_h_field,
         pwr_v_field=pwr_v_field, signal_h_field=signal_h_field,
         signal_v_field=signal_v_field, noise_h_field=noise_h_field,
         noise_v_field=noise_v_field)
 
     # prepare for exit
-    new_dataset = {'radar_out': pyart.util.radar_from_spectra(psr)}
-    new_dataset['radar_out'].add_field(rhohv_field, rhohv)
+    new_dataset = {'radar_out': get_moments_radar(psr)}
+    _fast_add_field(
+        new_dataset['radar_out'], rhohv_field, rhohv, dscfg)
 
     return new_dataset, ind_rad
 
@@ -1861,6 +2041,9 @@ def process_Doppler_velocity(procstatus, dscfg, radar_list=None):
 
         datatype : list of string. Dataset keyword
             The input data types
+        validate_add_field : bool. Dataset keyword
+            If True the output fields are added to the output object with
+            the validation of Py-ART. Default False
     radar_list : list of spectra objects
         Optional. list of spectra objects
 
@@ -1874,14 +2057,16 @@ def process_Doppler_velocity(procstatus, dscfg, radar_list=None):
     """
 
     if procstatus != 1:
+        if procstatus == 0:
+            _parse_datatypes(dscfg)
+            _get_ind_rad(dscfg)
         return None, None
 
-    for datatypedescr in dscfg['datatype']:
-        radarnr, _, datatype, _, _ = get_datatype_fields(datatypedescr)
+    for radarnr, datatype, field_name in _parse_datatypes(dscfg):
         if datatype in ('sdBZ', 'sdBZv', 'sdBuZ', 'sdBuZv'):
-            sdBZ_field = get_fieldname_pyart(datatype)
+            sdBZ_field = field_name
 
-    ind_rad = int(radarnr[5:8])-1
+    ind_rad = _get_ind_rad(dscfg)
     if (radar_list is None) or (radar_list[ind_rad] is None):
         warn('ERROR: No valid radar')
         return None, None
@@ -1892,18 +2077,23 @@ def process_Doppler_velocity(procstatus, dscfg, radar_list=None):
              'Missing field '+sdBZ_field)
         return None, None
 
-    vel = pyart.retrieve.compute_Doppler_velocity(
-        psr, sdBZ_field=sdBZ_field)
-
     vel_field = 'velocity'
     if datatype in ('sdBZv', 'sdBuZv'):
         vel_field += '_vv'
     if datatype in ('sdBuZ', 'sdBuZv'):
         vel_field = 'unfiltered_'+vel_field
 
+    if _NUMBA_AVAILABLE and psr.Doppler_velocity is not None:
+        vel = pyart.config.get_metadata(vel_field)
+        vel['data'] = _get_Doppler_moments(psr, sdBZ_field)[1]
+    else:
+        vel = pyart.retrieve.compute_Doppler_velocity(
+            psr, sdBZ_field=sdBZ_field)
+
     # prepare for exit
-    new_dataset = {'radar_out': pyart.util.radar_from_spectra(psr)}
-    new_dataset['radar_out'].add_field(vel_field, vel)
+    new_dataset = {'radar_out': get_moments_radar(psr)}
+    _fast_add_field(
+        new_dataset['radar_out'], vel_field, vel, dscfg)
 
     return new_dataset, ind_rad
 
@@ -1922,6 +2112,9 @@ def process_Doppler_width(procstatus, dscfg, radar_list=None):
 
         datatype : list of string. Dataset keyword
             The input data types
+        validate_add_field : bool. Dataset keyword
+            If True the output fields are added to the output object with
+            the validation of Py-ART. Default False
     radar_list : list of spectra objects
         Optional. list of spectra objects
 
@@ -1935,14 +2128,16 @@ def process_Doppler_width(procstatus, dscfg, radar_list=None):
     """
 
     if procstatus != 1:
+        if procstatus == 0:
+            _parse_datatypes(dscfg)
+            _get_ind_rad(dscfg)
         return None, None
 
-    for datatypedescr in dscfg['datatype']:
-        radarnr, _, datatype, _, _ = get_datatype_fields(datatypedescr)
+    for radarnr, datatype, field_name in _parse_datatypes(dscfg):
         if datatype in ('sdBZ', 'sdBZv', 'sdBuZ', 'sdBuZv'):
-            sdBZ_field = get_fieldname_pyart(datatype)
+            sdBZ_field = field_name
 
-    ind_rad = int(radarnr[5:8])-1
+    ind_rad = _get_ind_rad(dscfg)
     if (radar_list is None) or (radar_list[ind_rad] is None):
         warn('ERROR: No valid radar')
         return None, None
@@ -1953,17 +2148,633 @@ def process_Doppler_width(procstatus, dscfg, radar_list=None):
              'Missing field '+sdBZ_field)
         return None, None
 
-    width = pyart.retrieve.compute_Doppler_width(
-        psr, sdBZ_field=sdBZ_field)
-
     width_field = 'spectrum_width'
     if datatype in ('sdBZv', 'sdBuZv'):
         width_field += '_vv'
     if datatype in ('sdBuZ', 'sdBuZv'):
         width_field = 'unfiltered_'+width_field
 
+    if _NUMBA_AVAILABLE and psr.Doppler_velocity is not None:
+        width = pyart.config.get_metadata(width_field)
+        width['data'] = _get_Doppler_moments(psr, sdBZ_field)[2]
+    else:
+        width = pyart.retrieve.compute_Doppler_width(
+            psr, sdBZ_field=sdBZ_field)
+
     # prepare for exit
-    new_dataset = {'radar_out': pyart.util.radar_from_spectra(psr)}
-    new_dataset['radar_out'].add_field(width_field, width)
+    new_dataset = {'radar_out': get_moments_radar(psr)}
+    _fast_add_field(
+        new_dataset['radar_out'], width_field, width, dscfg)
 
     return new_dataset, ind_rad
+
+
+def process_Doppler_moments(procstatus, dscfg, radar_list=None):
+    """
+    Computes the reflectivity, the Doppler velocity and the Doppler spectrum
+    width from the spectral reflectivity. If Numba is available the three
+    moments are obtained in a single pass over the spectra
+
+    Parameters
+    ----------
+    procstatus : int
+        Processing status: 0 initializing, 1 processing volume,
+        2 post-processing
+    dscfg : dictionary of dictionaries
+        data set configuration. Accepted configuration keywords::
+
+        datatype : list of string. Dataset keyword
+            The input data types
+        validate_add_field : bool. Dataset keyword
+            If True the output fields are added to the output object with
+            the validation of Py-ART. Default False
+    radar_list : list of spectra objects
+        Optional. list of spectra objects
+
+    Returns
+    -------
+    new_dataset : dict
+        dictionary containing the output
+    ind_rad : int
+        radar index
+
+    """
+
+    if procstatus != 1:
+        if procstatus == 0:
+            _parse_datatypes(dscfg)
+            _get_ind_rad(dscfg)
+        return None, None
+
+    for radarnr, datatype, field_name in _parse_datatypes(dscfg):
+        if datatype in ('sdBZ', 'sdBZv', 'sdBuZ', 'sdBuZv'):
+            sdBZ_field = field_name
+            sdBZ_datatype = datatype
+
+    ind_rad = _get_ind_rad(dscfg)
+    if (radar_list is None) or (radar_list[ind_rad] is None):
+        warn('ERROR: No valid radar')
+        return None, None
+    psr = radar_list[ind_rad]
+
+    if sdBZ_field not in psr.fields:
+        warn('Unable to obtain Doppler moments. ' +
+             'Missing field '+sdBZ_field)
+        return None, None
+
+    reflectivity_field = 'reflectivity'
+    vel_field = 'velocity'
+    width_field = 'spectrum_width'
+    # the baseline name of the vertical reflectivity of process_reflectivity
+    # is kept so that the existing configurations keep working
+    if sdBZ_datatype in ('sdBZv', 'sdBuZv'):
+        reflectivity_field += 'vv'
+        vel_field += '_vv'
+        width_field += '_vv'
+    if sdBZ_datatype in ('sdBuZ', 'sdBuZv'):
+        reflectivity_field = 'unfiltered_'+reflectivity_field
+        vel_field = 'unfiltered_'+vel_field
+        width_field = 'unfiltered_'+width_field
+
+    if _NUMBA_AVAILABLE and psr.Doppler_velocity is not None:
+        dBZ_data, vel_data, width_data = _get_Doppler_moments(
+            psr, sdBZ_field)
+        dBZ = pyart.config.get_metadata(reflectivity_field)
+        dBZ['data'] = dBZ_data
+        vel = pyart.config.get_metadata(vel_field)
+        vel['data'] = vel_data
+        width = pyart.config.get_metadata(width_field)
+        width['data'] = width_data
+    else:
+        dBZ = pyart.retrieve.compute_reflectivity(
+            psr, sdBZ_field=sdBZ_field)
+        vel = pyart.retrieve.compute_Doppler_velocity(
+            psr, sdBZ_field=sdBZ_field)
+        width = pyart.retrieve.compute_Doppler_width(
+            psr, sdBZ_field=sdBZ_field)
+
+    # prepare for exit
+    new_dataset = {'radar_out': get_moments_radar(psr)}
+    _fast_add_field(
+        new_dataset['radar_out'], reflectivity_field, dBZ, dscfg)
+    _fast_add_field(
+        new_dataset['radar_out'], vel_field, vel, dscfg)
+    _fast_add_field(
+        new_dataset['radar_out'], width_field, width, dscfg)
+
+    return new_dataset, ind_rad
+
+
+def _append_rays(buffers, key, data, nrays_filled):
+    """
+    Appends rays to a buffer used to accumulate a time series of rays. The
+    capacity of the buffer is doubled each time it is exceeded and its last
+    dimension is enlarged if the new rays have more samples, so that each
+    ray is copied only a few times regardless of the length of the series
+
+    Parameters
+    ----------
+    buffers : dict
+        dictionary containing the buffers. It is updated with the new buffer
+        if the buffer has to be created or enlarged
+    key : str
+        the key of the buffer in the dictionary
+    data : array
+        the rays to append. The first dimension is the number of rays.
+        Multidimensional data is padded with masked values if it has less
+        samples than the buffer
+    nrays_filled : int
+        the number of rays already in the buffer
+
+    Returns
+    -------
+    data_out : array
+        a view of the buffer containing all the accumulated rays
+
+    """
+    nrays_total = nrays_filled+data.shape[0]
+    nsamples = data.shape[-1]
+
+    buf = buffers.get(key, None)
+    if (buf is None or buf.shape[0] < nrays_total or
+            (data.ndim > 1 and buf.shape[-1] < nsamples)):
+        capacity = 16 if buf is None else buf.shape[0]
+        while capacity < nrays_total:
+            capacity *= 2
+
+        if data.ndim == 1:
+            buf_aux = np.empty(capacity, dtype=data.dtype)
+            if buf is not None:
+                buf_aux[:nrays_filled] = buf[:nrays_filled]
+        else:
+            if buf is not None:
+                nsamples = max(nsamples, buf.shape[-1])
+            buf_aux = np.ma.masked_all(
+                (capacity, )+data.shape[1:-1]+(nsamples, ), dtype=data.dtype)
+            if buf is not None:
+                buf_aux[:nrays_filled, ..., :buf.shape[-1]] = (
+                    buf[:nrays_filled])
+        buf = buf_aux
+        buffers[key] = buf
+
+    if data.ndim == 1:
+        buf[nrays_filled:nrays_total] = data
+    else:
+        buf[nrays_filled:nrays_total, ..., :data.shape[-1]] = data
+
+    return buf[:nrays_total]
+
+
+def _fast_add_field(radar, field_name, field_dict, dscfg):
+    """
+    Adds a field to a radar or spectra object. The fields computed by the
+    processing functions have the shape of the object by construction, so
+    the validation done by the add_field method is skipped unless the
+    dataset keyword validate_add_field is set
+
+    Parameters
+    ----------
+    radar : radar or spectra object
+        the object where the field is added
+    field_name : str
+        the name of the field
+    field_dict : dict
+        the field dictionary
+    dscfg : dictionary of dictionaries
+        data set configuration
+
+    """
+    if dscfg.get('validate_add_field', False):
+        radar.add_field(field_name, field_dict)
+    else:
+        radar.fields[field_name] = field_dict
+
+
+def _clone_data_shared_buffer(data):
+    """
+    Clones the data of a field. The clone shares the data buffer with the
+    original array and only its mask is copied, so that the clone can be
+    masked without affecting the original field. The shared data buffer is
+    read-only in the clone, so that writing into it raises an error instead
+    of modifying the original field
+
+    Parameters
+    ----------
+    data : array or masked array
+        the field data
+
+    Returns
+    -------
+    data_clone : masked array
+        the clone of the field data with a writable mask of its own and
+        read-only data
+
+    """
+    data_view = np.ma.getdata(data).view()
+    data_view.flags.writeable = False
+
+    return np.ma.masked_array(
+        data_view, mask=np.ma.getmaskarray(data).copy(),
+        fill_value=getattr(data, 'fill_value', None), copy=False)
+
+
+def _prepare_spectra(psr, field_names, fp32=False):
+    """
+    Prepares the spectra fields for the computations. If required
+    complex128 spectra are cast to complex64 and the spectra that are not
+    C-contiguous, e.g. views obtained by slicing or transposing, are copied
+    into C-contiguous arrays. The spectra object is not modified: the
+    prepared fields are put in a shallow copy of it
+
+    Parameters
+    ----------
+    psr : spectra object
+        the spectra object
+    field_names : tuple of str
+        the names of the fields to prepare. None or missing fields are
+        ignored
+    fp32 : bool
+        If True complex128 spectra are cast to complex64
+
+    Returns
+    -------
+    psr_in : spectra object
+        the spectra object to use in the computations. It is the input
+        spectra object itself if none of its fields had to be prepared
+
+    """
+    psr_in = psr
+    for field_name in field_names:
+        if field_name is None or field_name not in psr.fields:
+            continue
+        data = psr.fields[field_name]['data']
+        if fp32 and data.dtype == np.complex128:
+            data = data.astype(np.complex64, order='C')
+        elif not data.flags.c_contiguous:
+            data = data.copy(order='C')
+        else:
+            continue
+        if psr_in is psr:
+            psr_in = copy(psr)
+            psr_in.fields = copy(psr.fields)
+        psr_in.fields[field_name] = copy(psr.fields[field_name])
+        psr_in.fields[field_name]['data'] = data
+
+    return psr_in
+
+
+def _compute_spectral_rhohv(psr, subtract_noise=False, signal_h_field=None,
+                            signal_v_field=None, noise_h_field=None,
+                            noise_v_field=None):
+    """
+    Computes the spectral co-polar correlation coefficient in a single pass
+    over the spectra using a Numba kernel, or with numexpr if Numba is not
+    available. Equivalent to pyart.retrieve.compute_spectral_rhohv
+
+    Parameters
+    ----------
+    psr : spectra object
+        the spectra object containing the complex signals
+    subtract_noise : bool
+        If True noise will be subtracted from the signal power
+    signal_h_field, signal_v_field : str
+        names of the horizontal and vertical complex signal fields [ADU]
+    noise_h_field, noise_v_field : str
+        names of the horizontal and vertical noise power fields [ADU]. Used
+        only if subtract_noise is True
+
+    Returns
+    -------
+    sRhoHV_dict : field dictionary
+        field dictionary containing the spectral co-polar correlation
+        coefficient
+
+    """
+    signal_h = psr.fields[signal_h_field]['data']
+    signal_v = psr.fields[signal_v_field]['data']
+
+    sRhoHV_data = np.zeros(signal_h.shape, dtype=signal_h.dtype)
+    sRhoHV_mask = np.ma.getmaskarray(signal_h) | np.ma.getmaskarray(signal_v)
+    if subtract_noise:
+        noise_h = psr.fields[noise_h_field]['data']
+        noise_v = psr.fields[noise_v_field]['data']
+        sRhoHV_mask |= np.ma.getmaskarray(noise_h)
+        sRhoHV_mask |= np.ma.getmaskarray(noise_v)
+        noise_h = np.broadcast_to(np.ma.getdata(noise_h), signal_h.shape)
+        noise_v = np.broadcast_to(np.ma.getdata(noise_v), signal_h.shape)
+    else:
+        noise_h = np.broadcast_to(np.float32(0.), signal_h.shape)
+        noise_v = noise_h
+
+    kernel = spectral_rhohv if _NUMBA_AVAILABLE else spectral_rhohv_numexpr
+    kernel(
+        np.ma.getdata(signal_h), np.ma.getdata(signal_v), noise_h, noise_v,
+        bool(subtract_noise), sRhoHV_data, sRhoHV_mask)
+
+    field_name = 'spectral_copolar_correlation_coefficient'
+    if signal_h_field.startswith('unfiltered_'):
+        field_name = 'unfiltered_'+field_name
+    sRhoHV_dict = pyart.config.get_metadata(field_name)
+    sRhoHV_dict['data'] = np.ma.masked_array(sRhoHV_data, mask=sRhoHV_mask)
+
+    return sRhoHV_dict
+
+
+def _get_Doppler_moments(psr, sdBZ_field):
+    """
+    Computes the reflectivity, the Doppler velocity and the Doppler spectrum
+    width from the spectral reflectivity with a Numba kernel. The moments are
+    computed only once for each spectra object and spectral reflectivity
+    field and shared by all the moment processing functions. They are
+    recomputed if the data of the field or the Doppler velocity have been
+    replaced or have changed shape since, e.g. by a noise filter writing
+    its output under the same field name or by a growing time series
+
+    Parameters
+    ----------
+    psr : spectra object
+        the spectra object containing the spectral reflectivity
+    sdBZ_field : str
+        name of the spectral reflectivity field
+
+    Returns
+    -------
+    dBZ, vel, width : 2D masked arrays
+        copies of the reflectivity [dBZ], Doppler velocity [m/s] and
+        spectrum width [m/s]
+
+    """
+    sdBZ = psr.fields[sdBZ_field]['data']
+    vel_axis = psr.Doppler_velocity['data']
+
+    moments_dict = _DOPPLER_MOMENTS_CACHE.setdefault(psr, dict())
+    cached = moments_dict.get(sdBZ_field, None)
+    if (cached is None or cached[0] is not sdBZ or
+            cached[1] is not vel_axis or cached[2] != sdBZ.shape):
+        shape = sdBZ.shape[:2]
+
+        dBZ = np.zeros(shape, dtype='float64')
+        vel = np.zeros(shape, dtype='float64')
+        width = np.zeros(shape, dtype='float64')
+        dBZ_mask = np.zeros(shape, dtype=bool)
+        vel_mask = np.zeros(shape, dtype=bool)
+        Doppler_moments(
+            np.ma.getdata(sdBZ), np.ma.getmaskarray(sdBZ),
+            np.ma.getdata(vel_axis), np.ma.getmaskarray(vel_axis),
+            dBZ, vel, width, dBZ_mask, vel_mask)
+
+        cached = (
+            sdBZ, vel_axis, sdBZ.shape,
+            np.ma.masked_array(dBZ, mask=dBZ_mask),
+            np.ma.masked_array(vel, mask=vel_mask),
+            np.ma.masked_array(width, mask=vel_mask))
+        moments_dict[sdBZ_field] = cached
+
+    dBZ, vel, width = cached[3:]
+
+    return dBZ.copy(), vel.copy(), width.copy()
+
+
+def _compute_pol_variables(psr, fields_list, fp32=False, **kwargs):
+    """
+    Computes the polarimetric variables from the complex spectra with
+    pyart.retrieve.compute_pol_variables. The variables computed for a
+    spectra object are kept together with the input data they were computed
+    from, so that datasets requesting the same variables with the same
+    parameters only compute those that are missing. The kept variables are
+    recomputed if the data of any input field has been replaced or has
+    changed shape since. The cache is keyed on the spectra object as given,
+    the complex signals are prepared with _prepare_spectra only when some
+    variable has to be computed
+
+    Parameters
+    ----------
+    psr : spectra object
+        the spectra object
+    fields_list : list of str
+        the names of the fields of the polarimetric variables to compute
+    fp32 : bool
+        If True complex128 signals are cast to complex64 before computing
+        the variables
+    kwargs : dict
+        the keyword arguments of pyart.retrieve.compute_pol_variables
+
+    Returns
+    -------
+    radar : radar object
+        the radar object containing the polarimetric variables
+
+    """
+    pol_dict = _POL_VARIABLES_CACHE.setdefault(psr, dict())
+    params = tuple(sorted(kwargs.items())) + (('fp32', fp32), )
+
+    # the data of the input fields. The input fields are the keyword
+    # arguments naming a field of the spectra object
+    inputs = tuple(
+        (psr.fields[value]['data'], psr.fields[value]['data'].shape)
+        for key, value in params
+        if key.endswith('_field') and value in psr.fields)
+
+    missing = [
+        field_name for field_name in fields_list
+        if _get_cached_field(pol_dict, (field_name, params), inputs) is None]
+    if missing:
+        psr_in = _prepare_spectra(
+            psr, (kwargs.get('signal_h_field', None),
+                  kwargs.get('signal_v_field', None)), fp32=fp32)
+        radar = pyart.retrieve.compute_pol_variables(
+            psr_in, missing, **kwargs)
+        for field_name in missing:
+            if field_name in radar.fields:
+                pol_dict[(field_name, params)] = (
+                    inputs, _copy_field(radar.fields[field_name]))
+    else:
+        radar = get_moments_radar(psr)
+
+    for field_name in fields_list:
+        if field_name in radar.fields:
+            continue
+        field = _get_cached_field(pol_dict, (field_name, params), inputs)
+        if field is not None:
+            radar.fields[field_name] = _copy_field(field)
+
+    return radar
+
+
+def _get_cached_field(cache, key, inputs):
+    """
+    Gets a field from a cache of fields if it was computed from the same
+    input data
+
+    Parameters
+    ----------
+    cache : dict
+        the cache. Its values are tuples with the input data and the field
+    key : tuple
+        the key of the field in the cache
+    inputs : tuple
+        the current input data, as tuples of data array and shape
+
+    Returns
+    -------
+    field : dict or None
+        the cached field dictionary. None if the field is not in the cache
+        or was computed from other input data
+
+    """
+    cached = cache.get(key, None)
+    if cached is None or len(cached[0]) != len(inputs):
+        return None
+    for (data, shape), (data_cached, shape_cached) in zip(inputs, cached[0]):
+        if data is not data_cached or shape != shape_cached:
+            return None
+
+    return cached[1]
+
+
+def _copy_field(field):
+    """
+    Copies a field dictionary and its data. The metadata is shared with the
+    original field
+
+    Parameters
+    ----------
+    field : dict
+        the field dictionary
+
+    Returns
+    -------
+    field_copy : dict
+        the copy of the field dictionary
+
+    """
+    field_copy = copy(field)
+    field_copy['data'] = field['data'].copy()
+
+    return field_copy
+
+
+def _get_fieldname(datatype):
+    """
+    Returns the Py-ART field name of a data type. The field names are kept
+    in a module level dictionary so that each data type is looked up only
+    once
+
+    Parameters
+    ----------
+    datatype : str
+        the data type
+
+    Returns
+    -------
+    field_name : str
+        the Py-ART field name
+
+    """
+    field_name = _FIELDNAME_CACHE.get(datatype, None)
+    if field_name is None:
+        field_name = get_fieldname_pyart(datatype)
+        _FIELDNAME_CACHE[datatype] = field_name
+
+    return field_name
+
+
+def _parse_datatypes(dscfg):
+    """
+    Parses the data types of the dataset. Since the dataset configuration
+    does not change during processing the result is kept in dscfg['_parsed']
+    and the data types are parsed only the first time
+
+    Parameters
+    ----------
+    dscfg : dictionary of dictionaries
+        data set configuration
+
+    Returns
+    -------
+    parsed : tuple of tuples
+        for each data type, a tuple containing the radar number, the data
+        type and the Py-ART field name
+
+    """
+    if '_parsed' not in dscfg:
+        dscfg['_parsed'] = _parse_datatype_descrs(tuple(dscfg['datatype']))
+
+    return dscfg['_parsed']
+
+
+def _get_ind_rad(dscfg):
+    """
+    Gets the index of the radar processed by the dataset, that of the last
+    data type. It is obtained at initialization and kept in
+    dscfg['_ind_rad']
+
+    Parameters
+    ----------
+    dscfg : dictionary of dictionaries
+        data set configuration
+
+    Returns
+    -------
+    ind_rad : int
+        radar index
+
+    """
+    if '_ind_rad' not in dscfg:
+        dscfg['_ind_rad'] = int(_parse_datatypes(dscfg)[-1][0][5:8])-1
+
+    return dscfg['_ind_rad']
+
+
+@lru_cache(maxsize=256)
+def _parse_datatype_descrs(datatypedescrs):
+    """
+    Parses a sequence of data type descriptors. The result is memoized so
+    that datasets with the same data types share it
+
+    Parameters
+    ----------
+    datatypedescrs : tuple of str
+        the data type descriptors
+
+    Returns
+    -------
+    parsed : tuple of tuples
+        for each data type, a tuple containing the radar number, the data
+        type and the Py-ART field name
+
+    """
+    parsed = []
+    for datatypedescr in datatypedescrs:
+        radarnr, _, datatype, _, _ = get_datatype_fields(datatypedescr)
+        parsed.append((radarnr, datatype, _get_fieldname(datatype)))
+
+    return tuple(parsed)
+
+
+@lru_cache(maxsize=256)
+def _extract_pol_fields(parsed):
+    """
+    Gets the roles of the input fields of the polarimetric processing
+    functions from the parsed data types. The result is memoized so that it
+    is obtained only once per dataset
+
+    Parameters
+    ----------
+    parsed : tuple of tuples
+        the parsed data types as returned by _parse_datatypes
+
+    Returns
+    -------
+    pol_fields : _PolFields namedtuple
+        the names of the complex signal, noise power, signal power and
+        spectral RhoHV fields. The roles without input data type are None
+
+    """
+    role_fields = dict()
+    for _, datatype, field_name in parsed:
+        role = _POL_DATATYPE_ROLES.get(datatype)
+        if role is not None:
+            role_fields[role] = field_name
+
+    return _PolFields(**role_fields)
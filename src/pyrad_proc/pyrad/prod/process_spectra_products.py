@@ -8,11 +8,29 @@ Functions for obtaining Pyrad products from spectra datasets
     :toctree: generated/
 
     generate_spectra_products
+    _generate_range_Doppler
+    _generate_angle_Doppler
+    _generate_time_Doppler
+    _generate_Doppler
+    _generate_savevol
+    _generate_saveall
+    _get_prd_context
+    _resolve_ray
+    _resolve_ray_rng
+    _resolve_time_gateinfo
+    _get_radar_datetime
+    _get_color_scale
+    _get_save_dir
+    _get_fname_list
 
 """
 
+import os
+import sys
 from warnings import warn
 from copy import deepcopy
+from collections import namedtuple
+from weakref import WeakKeyDictionary
 
 import numpy as np
 
@@ -71,7 +89,8 @@ def generate_spectra_products(dataset, prdcfg):
                     respect to nominal position to plot. Default 1, 1, 50.
                 ind_ray, ind_rng : int
                     index of the ray and range to plot. Alternative to
-                    defining its antenna coordinates
+                    defining its antenna coordinates. If defined they take
+                    precedence over the antenna coordinates
                 xaxis_info : str
                     The xaxis type. Can be 'Doppler_velocity',
                     'Doppler_frequency' or 'pulse_number'
@@ -88,7 +107,8 @@ def generate_spectra_products(dataset, prdcfg):
                     position to plot. Default 1, 1.
                 ind_ray : int
                     index of the ray to plot. Alternative to
-                    defining its antenna coordinates
+                    defining its antenna coordinates. If defined it takes
+                    precedence over the antenna coordinates
                 xaxis_info : str
                     The xaxis type. Can be 'Doppler_velocity',
                     'Doppler_frequency' or 'pulse_number'
@@ -158,7 +178,8 @@ def generate_spectra_products(dataset, prdcfg):
                     respect to nominal position to plot. Default 1, 1, 50.
                 ind_ray, ind_rng : int
                     index of the ray and range to plot. Alternative to
-                    defining its antenna coordinates
+                    defining its antenna coordinates. If defined they take
+                    precedence over the antenna coordinates
                 xaxis_info : str
                     The xaxis type. Can be 'Doppler_velocity',
                     'Doppler_frequency' or 'pulse_number'
@@ -175,7 +196,8 @@ def generate_spectra_products(dataset, prdcfg):
                     position to plot. Default 1, 1.
                 ind_ray : int
                     index of the ray to plot. Alternative to
-                    defining its antenna coordinates
+                    defining its antenna coordinates. If defined it takes
+                    precedence over the antenna coordinates
                 xaxis_info : str
                     The xaxis type. Can be 'Doppler_velocity',
                     'Doppler_frequency' or 'pulse_number'
@@ -203,7 +225,8 @@ def generate_spectra_products(dataset, prdcfg):
                     respect to nominal position to plot. Default 1, 1, 50.
                 ind_ray, ind_rng : int
                     index of the ray and range to plot. Alternative to
-                    defining its antenna coordinates
+                    defining its antenna coordinates. If defined they take
+                    precedence over the antenna coordinates
                 xaxis_info : str
                     The xaxis type. Can be 'Doppler_velocity',
                     'Doppler_frequency' or 'pulse_number'
@@ -218,7 +241,8 @@ def generate_spectra_products(dataset, prdcfg):
                     position to plot. Default 1, 1.
                 ind_ray : int
                     index of the ray to plot. Alternative to
-                    defining its antenna coordinates
+                    defining its antenna coordinates. If defined it takes
+                    precedence over the antenna coordinates
                 xaxis_info : str
                     The xaxis type. Can be 'Doppler_velocity',
                     'Doppler_frequency' or 'pulse_number'
@@ -250,6 +274,10 @@ def generate_spectra_products(dataset, prdcfg):
                 plot_type : str
                     Can be 'final' or 'temporal'. If final the data is only
                     plotted at the end of the processing
+        All products accept the user defined parameter:
+            verbose : bool
+                If False the names of the generated files are not printed.
+                Default True
 
     Parameters
     ----------
@@ -264,897 +292,688 @@ def generate_spectra_products(dataset, prdcfg):
     None or name of generated files
 
     """
-    dssavedir = prdcfg['dsname']
-    if 'dssavename' in prdcfg:
-        dssavedir = prdcfg['dssavename']
-
-    if prdcfg['type'] == 'RANGE_DOPPLER':
+    # the product type read from the configuration file is interned so
+    # that the comparisons with the type literals are identity checks
+    product_type = sys.intern(prdcfg['type'])
+    handler = _HANDLERS.get(product_type)
+    if handler is None:
+        warn(' Unsupported product type: ' + product_type)
+        return None
+
+    # the time Doppler products of a non final data set are the most
+    # frequent calls and do not generate anything
+    if (handler is _generate_time_Doppler and
+            prdcfg.get('plot_type', 'final') == 'final' and
+            not dataset['final']):
+        return None
+
+    field_name = None
+    if handler is not _generate_saveall:
         field_name = get_fieldname_pyart(prdcfg['voltype'])
         if field_name not in dataset['radar_out'].fields:
             warn(
                 ' Field type ' + field_name +
                 ' not available in data set. Skipping product ' +
-                prdcfg['type'])
+                product_type)
             return None
 
-        # user defined values
-        azi = prdcfg.get('azi', None)
-        ele = prdcfg.get('ele', None)
-        azi_tol = prdcfg.get('azi_tol', 1.)
-        ele_tol = prdcfg.get('ele_tol', 1.)
-
-        if azi is None or ele is None:
-            ind_ray = prdcfg.get('ind_ray', 0)
-            azi = dataset['radar_out'].azimuth['data'][ind_ray]
-            ele = dataset['radar_out'].elevation['data'][ind_ray]
-        else:
-            ind_ray = find_ray_index(
-                dataset['radar_out'].elevation['data'],
-                dataset['radar_out'].azimuth['data'], ele, azi,
-                ele_tol=ele_tol, azi_tol=azi_tol)
-
-        if ind_ray is None:
-            warn('Ray azi='+str(azi)+', ele='+str(ele) +
-                 ' out of radar coverage')
-            return None
+    return handler(
+        dataset, prdcfg, _get_prd_context(prdcfg, product_type, field_name))
 
-        gateinfo = 'az'+'{:.1f}'.format(azi)+'el'+'{:.1f}'.format(ele)
 
-        xaxis_info = prdcfg.get('xaxis_info', 'Doppler_velocity')
-        vmin = prdcfg.get('vmin', None)
-        vmax = prdcfg.get('vmax', None)
-
-        savedir = get_save_dir(
-            prdcfg['basepath'], prdcfg['procname'], dssavedir,
-            prdcfg['prdname'], timeinfo=prdcfg['timeinfo'])
-
-        fname_list = make_filename(
-            'range_Doppler', prdcfg['dstype'], prdcfg['voltype'],
-            prdcfg['imgformat'], prdcfginfo=gateinfo,
-            timeinfo=prdcfg['timeinfo'], runinfo=prdcfg['runinfo'])
+def _generate_range_Doppler(dataset, prdcfg, ctx):
+    """
+    generates the RANGE_DOPPLER, COMPLEX_RANGE_DOPPLER and
+    AMPLITUDE_PHASE_RANGE_DOPPLER products
 
-        for i, fname in enumerate(fname_list):
-            fname_list[i] = savedir+fname
+    Parameters
+    ----------
+    dataset : spectra
+        spectra object
+    prdcfg : dictionary of dictionaries
+        product configuration dictionary of dictionaries
+    ctx : _PrdCtx namedtuple
+        the product parameters common to all product types
 
-        if dataset['radar_out'].ngates == 1:
-            plot_Doppler(
-                dataset['radar_out'], field_name, ind_ray, 0, prdcfg,
-                fname_list, xaxis_info=xaxis_info, vmin=vmin, vmax=vmax)
-        else:
-            plot_range_Doppler(
-                dataset['radar_out'], field_name, ind_ray, prdcfg, fname_list,
-                xaxis_info=xaxis_info, vmin=vmin, vmax=vmax)
+    Returns
+    -------
+    None or name of generated files
 
+    """
+    ray_info = _resolve_ray(dataset, prdcfg)
+    if ray_info is None:
+        return None
+    ind_ray, gateinfo = ray_info
+
+    plot_kwargs = _get_color_scale(prdcfg)
+
+    prdtype, plot_single, plot_multiple = _PLOT_FUNCS[ctx.type]
+    fname_list = _get_fname_list(ctx, prdtype, gateinfo, ctx.timeinfo)
+
+    if dataset['radar_out'].ngates == 1:
+        plot_single(
+            dataset['radar_out'], ctx.field_name, ind_ray, 0, prdcfg,
+            fname_list, xaxis_info=ctx.xaxis_info, **plot_kwargs)
+    else:
+        plot_multiple(
+            dataset['radar_out'], ctx.field_name, ind_ray, prdcfg, fname_list,
+            xaxis_info=ctx.xaxis_info, **plot_kwargs)
+
+    if ctx.verbose:
         print('----- save to '+' '.join(fname_list))
 
-        return fname_list
-
-    if prdcfg['type'] == 'ANGLE_DOPPLER':
-        field_name = get_fieldname_pyart(prdcfg['voltype'])
-        if field_name not in dataset['radar_out'].fields:
-            warn(
-                ' Field type ' + field_name +
-                ' not available in data set. Skipping product ' +
-                prdcfg['type'])
-            return None
-
-        # user defined values
-        along_azi = prdcfg.get('along_azi', True)
-        ang = prdcfg.get('ang', 0)
-        rng = prdcfg.get('rng', 0)
-        ang_tol = prdcfg.get('ang_tol', 1.)
-        rng_tol = prdcfg.get('rng_tol', 50.)
-
-        ind_rng = find_rng_index(
-            dataset['radar_out'].range['data'], rng, rng_tol=rng_tol)
-
-        if ind_rng is None:
-            warn('No data at rng='+str(rng))
-            return None
-
-        if along_azi:
-            ind_rays = np.where(np.logical_and(
-                dataset['radar_out'].elevation['data'] <= ang+ang_tol,
-                dataset['radar_out'].elevation['data'] >= ang-ang_tol))[0]
-        else:
-            ind_rays = np.where(np.logical_and(
-                dataset['radar_out'].azimuth['data'] <= ang+ang_tol,
-                dataset['radar_out'].azimuth['data'] >= ang-ang_tol))[0]
-
-        if ind_rays.size == 0:
-            warn('No data for angle '+str(ang))
-            return None
-
-        # sort angles
-        if along_azi:
-            ang_selected = dataset['radar_out'].azimuth['data'][ind_rays]
-
-        else:
-            ang_selected = dataset['radar_out'].elevation['data'][ind_rays]
-        ind_rays = ind_rays[np.argsort(ang_selected)]
-
-        if along_azi:
-            gateinfo = 'azi'+'{:.1f}'.format(ang)+'rng'+'{:.1f}'.format(rng)
-        else:
-            gateinfo = 'ele'+'{:.1f}'.format(ang)+'rng'+'{:.1f}'.format(rng)
+    return fname_list
 
-        xaxis_info = prdcfg.get('xaxis_info', 'Doppler_velocity')
-        vmin = prdcfg.get('vmin', None)
-        vmax = prdcfg.get('vmax', None)
 
-        savedir = get_save_dir(
-            prdcfg['basepath'], prdcfg['procname'], dssavedir,
-            prdcfg['prdname'], timeinfo=prdcfg['timeinfo'])
-
-        fname_list = make_filename(
-            'range_Doppler', prdcfg['dstype'], prdcfg['voltype'],
-            prdcfg['imgformat'], prdcfginfo=gateinfo,
-            timeinfo=prdcfg['timeinfo'], runinfo=prdcfg['runinfo'])
+def _generate_angle_Doppler(dataset, prdcfg, ctx):
+    """
+    generates the ANGLE_DOPPLER, COMPLEX_ANGLE_DOPPLER and
+    AMPLITUDE_PHASE_ANGLE_DOPPLER products
 
-        for i, fname in enumerate(fname_list):
-            fname_list[i] = savedir+fname
+    Parameters
+    ----------
+    dataset : spectra
+        spectra object
+    prdcfg : dictionary of dictionaries
+        product configuration dictionary of dictionaries
+    ctx : _PrdCtx namedtuple
+        the product parameters common to all product types
 
-        if ind_rays.size == 1:
-            plot_Doppler(
-                dataset['radar_out'], field_name, ind_rays, ind_rng, prdcfg,
-                fname_list, xaxis_info=xaxis_info, vmin=vmin, vmax=vmax)
-        else:
-            plot_angle_Doppler(
-                dataset['radar_out'], field_name, ang, ind_rays, ind_rng,
-                prdcfg, fname_list, xaxis_info=xaxis_info,
-                along_azi=along_azi, vmin=vmin, vmax=vmax)
+    Returns
+    -------
+    None or name of generated files
 
+    """
+    # user defined values
+    along_azi = prdcfg.get('along_azi', True)
+    ang = prdcfg.get('ang', 0)
+    rng = prdcfg.get('rng', 0)
+    ang_tol = prdcfg.get('ang_tol', 1.)
+    rng_tol = prdcfg.get('rng_tol', 50.)
+
+    ind_rng = find_rng_index(
+        dataset['radar_out'].range['data'], rng, rng_tol=rng_tol)
+
+    if ind_rng is None:
+        warn('No data at rng='+str(rng))
+        return None
+
+    if along_azi:
+        ind_rays = np.where(np.logical_and(
+            dataset['radar_out'].elevation['data'] <= ang+ang_tol,
+            dataset['radar_out'].elevation['data'] >= ang-ang_tol))[0]
+    else:
+        ind_rays = np.where(np.logical_and(
+            dataset['radar_out'].azimuth['data'] <= ang+ang_tol,
+            dataset['radar_out'].azimuth['data'] >= ang-ang_tol))[0]
+
+    if ind_rays.size == 0:
+        warn('No data for angle '+str(ang))
+        return None
+
+    # sort angles
+    if along_azi:
+        ang_selected = dataset['radar_out'].azimuth['data'][ind_rays]
+
+    else:
+        ang_selected = dataset['radar_out'].elevation['data'][ind_rays]
+    ind_rays = ind_rays[np.argsort(ang_selected)]
+
+    if along_azi:
+        gateinfo = 'azi{:.1f}rng{:.1f}'.format(ang, rng)
+    else:
+        gateinfo = 'ele{:.1f}rng{:.1f}'.format(ang, rng)
+
+    plot_kwargs = _get_color_scale(prdcfg)
+
+    prdtype, plot_single, plot_multiple = _PLOT_FUNCS[ctx.type]
+    fname_list = _get_fname_list(ctx, prdtype, gateinfo, ctx.timeinfo)
+
+    if ind_rays.size == 1:
+        plot_single(
+            dataset['radar_out'], ctx.field_name, ind_rays, ind_rng, prdcfg,
+            fname_list, xaxis_info=ctx.xaxis_info, **plot_kwargs)
+    else:
+        plot_multiple(
+            dataset['radar_out'], ctx.field_name, ang, ind_rays, ind_rng,
+            prdcfg, fname_list, xaxis_info=ctx.xaxis_info,
+            along_azi=along_azi, **plot_kwargs)
+
+    if ctx.verbose:
         print('----- save to '+' '.join(fname_list))
 
-        return fname_list
+    return fname_list
 
-    if prdcfg['type'] == 'TIME_DOPPLER':
-        field_name = get_fieldname_pyart(prdcfg['voltype'])
-        if field_name not in dataset['radar_out'].fields:
-            warn(
-                ' Field type ' + field_name +
-                ' not available in data set. Skipping product ' +
-                prdcfg['type'])
-            return None
 
-        # user defined values
-        xaxis_info = prdcfg.get('xaxis_info', 'Doppler_velocity')
-        vmin = prdcfg.get('vmin', None)
-        vmax = prdcfg.get('vmax', None)
-        xmin = prdcfg.get('xmin', None)
-        xmax = prdcfg.get('xmax', None)
-        ymin = prdcfg.get('ymin', None)
-        ymax = prdcfg.get('ymax', None)
-        plot_type = prdcfg.get('plot_type', 'final')
-
-        if plot_type == 'final' and not dataset['final']:
-            return None
+def _generate_time_Doppler(dataset, prdcfg, ctx):
+    """
+    generates the TIME_DOPPLER, COMPLEX_TIME_DOPPLER and
+    AMPLITUDE_PHASE_TIME_DOPPLER products
 
-        if 'antenna_coordinates_az_el_r' in dataset:
-            az = '{:.1f}'.format(dataset['antenna_coordinates_az_el_r'][0])
-            el = '{:.1f}'.format(dataset['antenna_coordinates_az_el_r'][1])
-            r = '{:.1f}'.format(dataset['antenna_coordinates_az_el_r'][2])
-            gateinfo = ('az'+az+'r'+r+'el'+el)
-        else:
-            lon = '{:.3f}'.format(
-                dataset['point_coordinates_WGS84_lon_lat_alt'][0])
-            lat = '{:.3f}'.format(
-                dataset['point_coordinates_WGS84_lon_lat_alt'][1])
-            alt = '{:.1f}'.format(
-                dataset['point_coordinates_WGS84_lon_lat_alt'][2])
-            gateinfo = ('lon'+lon+'lat'+lat+'alt'+alt)
-
-        time_info = datetime_from_radar(dataset['radar_out'])
-
-        savedir = get_save_dir(
-            prdcfg['basepath'], prdcfg['procname'], dssavedir,
-            prdcfg['prdname'], timeinfo=time_info)
-
-        fname_list = make_filename(
-            'time_Doppler', prdcfg['dstype'], prdcfg['voltype'],
-            prdcfg['imgformat'], prdcfginfo=gateinfo,
-            timeinfo=time_info, runinfo=prdcfg['runinfo'])
-
-        for i, fname in enumerate(fname_list):
-            fname_list[i] = savedir+fname
-
-        if dataset['radar_out'].nrays == 1:
-            plot_Doppler(
-                dataset['radar_out'], field_name, 0, 0, prdcfg, fname_list,
-                xaxis_info=xaxis_info, vmin=vmin, vmax=vmax)
-        else:
-            plot_time_Doppler(
-                dataset['radar_out'], field_name, prdcfg, fname_list,
-                xaxis_info=xaxis_info, vmin=vmin, vmax=vmax, xmin=xmin,
-                xmax=xmax, ymin=ymin, ymax=ymax)
+    Parameters
+    ----------
+    dataset : spectra
+        spectra object
+    prdcfg : dictionary of dictionaries
+        product configuration dictionary of dictionaries
+    ctx : _PrdCtx namedtuple
+        the product parameters common to all product types
 
-        print('----- save to '+' '.join(fname_list))
+    Returns
+    -------
+    None or name of generated files
 
-        return fname_list
+    """
+    plot_kwargs = _get_color_scale(prdcfg)
+
+    gateinfo, time_info = _resolve_time_gateinfo(dataset)
+
+    prdtype, plot_single, plot_multiple = _PLOT_FUNCS[ctx.type]
+    fname_list = _get_fname_list(ctx, prdtype, gateinfo, time_info)
+
+    if dataset['radar_out'].nrays == 1:
+        plot_single(
+            dataset['radar_out'], ctx.field_name, 0, 0, prdcfg, fname_list,
+            xaxis_info=ctx.xaxis_info, **plot_kwargs)
+    else:
+        if ctx.type == 'TIME_DOPPLER':
+            plot_kwargs.update({
+                'xmin': prdcfg.get('xmin', None),
+                'xmax': prdcfg.get('xmax', None),
+                'ymin': prdcfg.get('ymin', None),
+                'ymax': prdcfg.get('ymax', None)})
+        plot_multiple(
+            dataset['radar_out'], ctx.field_name, prdcfg, fname_list,
+            xaxis_info=ctx.xaxis_info, **plot_kwargs)
+
+    if ctx.verbose:
+        print('----- save to '+' '.join(fname_list))
 
-    if prdcfg['type'] == 'DOPPLER':
-        field_name = get_fieldname_pyart(prdcfg['voltype'])
-        if field_name not in dataset['radar_out'].fields:
-            warn(
-                ' Field type ' + field_name +
-                ' not available in data set. Skipping product ' +
-                prdcfg['type'])
-            return None
+    return fname_list
 
-        # user defined values
-        azi = prdcfg.get('azi', None)
-        ele = prdcfg.get('ele', None)
-        rng = prdcfg.get('rng', None)
-        azi_tol = prdcfg.get('azi_tol', 1.)
-        ele_tol = prdcfg.get('ele_tol', 1.)
-        rng_tol = prdcfg.get('rng_tol', 50.)
-
-        if azi is None or ele is None or rng is None:
-            ind_ray = prdcfg.get('ind_ray', 0)
-            ind_rng = prdcfg.get('ind_rng', 0)
-            azi = dataset['radar_out'].azimuth['data'][ind_ray]
-            ele = dataset['radar_out'].elevation['data'][ind_ray]
-            rng = dataset['radar_out'].range['data'][ind_rng]
-        else:
-            ind_ray = find_ray_index(
-                dataset['radar_out'].elevation['data'],
-                dataset['radar_out'].azimuth['data'], ele, azi,
-                ele_tol=ele_tol, azi_tol=azi_tol)
-            ind_rng = find_rng_index(
-                dataset['radar_out'].range['data'], rng, rng_tol=rng_tol)
 
-        if ind_rng is None or ind_ray is None:
-            warn('Point azi='+str(azi)+', ele='+str(ele)+', rng='+str(rng) +
-                 ' out of radar coverage')
-            return None
+def _generate_Doppler(dataset, prdcfg, ctx):
+    """
+    generates the DOPPLER, COMPLEX_DOPPLER and AMPLITUDE_PHASE_DOPPLER
+    products
 
-        gateinfo = (
-            'az'+'{:.1f}'.format(azi)+'el'+'{:.1f}'.format(ele) +
-            'r'+'{:.1f}'.format(rng))
+    Parameters
+    ----------
+    dataset : spectra
+        spectra object
+    prdcfg : dictionary of dictionaries
+        product configuration dictionary of dictionaries
+    ctx : _PrdCtx namedtuple
+        the product parameters common to all product types
 
-        xaxis_info = prdcfg.get('xaxis_info', 'Doppler_velocity')
-        vmin = prdcfg.get('vmin', None)
-        vmax = prdcfg.get('vmax', None)
+    Returns
+    -------
+    None or name of generated files
 
-        savedir = get_save_dir(
-            prdcfg['basepath'], prdcfg['procname'], dssavedir,
-            prdcfg['prdname'], timeinfo=prdcfg['timeinfo'])
+    """
+    gate_info = _resolve_ray_rng(dataset, prdcfg)
+    if gate_info is None:
+        return None
+    ind_ray, ind_rng, gateinfo = gate_info
 
-        fname_list = make_filename(
-            'Doppler', prdcfg['dstype'], prdcfg['voltype'],
-            prdcfg['imgformat'], prdcfginfo=gateinfo,
-            timeinfo=prdcfg['timeinfo'], runinfo=prdcfg['runinfo'])
+    plot_kwargs = _get_color_scale(prdcfg)
 
-        for i, fname in enumerate(fname_list):
-            fname_list[i] = savedir+fname
+    prdtype, plot_single, _ = _PLOT_FUNCS[ctx.type]
+    fname_list = _get_fname_list(ctx, prdtype, gateinfo, ctx.timeinfo)
 
-        plot_Doppler(
-            dataset['radar_out'], field_name, ind_ray, ind_rng, prdcfg,
-            fname_list, xaxis_info=xaxis_info, vmin=vmin, vmax=vmax)
+    plot_single(
+        dataset['radar_out'], ctx.field_name, ind_ray, ind_rng, prdcfg,
+        fname_list, xaxis_info=ctx.xaxis_info, **plot_kwargs)
 
+    if ctx.verbose:
         print('----- save to '+' '.join(fname_list))
 
-        return fname_list
-
-    if prdcfg['type'] == 'COMPLEX_RANGE_DOPPLER':
-        field_name = get_fieldname_pyart(prdcfg['voltype'])
-        if field_name not in dataset['radar_out'].fields:
-            warn(
-                ' Field type ' + field_name +
-                ' not available in data set. Skipping product ' +
-                prdcfg['type'])
-            return None
+    return fname_list
 
-        # user defined values
-        azi = prdcfg.get('azi', None)
-        ele = prdcfg.get('ele', None)
-        azi_tol = prdcfg.get('azi_tol', 1.)
-        ele_tol = prdcfg.get('ele_tol', 1.)
 
-        if azi is None or ele is None:
-            ind_ray = prdcfg.get('ind_ray', 0)
-            azi = dataset['radar_out'].azimuth['data'][ind_ray]
-            ele = dataset['radar_out'].elevation['data'][ind_ray]
-        else:
-            ind_ray = find_ray_index(
-                dataset['radar_out'].elevation['data'],
-                dataset['radar_out'].azimuth['data'], ele, azi,
-                ele_tol=ele_tol, azi_tol=azi_tol)
+def _generate_savevol(dataset, prdcfg, ctx):
+    """
+    generates the SAVEVOL product
 
-        if ind_ray is None:
-            warn('Ray azi='+str(azi)+', ele='+str(ele) +
-                 ' out of radar coverage')
-            return None
+    Parameters
+    ----------
+    dataset : spectra
+        spectra object
+    prdcfg : dictionary of dictionaries
+        product configuration dictionary of dictionaries
+    ctx : _PrdCtx namedtuple
+        the product parameters common to all product types
 
-        gateinfo = 'az'+'{:.1f}'.format(azi)+'el'+'{:.1f}'.format(ele)
+    Returns
+    -------
+    None or name of generated file
 
-        xaxis_info = prdcfg.get('xaxis_info', 'Doppler_velocity')
-        vmin = prdcfg.get('vmin', None)
-        vmax = prdcfg.get('vmax', None)
+    """
+    file_type = prdcfg.get('file_type', 'nc')
+    physical = prdcfg.get('physical', True)
 
-        savedir = get_save_dir(
-            prdcfg['basepath'], prdcfg['procname'], dssavedir,
-            prdcfg['prdname'], timeinfo=prdcfg['timeinfo'])
+    new_dataset = deepcopy(dataset['radar_out'])
+    new_dataset.fields = dict()
+    new_dataset.add_field(
+        ctx.field_name, dataset['radar_out'].fields[ctx.field_name])
 
-        fname_list = make_filename(
-            'c_range_Doppler', prdcfg['dstype'], prdcfg['voltype'],
-            prdcfg['imgformat'], prdcfginfo=gateinfo,
-            timeinfo=prdcfg['timeinfo'], runinfo=prdcfg['runinfo'])
+    savedir = _get_save_dir(
+        ctx.basepath, ctx.procname, ctx.dssavedir, ctx.prdname,
+        ctx.timeinfo)
 
-        for i, fname in enumerate(fname_list):
-            fname_list[i] = savedir+fname
+    fname = make_filename(
+        'savevol', ctx.dstype, ctx.voltype, [file_type],
+        timeinfo=ctx.timeinfo, runinfo=ctx.runinfo)[0]
 
-        if dataset['radar_out'].ngates == 1:
-            plot_complex_Doppler(
-                dataset['radar_out'], field_name, ind_ray, 0, prdcfg,
-                fname_list, xaxis_info=xaxis_info, vmin=vmin, vmax=vmax)
-        else:
-            plot_complex_range_Doppler(
-                dataset['radar_out'], field_name, ind_ray, prdcfg, fname_list,
-                xaxis_info=xaxis_info, vmin=vmin, vmax=vmax)
+    fname = os.path.join(savedir, fname)
 
-        print('----- save to '+' '.join(fname_list))
+    pyart.aux_io.write_spectra(fname, new_dataset, physical=physical)
 
-        return fname_list
+    if ctx.verbose:
+        print('saved file: '+fname)
 
-    if prdcfg['type'] == 'COMPLEX_ANGLE_DOPPLER':
-        field_name = get_fieldname_pyart(prdcfg['voltype'])
-        if field_name not in dataset['radar_out'].fields:
-            warn(
-                ' Field type ' + field_name +
-                ' not available in data set. Skipping product ' +
-                prdcfg['type'])
-            return None
+    return fname
 
-        # user defined values
-        along_azi = prdcfg.get('along_azi', True)
-        ang = prdcfg.get('ang', 0)
-        rng = prdcfg.get('rng', 0)
-        ang_tol = prdcfg.get('ang_tol', 1.)
-        rng_tol = prdcfg.get('rng_tol', 50.)
 
-        ind_rng = find_rng_index(
-            dataset['radar_out'].range['data'], rng, rng_tol=rng_tol)
+def _generate_saveall(dataset, prdcfg, ctx):
+    """
+    generates the SAVEALL product
 
-        if ind_rng is None:
-            warn('No data at rng='+str(rng))
-            return None
+    Parameters
+    ----------
+    dataset : spectra
+        spectra object
+    prdcfg : dictionary of dictionaries
+        product configuration dictionary of dictionaries
+    ctx : _PrdCtx namedtuple
+        the product parameters common to all product types
 
-        if along_azi:
-            ind_rays = np.where(np.logical_and(
-                dataset['radar_out'].elevation['data'] <= ang+ang_tol,
-                dataset['radar_out'].elevation['data'] >= ang-ang_tol))[0]
-        else:
-            ind_rays = np.where(np.logical_and(
-                dataset['radar_out'].azimuth['data'] <= ang+ang_tol,
-                dataset['radar_out'].azimuth['data'] >= ang-ang_tol))[0]
+    Returns
+    -------
+    None or name of generated file
 
-        if ind_rays.size == 0:
-            warn('No data for angle '+str(ang))
-            return None
+    """
+    file_type = prdcfg.get('file_type', 'nc')
+    datatypes = prdcfg.get('datatypes', None)
+    physical = prdcfg.get('physical', True)
+
+    savedir = _get_save_dir(
+        ctx.basepath, ctx.procname, ctx.dssavedir, ctx.prdname,
+        ctx.timeinfo)
+
+    fname = make_filename(
+        'savevol', ctx.dstype, 'all_fields', [file_type],
+        timeinfo=ctx.timeinfo, runinfo=ctx.runinfo)[0]
+
+    fname = os.path.join(savedir, fname)
+
+    field_names = None
+    if datatypes is not None:
+        field_names = []
+        for datatype in datatypes:
+            field_names.append(get_fieldname_pyart(datatype))
+
+    if field_names is not None:
+        radar_aux = deepcopy(dataset['radar_out'])
+        radar_aux.fields = dict()
+        for field_name in field_names:
+            if field_name not in dataset['radar_out'].fields:
+                warn(field_name+' not in radar object')
+            else:
+                radar_aux.add_field(
+                    field_name,
+                    dataset['radar_out'].fields[field_name])
+    else:
+        radar_aux = dataset['radar_out']
+    pyart.aux_io.write_spectra(fname, radar_aux, physical=physical)
+
+    if ctx.verbose:
+        print('saved file: '+fname)
 
-        # sort angles
-        if along_azi:
-            ang_selected = dataset['radar_out'].azimuth['data'][ind_rays]
+    return fname
 
-        else:
-            ang_selected = dataset['radar_out'].elevation['data'][ind_rays]
-        ind_rays = ind_rays[np.argsort(ang_selected)]
 
-        if along_azi:
-            gateinfo = 'azi'+'{:.1f}'.format(ang)+'rng'+'{:.1f}'.format(rng)
-        else:
-            gateinfo = 'ele'+'{:.1f}'.format(ang)+'rng'+'{:.1f}'.format(rng)
+def _get_prd_context(prdcfg, product_type, field_name):
+    """
+    gets the product parameters common to all product types
 
-        xaxis_info = prdcfg.get('xaxis_info', 'Doppler_velocity')
-        vmin = prdcfg.get('vmin', None)
-        vmax = prdcfg.get('vmax', None)
+    Parameters
+    ----------
+    prdcfg : dictionary of dictionaries
+        product configuration dictionary of dictionaries
+    product_type : str
+        the interned product type
+    field_name : str or None
+        name of the field of the product. None for the SAVEALL product
 
-        savedir = get_save_dir(
-            prdcfg['basepath'], prdcfg['procname'], dssavedir,
-            prdcfg['prdname'], timeinfo=prdcfg['timeinfo'])
+    Returns
+    -------
+    ctx : _PrdCtx namedtuple
+        the product parameters
 
-        fname_list = make_filename(
-            'range_Doppler', prdcfg['dstype'], prdcfg['voltype'],
-            prdcfg['imgformat'], prdcfginfo=gateinfo,
-            timeinfo=prdcfg['timeinfo'], runinfo=prdcfg['runinfo'])
+    """
+    return _PrdCtx(
+        type=product_type, field_name=field_name,
+        dssavedir=prdcfg.get('dssavename', prdcfg['dsname']),
+        basepath=prdcfg['basepath'], procname=prdcfg['procname'],
+        prdname=prdcfg['prdname'], timeinfo=prdcfg['timeinfo'],
+        runinfo=prdcfg['runinfo'], dstype=prdcfg['dstype'],
+        voltype=prdcfg.get('voltype', None),
+        imgformat=prdcfg.get('imgformat', None),
+        xaxis_info=prdcfg.get('xaxis_info', 'Doppler_velocity'),
+        verbose=prdcfg.get('verbose', True))
+
+
+def _resolve_ray(dataset, prdcfg):
+    """
+    gets the index of the ray to plot, either from its user defined index
+    or from its antenna coordinates
 
-        for i, fname in enumerate(fname_list):
-            fname_list[i] = savedir+fname
+    Parameters
+    ----------
+    dataset : spectra
+        spectra object
+    prdcfg : dictionary of dictionaries
+        product configuration dictionary of dictionaries
 
-        if ind_rays.size == 1:
-            plot_complex_Doppler(
-                dataset['radar_out'], field_name, ind_rays, ind_rng, prdcfg,
-                fname_list, xaxis_info=xaxis_info, vmin=vmin, vmax=vmax)
-        else:
-            plot_complex_angle_Doppler(
-                dataset['radar_out'], field_name, ang, ind_rays, ind_rng,
-                prdcfg, fname_list, xaxis_info=xaxis_info,
-                along_azi=along_azi, vmin=vmin, vmax=vmax)
+    Returns
+    -------
+    ind_ray, gateinfo : tuple or None
+        the ray index and the gate information used in the file name. None
+        if the ray is out of the radar coverage
 
-        print('----- save to '+' '.join(fname_list))
+    """
+    # user defined values
+    azi = prdcfg.get('azi', None)
+    ele = prdcfg.get('ele', None)
+    azi_tol = prdcfg.get('azi_tol', 1.)
+    ele_tol = prdcfg.get('ele_tol', 1.)
 
-        return fname_list
+    if azi is None or ele is None or 'ind_ray' in prdcfg:
+        ind_ray = prdcfg.get('ind_ray', 0)
+        azi = dataset['radar_out'].azimuth['data'][ind_ray]
+        ele = dataset['radar_out'].elevation['data'][ind_ray]
+    else:
+        ind_ray = find_ray_index(
+            dataset['radar_out'].elevation['data'],
+            dataset['radar_out'].azimuth['data'], ele, azi,
+            ele_tol=ele_tol, azi_tol=azi_tol)
 
-    if prdcfg['type'] == 'COMPLEX_TIME_DOPPLER':
-        field_name = get_fieldname_pyart(prdcfg['voltype'])
-        if field_name not in dataset['radar_out'].fields:
-            warn(
-                ' Field type ' + field_name +
-                ' not available in data set. Skipping product ' +
-                prdcfg['type'])
-            return None
+    if ind_ray is None:
+        warn('Ray azi='+str(azi)+', ele='+str(ele) +
+             ' out of radar coverage')
+        return None
 
-        # user defined values
-        xaxis_info = prdcfg.get('xaxis_info', 'Doppler_velocity')
-        vmin = prdcfg.get('vmin', None)
-        vmax = prdcfg.get('vmax', None)
-        plot_type = prdcfg.get('plot_type', 'final')
+    gateinfo = 'az{:.1f}el{:.1f}'.format(azi, ele)
 
-        if plot_type == 'final' and not dataset['final']:
-            return None
+    return ind_ray, gateinfo
 
-        if 'antenna_coordinates_az_el_r' in dataset:
-            az = '{:.1f}'.format(dataset['antenna_coordinates_az_el_r'][0])
-            el = '{:.1f}'.format(dataset['antenna_coordinates_az_el_r'][1])
-            r = '{:.1f}'.format(dataset['antenna_coordinates_az_el_r'][2])
-            gateinfo = ('az'+az+'r'+r+'el'+el)
-        else:
-            lon = '{:.3f}'.format(
-                dataset['point_coordinates_WGS84_lon_lat_alt'][0])
-            lat = '{:.3f}'.format(
-                dataset['point_coordinates_WGS84_lon_lat_alt'][1])
-            alt = '{:.1f}'.format(
-                dataset['point_coordinates_WGS84_lon_lat_alt'][2])
-            gateinfo = ('lon'+lon+'lat'+lat+'alt'+alt)
-
-        time_info = datetime_from_radar(dataset['radar_out'])
-
-        savedir = get_save_dir(
-            prdcfg['basepath'], prdcfg['procname'], dssavedir,
-            prdcfg['prdname'], timeinfo=time_info)
-
-        fname_list = make_filename(
-            'c_time_Doppler', prdcfg['dstype'], prdcfg['voltype'],
-            prdcfg['imgformat'], prdcfginfo=gateinfo,
-            timeinfo=time_info, runinfo=prdcfg['runinfo'])
-
-        for i, fname in enumerate(fname_list):
-            fname_list[i] = savedir+fname
-
-        if dataset['radar_out'].nrays == 1:
-            plot_complex_Doppler(
-                dataset['radar_out'], field_name, 0, 0, prdcfg, fname_list,
-                xaxis_info=xaxis_info, vmin=vmin, vmax=vmax)
-        else:
-            plot_complex_time_Doppler(
-                dataset['radar_out'], field_name, prdcfg, fname_list,
-                xaxis_info=xaxis_info, vmin=vmin, vmax=vmax)
 
-        print('----- save to '+' '.join(fname_list))
+def _resolve_ray_rng(dataset, prdcfg):
+    """
+    gets the indices of the ray and range gate to plot, either from their
+    user defined indices or from their antenna coordinates
 
-        return fname_list
+    Parameters
+    ----------
+    dataset : spectra
+        spectra object
+    prdcfg : dictionary of dictionaries
+        product configuration dictionary of dictionaries
 
-    if prdcfg['type'] == 'COMPLEX_DOPPLER':
-        field_name = get_fieldname_pyart(prdcfg['voltype'])
-        if field_name not in dataset['radar_out'].fields:
-            warn(
-                ' Field type ' + field_name +
-                ' not available in data set. Skipping product ' +
-                prdcfg['type'])
-            return None
+    Returns
+    -------
+    ind_ray, ind_rng, gateinfo : tuple or None
+        the ray and range indices and the gate information used in the file
+        name. None if the gate is out of the radar coverage
 
-        # user defined values
-        azi = prdcfg.get('azi', None)
-        ele = prdcfg.get('ele', None)
-        rng = prdcfg.get('rng', None)
-        azi_tol = prdcfg.get('azi_tol', 1.)
-        ele_tol = prdcfg.get('ele_tol', 1.)
-        rng_tol = prdcfg.get('rng_tol', 50.)
-
-        if azi is None or ele is None or rng is None:
-            ind_ray = prdcfg.get('ind_ray', 0)
-            ind_rng = prdcfg.get('ind_rng', 0)
+    """
+    # user defined values
+    azi = prdcfg.get('azi', None)
+    ele = prdcfg.get('ele', None)
+    rng = prdcfg.get('rng', None)
+    azi_tol = prdcfg.get('azi_tol', 1.)
+    ele_tol = prdcfg.get('ele_tol', 1.)
+    rng_tol = prdcfg.get('rng_tol', 50.)
+
+    if azi is None or ele is None or rng is None:
+        ind_ray = prdcfg.get('ind_ray', 0)
+        ind_rng = prdcfg.get('ind_rng', 0)
+        azi = dataset['radar_out'].azimuth['data'][ind_ray]
+        ele = dataset['radar_out'].elevation['data'][ind_ray]
+        rng = dataset['radar_out'].range['data'][ind_rng]
+    else:
+        if 'ind_ray' in prdcfg:
+            ind_ray = prdcfg['ind_ray']
             azi = dataset['radar_out'].azimuth['data'][ind_ray]
             ele = dataset['radar_out'].elevation['data'][ind_ray]
-            rng = dataset['radar_out'].range['data'][ind_rng]
         else:
             ind_ray = find_ray_index(
                 dataset['radar_out'].elevation['data'],
                 dataset['radar_out'].azimuth['data'], ele, azi,
                 ele_tol=ele_tol, azi_tol=azi_tol)
-            ind_rng = find_rng_index(
-                dataset['radar_out'].range['data'], rng, rng_tol=rng_tol)
-
-        if ind_rng is None or ind_ray is None:
-            warn('Point azi='+str(azi)+', ele='+str(ele)+', rng='+str(rng) +
-                 ' out of radar coverage')
-            return None
-
-        gateinfo = (
-            'az'+'{:.1f}'.format(azi)+'el'+'{:.1f}'.format(ele) +
-            'r'+'{:.1f}'.format(rng))
-
-        xaxis_info = prdcfg.get('xaxis_info', 'Doppler_velocity')
-        vmin = prdcfg.get('vmin', None)
-        vmax = prdcfg.get('vmax', None)
-
-        savedir = get_save_dir(
-            prdcfg['basepath'], prdcfg['procname'], dssavedir,
-            prdcfg['prdname'], timeinfo=prdcfg['timeinfo'])
-
-        fname_list = make_filename(
-            'c_Doppler', prdcfg['dstype'], prdcfg['voltype'],
-            prdcfg['imgformat'], prdcfginfo=gateinfo,
-            timeinfo=prdcfg['timeinfo'], runinfo=prdcfg['runinfo'])
-
-        for i, fname in enumerate(fname_list):
-            fname_list[i] = savedir+fname
-
-        plot_complex_Doppler(
-            dataset['radar_out'], field_name, ind_ray, ind_rng, prdcfg,
-            fname_list, xaxis_info=xaxis_info, vmin=vmin, vmax=vmax)
-
-        print('----- save to '+' '.join(fname_list))
-
-        return fname_list
-
-    if prdcfg['type'] == 'AMPLITUDE_PHASE_DOPPLER':
-        field_name = get_fieldname_pyart(prdcfg['voltype'])
-        if field_name not in dataset['radar_out'].fields:
-            warn(
-                ' Field type ' + field_name +
-                ' not available in data set. Skipping product ' +
-                prdcfg['type'])
-            return None
-
-        # user defined values
-        azi = prdcfg.get('azi', None)
-        ele = prdcfg.get('ele', None)
-        rng = prdcfg.get('rng', None)
-        azi_tol = prdcfg.get('azi_tol', 1.)
-        ele_tol = prdcfg.get('ele_tol', 1.)
-        rng_tol = prdcfg.get('rng_tol', 50.)
-
-        if azi is None or ele is None or rng is None:
-            ind_ray = prdcfg.get('ind_ray', 0)
-            ind_rng = prdcfg.get('ind_rng', 0)
-            azi = dataset['radar_out'].azimuth['data'][ind_ray]
-            ele = dataset['radar_out'].elevation['data'][ind_ray]
+        if 'ind_rng' in prdcfg:
+            ind_rng = prdcfg['ind_rng']
             rng = dataset['radar_out'].range['data'][ind_rng]
         else:
-            ind_ray = find_ray_index(
-                dataset['radar_out'].elevation['data'],
-                dataset['radar_out'].azimuth['data'], ele, azi,
-                ele_tol=ele_tol, azi_tol=azi_tol)
             ind_rng = find_rng_index(
                 dataset['radar_out'].range['data'], rng, rng_tol=rng_tol)
 
-        if ind_rng is None or ind_ray is None:
-            warn('Point azi='+str(azi)+', ele='+str(ele)+', rng='+str(rng) +
-                 ' out of radar coverage')
-            return None
-
-        gateinfo = (
-            'az'+'{:.1f}'.format(azi)+'el'+'{:.1f}'.format(ele) +
-            'r'+'{:.1f}'.format(rng))
-
-        xaxis_info = prdcfg.get('xaxis_info', 'Doppler_velocity')
-        ampli_vmin = prdcfg.get('ampli_vmin', None)
-        ampli_vmax = prdcfg.get('ampli_vmax', None)
-        phase_vmin = prdcfg.get('phase_vmin', None)
-        phase_vmax = prdcfg.get('phase_vmax', None)
+    if ind_rng is None or ind_ray is None:
+        warn('Point azi='+str(azi)+', ele='+str(ele)+', rng='+str(rng) +
+             ' out of radar coverage')
+        return None
 
-        savedir = get_save_dir(
-            prdcfg['basepath'], prdcfg['procname'], dssavedir,
-            prdcfg['prdname'], timeinfo=prdcfg['timeinfo'])
+    gateinfo = 'az{:.1f}el{:.1f}r{:.1f}'.format(azi, ele, rng)
 
-        fname_list = make_filename(
-            'ap_Doppler', prdcfg['dstype'], prdcfg['voltype'],
-            prdcfg['imgformat'], prdcfginfo=gateinfo,
-            timeinfo=prdcfg['timeinfo'], runinfo=prdcfg['runinfo'])
+    return ind_ray, ind_rng, gateinfo
 
-        for i, fname in enumerate(fname_list):
-            fname_list[i] = savedir+fname
 
-        plot_amp_phase_Doppler(
-            dataset['radar_out'], field_name, ind_ray, ind_rng, prdcfg,
-            fname_list, xaxis_info=xaxis_info, ampli_vmin=ampli_vmin,
-            ampli_vmax=ampli_vmax, phase_vmin=phase_vmin,
-            phase_vmax=phase_vmax)
-
-        print('----- save to '+' '.join(fname_list))
-
-        return fname_list
-
-    if prdcfg['type'] == 'AMPLITUDE_PHASE_RANGE_DOPPLER':
-        field_name = get_fieldname_pyart(prdcfg['voltype'])
-        if field_name not in dataset['radar_out'].fields:
-            warn(
-                ' Field type ' + field_name +
-                ' not available in data set. Skipping product ' +
-                prdcfg['type'])
-            return None
-
-        # user defined values
-        azi = prdcfg.get('azi', None)
-        ele = prdcfg.get('ele', None)
-        azi_tol = prdcfg.get('azi_tol', 1.)
-        ele_tol = prdcfg.get('ele_tol', 1.)
-
-        if azi is None or ele is None:
-            ind_ray = prdcfg.get('ind_ray', 0)
-            azi = dataset['radar_out'].azimuth['data'][ind_ray]
-            ele = dataset['radar_out'].elevation['data'][ind_ray]
-        else:
-            ind_ray = find_ray_index(
-                dataset['radar_out'].elevation['data'],
-                dataset['radar_out'].azimuth['data'], ele, azi,
-                ele_tol=ele_tol, azi_tol=azi_tol)
-
-        if ind_ray is None:
-            warn('Ray azi='+str(azi)+', ele='+str(ele) +
-                 ' out of radar coverage')
-            return None
-
-        gateinfo = 'az'+'{:.1f}'.format(azi)+'el'+'{:.1f}'.format(ele)
-
-        xaxis_info = prdcfg.get('xaxis_info', 'Doppler_velocity')
-        ampli_vmin = prdcfg.get('ampli_vmin', None)
-        ampli_vmax = prdcfg.get('ampli_vmax', None)
-        phase_vmin = prdcfg.get('phase_vmin', None)
-        phase_vmax = prdcfg.get('phase_vmax', None)
-
-        savedir = get_save_dir(
-            prdcfg['basepath'], prdcfg['procname'], dssavedir,
-            prdcfg['prdname'], timeinfo=prdcfg['timeinfo'])
+def _resolve_time_gateinfo(dataset):
+    """
+    gets the gate information and the time of a time series of spectra at a
+    point of interest. The gate information is stored in the data set so
+    that the other time products of the data set reuse it
 
-        fname_list = make_filename(
-            'ap_range_Doppler', prdcfg['dstype'], prdcfg['voltype'],
-            prdcfg['imgformat'], prdcfginfo=gateinfo,
-            timeinfo=prdcfg['timeinfo'], runinfo=prdcfg['runinfo'])
+    Parameters
+    ----------
+    dataset : spectra
+        spectra object
 
-        for i, fname in enumerate(fname_list):
-            fname_list[i] = savedir+fname
+    Returns
+    -------
+    gateinfo : str
+        the gate information used in the file name
+    time_info : datetime object
+        the time of the spectra object
 
-        if dataset['radar_out'].ngates == 1:
-            plot_amp_phase_Doppler(
-                dataset['radar_out'], field_name, ind_ray, 0, prdcfg,
-                fname_list, xaxis_info=xaxis_info, ampli_vmin=ampli_vmin,
-                ampli_vmax=ampli_vmax, phase_vmin=phase_vmin,
-                phase_vmax=phase_vmax)
+    """
+    gateinfo = dataset.get('_time_gateinfo', None)
+    if gateinfo is None:
+        if 'antenna_coordinates_az_el_r' in dataset:
+            az, el, r = dataset['antenna_coordinates_az_el_r'][:3]
+            gateinfo = 'az{:.1f}r{:.1f}el{:.1f}'.format(az, r, el)
         else:
-            plot_amp_phase_range_Doppler(
-                dataset['radar_out'], field_name, ind_ray, prdcfg, fname_list,
-                xaxis_info=xaxis_info, ampli_vmin=ampli_vmin,
-                ampli_vmax=ampli_vmax, phase_vmin=phase_vmin,
-                phase_vmax=phase_vmax)
-
-        print('----- save to '+' '.join(fname_list))
-
-        return fname_list
+            lon, lat, alt = (
+                dataset['point_coordinates_WGS84_lon_lat_alt'][:3])
+            gateinfo = 'lon{:.3f}lat{:.3f}alt{:.1f}'.format(lon, lat, alt)
+        dataset['_time_gateinfo'] = gateinfo
 
-    if prdcfg['type'] == 'AMPLITUDE_PHASE_ANGLE_DOPPLER':
-        field_name = get_fieldname_pyart(prdcfg['voltype'])
-        if field_name not in dataset['radar_out'].fields:
-            warn(
-                ' Field type ' + field_name +
-                ' not available in data set. Skipping product ' +
-                prdcfg['type'])
-            return None
+    time_info = _get_radar_datetime(dataset['radar_out'])
 
-        # user defined values
-        along_azi = prdcfg.get('along_azi', True)
-        ang = prdcfg.get('ang', 0)
-        rng = prdcfg.get('rng', 0)
-        ang_tol = prdcfg.get('ang_tol', 1.)
-        rng_tol = prdcfg.get('rng_tol', 50.)
+    return gateinfo, time_info
 
-        ind_rng = find_rng_index(
-            dataset['radar_out'].range['data'], rng, rng_tol=rng_tol)
 
-        if ind_rng is None:
-            warn('No data at rng='+str(rng))
-            return None
-
-        if along_azi:
-            ind_rays = np.where(np.logical_and(
-                dataset['radar_out'].elevation['data'] <= ang+ang_tol,
-                dataset['radar_out'].elevation['data'] >= ang-ang_tol))[0]
-        else:
-            ind_rays = np.where(np.logical_and(
-                dataset['radar_out'].azimuth['data'] <= ang+ang_tol,
-                dataset['radar_out'].azimuth['data'] >= ang-ang_tol))[0]
-
-        if ind_rays.size == 0:
-            warn('No data for angle '+str(ang))
-            return None
-
-        # sort angles
-        if along_azi:
-            ang_selected = dataset['radar_out'].azimuth['data'][ind_rays]
+def _get_radar_datetime(radar):
+    """
+    gets the time of a radar object. The time is cached for each radar
+    object together with the time metadata it was obtained from, so that it
+    is only recomputed if the time series of the object has been modified
+    in a way that changes its reference time
 
-        else:
-            ang_selected = dataset['radar_out'].elevation['data'][ind_rays]
-        ind_rays = ind_rays[np.argsort(ang_selected)]
+    Parameters
+    ----------
+    radar : radar object
+        the radar object
 
-        if along_azi:
-            gateinfo = 'azi'+'{:.1f}'.format(ang)+'rng'+'{:.1f}'.format(rng)
-        else:
-            gateinfo = 'ele'+'{:.1f}'.format(ang)+'rng'+'{:.1f}'.format(rng)
-
-        xaxis_info = prdcfg.get('xaxis_info', 'Doppler_velocity')
-        ampli_vmin = prdcfg.get('ampli_vmin', None)
-        ampli_vmax = prdcfg.get('ampli_vmax', None)
-        phase_vmin = prdcfg.get('phase_vmin', None)
-        phase_vmax = prdcfg.get('phase_vmax', None)
-
-        savedir = get_save_dir(
-            prdcfg['basepath'], prdcfg['procname'], dssavedir,
-            prdcfg['prdname'], timeinfo=prdcfg['timeinfo'])
-
-        fname_list = make_filename(
-            'range_Doppler', prdcfg['dstype'], prdcfg['voltype'],
-            prdcfg['imgformat'], prdcfginfo=gateinfo,
-            timeinfo=prdcfg['timeinfo'], runinfo=prdcfg['runinfo'])
-
-        for i, fname in enumerate(fname_list):
-            fname_list[i] = savedir+fname
-
-        if ind_rays.size == 1:
-            plot_amp_phase_Doppler(
-                dataset['radar_out'], field_name, ind_rays, ind_rng, prdcfg,
-                fname_list, xaxis_info=xaxis_info, ampli_vmin=ampli_vmin,
-                ampli_vmax=ampli_vmax, phase_vmin=phase_vmin,
-                phase_vmax=phase_vmax)
-        else:
-            plot_amp_phase_angle_Doppler(
-                dataset['radar_out'], field_name, ang, ind_rays, ind_rng,
-                prdcfg, fname_list, xaxis_info=xaxis_info,
-                along_azi=along_azi, ampli_vmin=ampli_vmin,
-                ampli_vmax=ampli_vmax, phase_vmin=phase_vmin,
-                phase_vmax=phase_vmax)
+    Returns
+    -------
+    time_info : datetime object
+        the time of the radar object
 
-        print('----- save to '+' '.join(fname_list))
+    """
+    key = (
+        radar.time['units'], radar.time.get('calendar', None),
+        radar.time['data'][0])
+    cached = _RADAR_DATETIME_CACHE.get(radar)
+    if cached is not None and cached[0] == key:
+        return cached[1]
 
-        return fname_list
+    time_info = datetime_from_radar(radar)
+    _RADAR_DATETIME_CACHE[radar] = (key, time_info)
 
-    if prdcfg['type'] == 'AMPLITUDE_PHASE_TIME_DOPPLER':
-        field_name = get_fieldname_pyart(prdcfg['voltype'])
-        if field_name not in dataset['radar_out'].fields:
-            warn(
-                ' Field type ' + field_name +
-                ' not available in data set. Skipping product ' +
-                prdcfg['type'])
-            return None
+    return time_info
 
-        # user defined values
-        xaxis_info = prdcfg.get('xaxis_info', 'Doppler_velocity')
-        ampli_vmin = prdcfg.get('ampli_vmin', None)
-        ampli_vmax = prdcfg.get('ampli_vmax', None)
-        phase_vmin = prdcfg.get('phase_vmin', None)
-        phase_vmax = prdcfg.get('phase_vmax', None)
-        plot_type = prdcfg.get('plot_type', 'final')
 
-        if plot_type == 'final' and not dataset['final']:
-            return None
+def _get_color_scale(prdcfg):
+    """
+    gets the user defined limits of the color scale of the plot. The
+    amplitude-phase plots have separate limits for the module and the phase
 
-        if 'antenna_coordinates_az_el_r' in dataset:
-            az = '{:.1f}'.format(dataset['antenna_coordinates_az_el_r'][0])
-            el = '{:.1f}'.format(dataset['antenna_coordinates_az_el_r'][1])
-            r = '{:.1f}'.format(dataset['antenna_coordinates_az_el_r'][2])
-            gateinfo = ('az'+az+'r'+r+'el'+el)
-        else:
-            lon = '{:.3f}'.format(
-                dataset['point_coordinates_WGS84_lon_lat_alt'][0])
-            lat = '{:.3f}'.format(
-                dataset['point_coordinates_WGS84_lon_lat_alt'][1])
-            alt = '{:.1f}'.format(
-                dataset['point_coordinates_WGS84_lon_lat_alt'][2])
-            gateinfo = ('lon'+lon+'lat'+lat+'alt'+alt)
-
-        time_info = datetime_from_radar(dataset['radar_out'])
-
-        savedir = get_save_dir(
-            prdcfg['basepath'], prdcfg['procname'], dssavedir,
-            prdcfg['prdname'], timeinfo=time_info)
-
-        fname_list = make_filename(
-            'ap_time_Doppler', prdcfg['dstype'], prdcfg['voltype'],
-            prdcfg['imgformat'], prdcfginfo=gateinfo,
-            timeinfo=time_info, runinfo=prdcfg['runinfo'])
-
-        for i, fname in enumerate(fname_list):
-            fname_list[i] = savedir+fname
-
-        if dataset['radar_out'].nrays == 1:
-            plot_amp_phase_Doppler(
-                dataset['radar_out'], field_name, 0, 0, prdcfg, fname_list,
-                xaxis_info=xaxis_info, ampli_vmin=ampli_vmin,
-                ampli_vmax=ampli_vmax, phase_vmin=phase_vmin,
-                phase_vmax=phase_vmax)
-        else:
-            plot_amp_phase_time_Doppler(
-                dataset['radar_out'], field_name, prdcfg, fname_list,
-                xaxis_info=xaxis_info, ampli_vmin=ampli_vmin,
-                ampli_vmax=ampli_vmax, phase_vmin=phase_vmin,
-                phase_vmax=phase_vmax)
+    Parameters
+    ----------
+    prdcfg : dictionary of dictionaries
+        product configuration dictionary of dictionaries
 
-        print('----- save to '+' '.join(fname_list))
+    Returns
+    -------
+    plot_kwargs : dict
+        the color scale keyword arguments of the plotting function
 
-        return fname_list
+    """
+    if prdcfg['type'].startswith('AMPLITUDE_PHASE'):
+        return {
+            'ampli_vmin': prdcfg.get('ampli_vmin', None),
+            'ampli_vmax': prdcfg.get('ampli_vmax', None),
+            'phase_vmin': prdcfg.get('phase_vmin', None),
+            'phase_vmax': prdcfg.get('phase_vmax', None)}
 
-    if prdcfg['type'] == 'SAVEVOL':
-        field_name = get_fieldname_pyart(prdcfg['voltype'])
-        if field_name not in dataset['radar_out'].fields:
-            warn(
-                ' Field type ' + field_name +
-                ' not available in data set. Skipping product ' +
-                prdcfg['type'])
-            return None
+    return {
+        'vmin': prdcfg.get('vmin', None),
+        'vmax': prdcfg.get('vmax', None)}
 
-        file_type = prdcfg.get('file_type', 'nc')
-        physical = prdcfg.get('physical', True)
 
-        new_dataset = deepcopy(dataset['radar_out'])
-        new_dataset.fields = dict()
-        new_dataset.add_field(
-            field_name, dataset['radar_out'].fields[field_name])
+def _get_save_dir(basepath, procname, dssavedir, prdname, timeinfo):
+    """
+    gets the path to a product directory and creates it if it does not
+    exist, e.g. because it has been deleted since the last product
 
-        savedir = get_save_dir(
-            prdcfg['basepath'], prdcfg['procname'], dssavedir,
-            prdcfg['prdname'], timeinfo=prdcfg['timeinfo'])
+    Parameters
+    ----------
+    basepath : str
+        product base path
+    procname : str
+        name of processing space
+    dssavedir : str
+        name of the dataset directory where to save the product
+    prdname : str
+        product name
+    timeinfo : datetime object or None
+        the time used to generate the date directory
 
-        fname = make_filename(
-            'savevol', prdcfg['dstype'], prdcfg['voltype'], [file_type],
-            timeinfo=prdcfg['timeinfo'], runinfo=prdcfg['runinfo'])[0]
+    Returns
+    -------
+    savedir : str
+        path to product
 
-        fname = savedir+fname
+    """
+    savedir = get_save_dir(
+        basepath, procname, dssavedir, prdname, timeinfo=timeinfo,
+        create_dir=False)
+    if not os.path.isdir(savedir):
+        os.makedirs(savedir, exist_ok=True)
 
-        pyart.aux_io.write_spectra(fname, new_dataset, physical=physical)
+    return savedir
 
-        print('saved file: '+fname)
 
-        return fname
-
-    if prdcfg['type'] == 'SAVEALL':
-        file_type = prdcfg.get('file_type', 'nc')
-        datatypes = prdcfg.get('datatypes', None)
-        physical = prdcfg.get('physical', True)
-
-        savedir = get_save_dir(
-            prdcfg['basepath'], prdcfg['procname'], dssavedir,
-            prdcfg['prdname'], timeinfo=prdcfg['timeinfo'])
-
-        fname = make_filename(
-            'savevol', prdcfg['dstype'], 'all_fields', [file_type],
-            timeinfo=prdcfg['timeinfo'], runinfo=prdcfg['runinfo'])[0]
-
-        fname = savedir+fname
-
-        field_names = None
-        if datatypes is not None:
-            field_names = []
-            for datatype in datatypes:
-                field_names.append(get_fieldname_pyart(datatype))
-
-        if field_names is not None:
-            radar_aux = deepcopy(dataset['radar_out'])
-            radar_aux.fields = dict()
-            for field_name in field_names:
-                if field_name not in dataset['radar_out'].fields:
-                    warn(field_name+' not in radar object')
-                else:
-                    radar_aux.add_field(
-                        field_name,
-                        dataset['radar_out'].fields[field_name])
-        else:
-            radar_aux = dataset['radar_out']
-        pyart.aux_io.write_spectra(fname, radar_aux, physical=physical)
+def _get_fname_list(ctx, prdtype, gateinfo, timeinfo):
+    """
+    gets the full path of the files of a plot product
 
-        print('saved file: '+fname)
+    Parameters
+    ----------
+    ctx : _PrdCtx namedtuple
+        the product parameters common to all product types
+    prdtype : str
+        the product type used in the file name
+    gateinfo : str
+        the gate information used in the file name
+    timeinfo : datetime object
+        the time used in the directory and file names
 
-        return fname
+    Returns
+    -------
+    fname_list : list of str
+        the full path of the files
 
-    warn(' Unsupported product type: ' + prdcfg['type'])
-    return None
+    """
+    savedir = _get_save_dir(
+        ctx.basepath, ctx.procname, ctx.dssavedir, ctx.prdname, timeinfo)
+
+    fname_list = make_filename(
+        prdtype, ctx.dstype, ctx.voltype, ctx.imgformat,
+        prdcfginfo=gateinfo, timeinfo=timeinfo, runinfo=ctx.runinfo)
+
+    return [os.path.join(savedir, fname) for fname in fname_list]
+
+
+# product parameters common to all product types
+_PrdCtx = namedtuple(
+    '_PrdCtx', ('type', 'field_name', 'dssavedir', 'basepath', 'procname',
+                'prdname', 'timeinfo', 'runinfo', 'dstype', 'voltype',
+                'imgformat', 'xaxis_info', 'verbose'))
+
+# time of the radar objects of the time Doppler products
+_RADAR_DATETIME_CACHE = WeakKeyDictionary()
+
+# product type used in the file names and plotting functions of each plot
+# product, for a single gate or ray and for several of them
+_PLOT_FUNCS = {
+    'RANGE_DOPPLER': ('range_Doppler', plot_Doppler, plot_range_Doppler),
+    'COMPLEX_RANGE_DOPPLER': (
+        'c_range_Doppler', plot_complex_Doppler, plot_complex_range_Doppler),
+    'AMPLITUDE_PHASE_RANGE_DOPPLER': (
+        'ap_range_Doppler', plot_amp_phase_Doppler,
+        plot_amp_phase_range_Doppler),
+    'ANGLE_DOPPLER': ('range_Doppler', plot_Doppler, plot_angle_Doppler),
+    'COMPLEX_ANGLE_DOPPLER': (
+        'range_Doppler', plot_complex_Doppler, plot_complex_angle_Doppler),
+    'AMPLITUDE_PHASE_ANGLE_DOPPLER': (
+        'range_Doppler', plot_amp_phase_Doppler,
+        plot_amp_phase_angle_Doppler),
+    'TIME_DOPPLER': ('time_Doppler', plot_Doppler, plot_time_Doppler),
+    'COMPLEX_TIME_DOPPLER': (
+        'c_time_Doppler', plot_complex_Doppler, plot_complex_time_Doppler),
+    'AMPLITUDE_PHASE_TIME_DOPPLER': (
+        'ap_time_Doppler', plot_amp_phase_Doppler,
+        plot_amp_phase_time_Doppler),
+    'DOPPLER': ('Doppler', plot_Doppler, None),
+    'COMPLEX_DOPPLER': ('c_Doppler', plot_complex_Doppler, None),
+    'AMPLITUDE_PHASE_DOPPLER': ('ap_Doppler', plot_amp_phase_Doppler, None)}
+
+# function generating each product type
+_HANDLERS = {
+    'RANGE_DOPPLER': _generate_range_Doppler,
+    'COMPLEX_RANGE_DOPPLER': _generate_range_Doppler,
+    'AMPLITUDE_PHASE_RANGE_DOPPLER': _generate_range_Doppler,
+    'ANGLE_DOPPLER': _generate_angle_Doppler,
+    'COMPLEX_ANGLE_DOPPLER': _generate_angle_Doppler,
+    'AMPLITUDE_PHASE_ANGLE_DOPPLER': _generate_angle_Doppler,
+    'TIME_DOPPLER': _generate_time_Doppler,
+    'COMPLEX_TIME_DOPPLER': _generate_time_Doppler,
+    'AMPLITUDE_PHASE_TIME_DOPPLER': _generate_time_Doppler,
+    'DOPPLER': _generate_Doppler,
+    'COMPLEX_DOPPLER': _generate_Doppler,
+    'AMPLITUDE_PHASE_DOPPLER': _generate_Doppler,
+    'SAVEVOL': _generate_savevol,
+    'SAVEALL': _generate_saveall}
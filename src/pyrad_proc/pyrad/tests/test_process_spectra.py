@@ -0,0 +1,379 @@
+"""
+Tests of the caches shared by the spectral processing functions
+
+"""
+
+import numpy as np
+from numpy.testing import assert_allclose, assert_array_equal
+import pytest
+
+pytest.importorskip('pyart')
+
+from pyrad.proc import process_spectra
+from pyrad.util import radar_utils
+
+
+class _Spectra():
+    """ Minimal spectra object with the attributes used by the caches """
+
+    def __init__(self, nrays=3, ngates=4, npulses=8, seed=0):
+        rng = np.random.RandomState(seed)
+        self.nrays = nrays
+        self.ngates = ngates
+        self.npulses_max = npulses
+        self.time = {'data': np.arange(nrays, dtype=float)}
+        self.azimuth = {'data': np.linspace(0., 360., nrays)}
+        self.elevation = {'data': np.zeros(nrays)}
+        self.range = {'data': np.arange(ngates)*100.}
+        self.Doppler_velocity = {'data': np.ma.masked_array(
+            np.tile(np.linspace(-8., 8., npulses), (nrays, 1)))}
+        self.fields = {
+            'spectral_reflectivity_hh': {'data': np.ma.masked_array(
+                rng.uniform(-10., 40., (nrays, ngates, npulses)))},
+            'complex_spectra_hh_ADU': {'data': np.ma.masked_array(
+                rng.normal(size=(nrays, ngates, npulses)) +
+                1j*rng.normal(size=(nrays, ngates, npulses)))}}
+
+
+class _Radar():
+    """ Minimal radar object derived from a spectra object """
+
+    def __init__(self, psr):
+        self.nrays = psr.nrays
+        self.ngates = psr.ngates
+        self.time = psr.time
+        self.fields = dict()
+
+
+@pytest.fixture
+def kernel_calls(monkeypatch):
+    """ counts the calls to the Doppler moments kernel """
+    calls = []
+    kernel = process_spectra.Doppler_moments
+
+    def counting_kernel(*args):
+        calls.append(args[0].shape)
+        kernel(*args)
+
+    monkeypatch.setattr(process_spectra, 'Doppler_moments', counting_kernel)
+    return calls
+
+
+def test_Doppler_moments_cached(kernel_calls):
+    psr = _Spectra()
+    dBZ1, vel1, width1 = process_spectra._get_Doppler_moments(
+        psr, 'spectral_reflectivity_hh')
+    dBZ2, vel2, width2 = process_spectra._get_Doppler_moments(
+        psr, 'spectral_reflectivity_hh')
+
+    assert len(kernel_calls) == 1
+    assert_allclose(dBZ1, dBZ2)
+    assert_allclose(vel1, vel2)
+    assert_allclose(width1, width2)
+
+    # the returned moments are copies of the cached ones
+    dBZ1[:] = 0.
+    dBZ3 = process_spectra._get_Doppler_moments(
+        psr, 'spectral_reflectivity_hh')[0]
+    assert_allclose(dBZ3, dBZ2)
+
+
+def test_Doppler_moments_field_replaced(kernel_calls):
+    psr = _Spectra()
+    field = psr.fields['spectral_reflectivity_hh']
+    dBZ1 = process_spectra._get_Doppler_moments(
+        psr, 'spectral_reflectivity_hh')[0]
+
+    # e.g. a noise filter writing its output under the same field name
+    field['data'] = field['data']+3.
+    dBZ2 = process_spectra._get_Doppler_moments(
+        psr, 'spectral_reflectivity_hh')[0]
+
+    assert len(kernel_calls) == 2
+    assert_allclose(dBZ2, dBZ1+3.)
+
+
+def test_Doppler_moments_time_series_grown(kernel_calls):
+    psr = _Spectra(nrays=2)
+    process_spectra._get_Doppler_moments(psr, 'spectral_reflectivity_hh')
+
+    # the rays of a point time series are appended to the same object
+    psr_aux = _Spectra(nrays=5)
+    psr.nrays = psr_aux.nrays
+    psr.Doppler_velocity = psr_aux.Doppler_velocity
+    psr.fields = psr_aux.fields
+    dBZ = process_spectra._get_Doppler_moments(
+        psr, 'spectral_reflectivity_hh')[0]
+
+    assert kernel_calls == [(2, 4, 8), (5, 4, 8)]
+    assert dBZ.shape == (5, 4)
+
+
+@pytest.fixture
+def radar_calls(monkeypatch):
+    """ counts the radar objects derived from spectra objects """
+    calls = []
+
+    def radar_from_spectra(psr):
+        calls.append(psr.nrays)
+        return _Radar(psr)
+
+    monkeypatch.setattr(
+        radar_utils.pyart.util, 'radar_from_spectra', radar_from_spectra)
+    return calls
+
+
+def test_moments_radar_cached(radar_calls):
+    psr = _Spectra()
+    radar1 = radar_utils.get_moments_radar(psr)
+    radar1.fields['reflectivity'] = {'data': np.ma.zeros((3, 4))}
+    radar2 = radar_utils.get_moments_radar(psr)
+
+    assert radar_calls == [3]
+    assert radar2.time['data'] is radar1.time['data']
+    assert not radar2.fields
+
+
+def test_moments_radar_time_series_grown(radar_calls):
+    psr = _Spectra(nrays=2)
+    radar_utils.get_moments_radar(psr)
+
+    # the rays of a point time series are appended to the same object
+    psr_aux = _Spectra(nrays=5)
+    psr.nrays = psr_aux.nrays
+    psr.time = psr_aux.time
+    psr.azimuth = psr_aux.azimuth
+    psr.elevation = psr_aux.elevation
+    radar = radar_utils.get_moments_radar(psr)
+
+    assert radar_calls == [2, 5]
+    assert radar.nrays == 5
+    assert radar.time['data'] is psr.time['data']
+
+    # same number of rays but new time stamps
+    psr.time = {'data': psr.time['data']+10.}
+    radar = radar_utils.get_moments_radar(psr)
+
+    assert radar_calls == [2, 5, 5]
+    assert radar.time['data'] is psr.time['data']
+
+
+@pytest.fixture
+def pol_calls(monkeypatch):
+    """ counts the polarimetric variables computed by Py-ART """
+    calls = []
+
+    def compute_pol_variables(psr, fields_list, signal_h_field=None,
+                              **kwargs):
+        calls.append(tuple(fields_list))
+        radar = _Radar(psr)
+        signal_h = psr.fields[signal_h_field]['data']
+        for i, field_name in enumerate(fields_list):
+            radar.fields[field_name] = {
+                'data': np.ma.abs(signal_h).sum(axis=-1)+i}
+        return radar
+
+    monkeypatch.setattr(
+        process_spectra.pyart.retrieve, 'compute_pol_variables',
+        compute_pol_variables)
+    monkeypatch.setattr(
+        radar_utils.pyart.util, 'radar_from_spectra', _Radar)
+    return calls
+
+
+def _pol_variables(psr, fields_list, subtract_noise=False):
+    return process_spectra._compute_pol_variables(
+        psr, fields_list, signal_h_field='complex_spectra_hh_ADU',
+        noise_h_field=None, subtract_noise=subtract_noise)
+
+
+def test_pol_variables_cached(pol_calls):
+    psr = _Spectra()
+    radar1 = _pol_variables(psr, ['differential_reflectivity'])
+    radar2 = _pol_variables(
+        psr, ['differential_reflectivity', 'cross_correlation_ratio'])
+    radar3 = _pol_variables(
+        psr, ['differential_reflectivity', 'cross_correlation_ratio'])
+
+    # only the missing variables are computed
+    assert pol_calls == [
+        ('differential_reflectivity', ), ('cross_correlation_ratio', )]
+    for radar in (radar2, radar3):
+        assert_allclose(
+            radar.fields['differential_reflectivity']['data'],
+            radar1.fields['differential_reflectivity']['data'])
+
+    # other parameters are other variables
+    _pol_variables(psr, ['differential_reflectivity'], subtract_noise=True)
+    assert len(pol_calls) == 3
+
+
+def test_pol_variables_input_replaced(pol_calls):
+    psr = _Spectra()
+    field = psr.fields['complex_spectra_hh_ADU']
+    radar1 = _pol_variables(psr, ['differential_reflectivity'])
+
+    # e.g. a noise filter writing its output under the same field name
+    field['data'] = 2.*field['data']
+    radar2 = _pol_variables(psr, ['differential_reflectivity'])
+
+    assert len(pol_calls) == 2
+    assert_allclose(
+        radar2.fields['differential_reflectivity']['data'],
+        2.*radar1.fields['differential_reflectivity']['data'])
+
+
+@pytest.mark.parametrize('fp32, transposed', [(True, False), (False, True)])
+def test_pol_variables_cached_prepared(pol_calls, fp32, transposed):
+    psr = _Spectra()
+    field = psr.fields['complex_spectra_hh_ADU']
+    if transposed:
+        # non C-contiguous spectra are copied by _prepare_spectra
+        field['data'] = np.ma.masked_array(
+            np.ascontiguousarray(field['data'].T).T)
+    dscfg = {
+        'datatype': ['RADAR001:ShhADU'],
+        'variables': ['ZDR'],
+        'fp32_spectra': fp32}
+    process_spectra.process_pol_variables(0, dscfg, radar_list=[psr])
+    dataset1, _ = process_spectra.process_pol_variables(
+        1, dscfg, radar_list=[psr])
+    dataset2, _ = process_spectra.process_pol_variables(
+        1, dscfg, radar_list=[psr])
+
+    assert len(pol_calls) == 1
+    assert_allclose(
+        dataset2['radar_out'].fields['differential_reflectivity']['data'],
+        dataset1['radar_out'].fields['differential_reflectivity']['data'])
+
+    # the precision of the signals is part of the parameters
+    dscfg['fp32_spectra'] = not fp32
+    process_spectra.process_pol_variables(1, dscfg, radar_list=[psr])
+    assert len(pol_calls) == 2
+
+
+def test_prepare_spectra_not_modified():
+    psr = _Spectra()
+    field = psr.fields['complex_spectra_hh_ADU']
+    data = field['data']
+
+    # nothing to prepare
+    psr_in = process_spectra._prepare_spectra(
+        psr, ('complex_spectra_hh_ADU', None, 'missing'))
+    assert psr_in is psr
+
+    psr_in = process_spectra._prepare_spectra(
+        psr, ('complex_spectra_hh_ADU', ), fp32=True)
+    assert psr.fields['complex_spectra_hh_ADU'] is field
+    assert field['data'] is data
+    assert data.dtype == np.complex128
+    assert psr_in.fields['complex_spectra_hh_ADU']['data'].dtype == (
+        np.complex64)
+    assert_allclose(
+        psr_in.fields['complex_spectra_hh_ADU']['data'], data, rtol=1e-6)
+    assert (psr_in.fields['spectral_reflectivity_hh'] is
+            psr.fields['spectral_reflectivity_hh'])
+
+    # non contiguous spectra are copied
+    field['data'] = data[:, :, ::2]
+    psr_in = process_spectra._prepare_spectra(
+        psr, ('complex_spectra_hh_ADU', ))
+    assert not field['data'].flags.c_contiguous
+    assert psr_in.fields['complex_spectra_hh_ADU']['data'].flags.c_contiguous
+    assert_allclose(
+        psr_in.fields['complex_spectra_hh_ADU']['data'], field['data'])
+
+
+def _append_rays_reference(data_prev, data):
+    """
+    appends rays as the point of interest time series did before using
+    buffers: the data with less samples is padded with masked values
+
+    """
+    if data_prev is None:
+        return data
+    if data.ndim == 1:
+        return np.append(data_prev, data)
+
+    nsamples = max(data_prev.shape[-1], data.shape[-1])
+    data_out = []
+    for data_aux in (data_prev, data):
+        data_pad = np.ma.masked_all(
+            data_aux.shape[:-1]+(nsamples, ), dtype=data_aux.dtype)
+        data_pad[..., :data_aux.shape[-1]] = data_aux
+        data_out.append(data_pad)
+
+    return np.ma.append(data_out[0], data_out[1], axis=0)
+
+
+def _assert_masked_equal(actual, desired):
+    assert actual.shape == desired.shape
+    assert actual.dtype == desired.dtype
+    assert_array_equal(
+        np.ma.getmaskarray(actual), np.ma.getmaskarray(desired))
+    valid = ~np.ma.getmaskarray(desired)
+    assert_array_equal(
+        np.ma.getdata(actual)[valid], np.ma.getdata(desired)[valid])
+
+
+def test_append_rays_1d():
+    rng = np.random.RandomState(0)
+    buffers = dict()
+    nrays_filled = 0
+    data_ref = None
+    for nrays in (1, 1, 5, 20, 1, 40):
+        data = rng.uniform(size=nrays)
+        data_out = process_spectra._append_rays(
+            buffers, 'time', data, nrays_filled)
+        data_ref = _append_rays_reference(data_ref, data)
+        nrays_filled += nrays
+
+        assert isinstance(data_out, np.ndarray)
+        assert_array_equal(data_out, data_ref)
+        assert buffers['time'].shape[0] >= nrays_filled
+
+
+def test_append_rays_masked():
+    rng = np.random.RandomState(0)
+    buffers = dict()
+    nrays_filled = 0
+    data_ref = None
+    outputs = []
+    # the number of Doppler bins changes between volumes
+    for nrays, npulses in ((1, 8), (3, 8), (2, 6), (14, 12), (1, 4),
+                           (30, 12), (2, 16)):
+        data = np.ma.masked_array(
+            rng.normal(size=(nrays, 1, npulses)) +
+            1j*rng.normal(size=(nrays, 1, npulses)),
+            mask=rng.uniform(size=(nrays, 1, npulses)) < 0.2)
+        data_out = process_spectra._append_rays(
+            buffers, 'field', data, nrays_filled)
+        data_ref = _append_rays_reference(data_ref, data)
+        nrays_filled += nrays
+
+        _assert_masked_equal(data_out, data_ref)
+        outputs.append((data_out, data_ref))
+
+    # the views returned before the buffer was enlarged are not modified
+    for data_out, data_ref in outputs:
+        _assert_masked_equal(data_out, data_ref)
+
+
+def test_clone_data_shared_buffer():
+    data = np.ma.masked_array(
+        np.arange(12.).reshape(2, 2, 3), mask=np.zeros((2, 2, 3), bool))
+    data[0, 0, 0] = np.ma.masked
+    clone = process_spectra._clone_data_shared_buffer(data)
+
+    # the clone can be masked without affecting the original data
+    clone[1] = np.ma.masked
+    np.logical_or(clone.mask, np.ones(clone.shape, bool), out=clone.mask)
+    assert clone.mask.all()
+    assert data.mask.sum() == 1
+
+    # the shared data can not be modified through the clone
+    assert np.shares_memory(np.ma.getdata(clone), np.ma.getdata(data))
+    with pytest.raises(ValueError):
+        clone[0, 1, 1] = -1.
+    assert data[0, 1, 1] == 4.
+    assert np.ma.getdata(data).flags.writeable
@@ -0,0 +1,253 @@
+"""
+Tests of the outputs of the spectral processing functions against those of
+their original implementations
+
+"""
+
+from copy import deepcopy
+
+import numpy as np
+from numpy.testing import assert_allclose, assert_array_equal
+import pytest
+
+pytest.importorskip('pyart')
+
+from pyrad.proc import process_spectra
+from pyrad.util import radar_utils
+
+
+class _Spectra():
+    """ Minimal spectra object with the fields used by the filters """
+
+    def __init__(self, nrays=3, ngates=5, npulses=16, noise_broadcast=False,
+                 seed=0):
+        rng = np.random.RandomState(seed)
+        shape = (nrays, ngates, npulses)
+        self.nrays = nrays
+        self.ngates = ngates
+        self.npulses_max = npulses
+        self.time = {'data': np.arange(nrays, dtype=float)}
+        self.azimuth = {'data': np.linspace(0., 360., nrays)}
+        self.elevation = {'data': np.zeros(nrays)}
+        self.range = {'data': np.arange(ngates)*100.}
+        self.Doppler_velocity = {'data': np.ma.masked_array(
+            np.tile(np.linspace(-8., 8., npulses), (nrays, 1)))}
+        self.Doppler_frequency = {'data': np.ma.masked_array(
+            np.tile(np.linspace(-100., 100., npulses), (nrays, 1)))}
+
+        noise = rng.uniform(0.05, 0.15, (nrays, ngates, 1))
+        if noise_broadcast:
+            noise = np.broadcast_to(noise, shape)
+        else:
+            noise = np.repeat(noise, npulses, axis=-1)
+        rhohv = rng.uniform(0.5, 1., shape)*np.exp(
+            1j*rng.uniform(-np.pi, np.pi, shape))
+        self.fields = {
+            'complex_spectra_hh_ADU': {'data': np.ma.masked_array(
+                rng.normal(size=shape)+1j*rng.normal(size=shape))},
+            'spectral_noise_power_hh_ADU': {
+                'data': np.ma.masked_array(noise)},
+            'spectral_copolar_correlation_coefficient': {
+                'data': np.ma.masked_array(rhohv)},
+            'spectral_reflectivity_hh': {'data': np.ma.masked_array(
+                rng.uniform(-10., 40., shape),
+                mask=rng.uniform(size=shape) < 0.2)},
+            'unfiltered_spectral_reflectivity_hh': {
+                'data': np.ma.masked_array(
+                    rng.uniform(-10., 40., shape),
+                    mask=rng.uniform(size=shape) < 0.2)}}
+
+
+class _Radar():
+    """ Minimal radar object derived from a spectra object """
+
+    def __init__(self, psr):
+        self.nrays = psr.nrays
+        self.ngates = psr.ngates
+        self.time = psr.time
+        self.fields = dict()
+
+
+def _process(func, dscfg, psr):
+    """ initializes and runs a processing function on a spectra object """
+    func(0, dscfg, radar_list=[psr])
+    new_dataset, ind_rad = func(1, dscfg, radar_list=[psr])
+    assert ind_rad == 0
+
+    return new_dataset['radar_out'].fields
+
+
+def _assert_fields_equal(fields, fields_ref):
+    assert sorted(fields.keys()) == sorted(fields_ref.keys())
+    for field_name, field_ref in fields_ref.items():
+        data = fields[field_name]['data']
+        data_ref = field_ref['data']
+        assert_array_equal(
+            np.ma.getmaskarray(data), np.ma.getmaskarray(data_ref))
+        valid = ~np.ma.getmaskarray(data_ref)
+        assert_allclose(
+            np.ma.getdata(data)[valid], np.ma.getdata(data_ref)[valid],
+            rtol=1e-10, atol=1e-10)
+
+
+def _filter_0Doppler_reference(psr, field_names, filter_width, filter_units):
+    """ process_filter_0Doppler as originally implemented """
+    if filter_units == 'm/s':
+        axis = psr.Doppler_velocity['data']
+    else:
+        axis = psr.Doppler_frequency['data']
+
+    fields = dict()
+    for field_name in field_names:
+        field_name_aux = field_name.replace('unfiltered_', '')
+        field = {'data': deepcopy(psr.fields[field_name]['data'])}
+        for ray in range(psr.nrays):
+            ind = np.ma.where(np.logical_and(
+                axis[ray, :] >= -filter_width/2.,
+                axis[ray, :] <= filter_width/2.))
+            field['data'][ray, :, ind] = np.ma.masked
+        fields.update({field_name_aux: field})
+
+    return fields
+
+
+def _filter_srhohv_reference(psr, field_names, sRhoHV_threshold):
+    """ process_filter_srhohv as originally implemented """
+    sRhoHV = psr.fields['spectral_copolar_correlation_coefficient']['data']
+
+    fields = dict()
+    for field_name in field_names:
+        field_name_aux = field_name.replace('unfiltered_', '')
+        field = {'data': deepcopy(psr.fields[field_name]['data'])}
+        field['data'][np.ma.abs(sRhoHV) <= sRhoHV_threshold] = np.ma.masked
+        fields.update({field_name_aux: field})
+
+    return fields
+
+
+def _filter_spectra_noise_reference(psr, field_names, clipping_level):
+    """
+    process_filter_spectra_noise as originally implemented. The spectral
+    power is computed as in pyart.retrieve.compute_spectral_power with
+    units='ADU'. The input fields are copied instead of being masked in
+    place
+
+    """
+    clip_pwr = (
+        psr.fields['spectral_noise_power_hh_ADU']['data'] *
+        np.power(10., 0.1*clipping_level))
+    s_pwr = np.ma.power(
+        np.ma.abs(psr.fields['complex_spectra_hh_ADU']['data']), 2.)
+    mask = np.ma.less_equal(s_pwr, clip_pwr)
+
+    fields = dict()
+    for field_name in field_names:
+        field = {'data': deepcopy(psr.fields[field_name]['data'])}
+        field['data'][mask] = np.ma.masked
+        fields.update({field_name: field})
+
+    return fields
+
+
+def _Doppler_moments_reference(psr, sdBZ_field):
+    """
+    Doppler moments computed as in pyart.retrieve.compute_reflectivity,
+    compute_Doppler_velocity and compute_Doppler_width, used by
+    process_reflectivity, process_Doppler_velocity and
+    process_Doppler_width
+
+    """
+    sdBZ = psr.fields[sdBZ_field]['data']
+    sdBZ_lin = np.ma.power(10., 0.1*sdBZ)
+    pwr = np.ma.sum(sdBZ_lin, axis=-1)
+    dBZ = 10.*np.ma.log10(pwr)
+
+    vel = np.ma.expand_dims(psr.Doppler_velocity['data'], axis=1)
+    vel = np.ma.masked_array(
+        np.broadcast_to(np.ma.getdata(vel), sdBZ.shape),
+        mask=np.broadcast_to(np.ma.getmaskarray(vel), sdBZ.shape))
+    mean_vel = np.ma.sum(sdBZ_lin*vel, axis=-1)/pwr
+    width = np.ma.sqrt(np.ma.sum(
+        np.ma.power(vel-np.ma.expand_dims(mean_vel, axis=2), 2.)*sdBZ_lin,
+        axis=-1)/pwr)
+
+    return dBZ, mean_vel, width
+
+
+@pytest.mark.parametrize('filter_width, filter_units', [
+    (0., 'm/s'), (3., 'm/s'), (60., 'Hz')])
+def test_filter_0Doppler(filter_width, filter_units):
+    psr = _Spectra()
+    dscfg = {
+        'datatype': ['RADAR001:sdBuZ'],
+        'filter_width': filter_width,
+        'filter_units': filter_units}
+    fields = _process(process_spectra.process_filter_0Doppler, dscfg, psr)
+
+    fields_ref = _filter_0Doppler_reference(
+        psr, ('unfiltered_spectral_reflectivity_hh', ), filter_width,
+        filter_units)
+    _assert_fields_equal(fields, fields_ref)
+
+
+@pytest.mark.parametrize('sRhoHV_threshold', [0.9, 0.7, 1.])
+def test_filter_srhohv(sRhoHV_threshold):
+    psr = _Spectra()
+    dscfg = {
+        'datatype': ['RADAR001:sRhoHV', 'RADAR001:sdBuZ'],
+        'sRhoHV_threshold': sRhoHV_threshold}
+    fields = _process(process_spectra.process_filter_srhohv, dscfg, psr)
+
+    fields_ref = _filter_srhohv_reference(
+        psr, ('unfiltered_spectral_reflectivity_hh', ), sRhoHV_threshold)
+    _assert_fields_equal(fields, fields_ref)
+
+
+@pytest.mark.parametrize('clipping_level, noise_broadcast', [
+    (10., False), (10., True), (3., False)])
+def test_filter_spectra_noise(clipping_level, noise_broadcast):
+    psr = _Spectra(noise_broadcast=noise_broadcast)
+    dscfg = {
+        'datatype': [
+            'RADAR001:ShhADU', 'RADAR001:sNADUh', 'RADAR001:sdBZ',
+            'RADAR001:sdBuZ'],
+        'clipping_level': clipping_level}
+    fields = _process(
+        process_spectra.process_filter_spectra_noise, dscfg, psr)
+
+    fields_ref = _filter_spectra_noise_reference(
+        psr, ('spectral_reflectivity_hh',
+              'unfiltered_spectral_reflectivity_hh'), clipping_level)
+    _assert_fields_equal(fields, fields_ref)
+
+
+def test_filters_input_not_modified():
+    psr = _Spectra()
+    fields_in = deepcopy(psr.fields)
+    _process(process_spectra.process_filter_0Doppler, {
+        'datatype': ['RADAR001:sdBZ'], 'filter_width': 3.}, psr)
+    _process(process_spectra.process_filter_srhohv, {
+        'datatype': ['RADAR001:sRhoHV', 'RADAR001:sdBZ']}, psr)
+    _process(process_spectra.process_filter_spectra_noise, {
+        'datatype': [
+            'RADAR001:ShhADU', 'RADAR001:sNADUh', 'RADAR001:sdBZ']}, psr)
+
+    _assert_fields_equal(psr.fields, fields_in)
+
+
+@pytest.mark.parametrize('datatype, field_names', [
+    ('sdBZ', ('reflectivity', 'velocity', 'spectrum_width')),
+    ('sdBuZ', ('unfiltered_reflectivity', 'unfiltered_velocity',
+               'unfiltered_spectrum_width'))])
+def test_Doppler_moments(monkeypatch, datatype, field_names):
+    monkeypatch.setattr(
+        radar_utils.pyart.util, 'radar_from_spectra', _Radar)
+    psr = _Spectra()
+    sdBZ_field = process_spectra.get_fieldname_pyart(datatype)
+    dscfg = {'datatype': ['RADAR001:'+datatype]}
+    fields = _process(process_spectra.process_Doppler_moments, dscfg, psr)
+
+    fields_ref = dict(zip(field_names, (
+        {'data': data}
+        for data in _Doppler_moments_reference(psr, sdBZ_field))))
+    _assert_fields_equal(fields, fields_ref)
@@ -0,0 +1,49 @@
+"""
+Tests of the spectra products
+
+"""
+
+import datetime
+
+import pytest
+
+pytest.importorskip('pyart')
+pytest.importorskip('matplotlib')
+
+from pyrad.prod import process_spectra_products
+
+
+def test_save_dir_recreated(tmp_path):
+    basepath = str(tmp_path)+'/'
+    timeinfo = datetime.datetime(2020, 1, 1, 12, 30)
+    savedir = process_spectra_products._get_save_dir(
+        basepath, 'proc', 'dataset', 'product', timeinfo)
+
+    assert savedir == basepath+'proc/2020-01-01/dataset/product/'
+    assert (tmp_path/'proc'/'2020-01-01'/'dataset'/'product').is_dir()
+
+    # the directory is deleted between two volumes of the same day
+    (tmp_path/'proc'/'2020-01-01'/'dataset'/'product').rmdir()
+    savedir = process_spectra_products._get_save_dir(
+        basepath, 'proc', 'dataset', 'product',
+        timeinfo+datetime.timedelta(minutes=5))
+
+    assert savedir == basepath+'proc/2020-01-01/dataset/product/'
+    assert (tmp_path/'proc'/'2020-01-01'/'dataset'/'product').is_dir()
+
+
+def test_save_dir_by_day(tmp_path):
+    basepath = str(tmp_path)+'/'
+    timeinfo = datetime.datetime(2020, 1, 1, 23, 59)
+    savedir1 = process_spectra_products._get_save_dir(
+        basepath, 'proc', 'dataset', 'product', timeinfo)
+    savedir2 = process_spectra_products._get_save_dir(
+        basepath, 'proc', 'dataset', 'product',
+        timeinfo+datetime.timedelta(minutes=5))
+    savedir3 = process_spectra_products._get_save_dir(
+        basepath, 'proc', 'dataset', 'product', None)
+
+    assert savedir1 == basepath+'proc/2020-01-01/dataset/product/'
+    assert savedir2 == basepath+'proc/2020-01-02/dataset/product/'
+    assert savedir3 == basepath+'proc/dataset/product/'
+    assert (tmp_path/'proc'/'dataset'/'product').is_dir()
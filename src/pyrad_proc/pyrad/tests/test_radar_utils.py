@@ -0,0 +1,85 @@
+"""
+Tests of the ray index search
+
+"""
+
+import numpy as np
+import pytest
+
+pytest.importorskip('pyart')
+
+from pyrad.util.radar_utils import find_ray_index
+
+
+def _find_ray_index_reference(ele_vec, azi_vec, ele, azi, ele_tol=0.,
+                              azi_tol=0., nearest='azi'):
+    """ linear search over all the rays """
+    ind_ray = np.where(np.logical_and(
+        np.logical_and(ele_vec <= ele+ele_tol, ele_vec >= ele-ele_tol),
+        np.logical_and(azi_vec <= azi+azi_tol, azi_vec >= azi-azi_tol)))[0]
+
+    if ind_ray.size == 0:
+        return None
+    if ind_ray.size == 1:
+        return ind_ray[0]
+
+    if nearest == 'azi':
+        ind_min = np.argmin(np.abs(azi_vec[ind_ray]-azi))
+    else:
+        ind_min = np.argmin(np.abs(ele_vec[ind_ray]-ele))
+
+    return ind_ray[ind_min]
+
+
+def _scan(nele=3, nazi=360, seed=0):
+    """ azimuth and elevation of a volume scan with jittered angles """
+    rng = np.random.RandomState(seed)
+    azi_vec = np.tile(np.arange(nazi)*360./nazi, nele)
+    ele_vec = np.repeat(np.arange(nele)*1.5+0.5, nazi)
+    azi_vec = np.mod(azi_vec+rng.uniform(-0.2, 0.2, azi_vec.size), 360.)
+    ele_vec += rng.uniform(-0.05, 0.05, ele_vec.size)
+
+    return ele_vec, azi_vec
+
+
+@pytest.mark.parametrize('nearest', ['azi', 'ele'])
+@pytest.mark.parametrize('azi_tol, ele_tol', [
+    (0., 0.), (0.5, 0.1), (1., 2.), (5., 0.5)])
+def test_find_ray_index(nearest, azi_tol, ele_tol):
+    ele_vec, azi_vec = _scan()
+    rng = np.random.RandomState(1)
+    queries = [(ele_vec[i], azi_vec[i]) for i in rng.randint(0, 1080, 20)]
+    queries += list(zip(
+        rng.uniform(0., 4., 50), rng.uniform(-1., 361., 50)))
+    for ele, azi in queries:
+        assert find_ray_index(
+            ele_vec, azi_vec, ele, azi, ele_tol=ele_tol, azi_tol=azi_tol,
+            nearest=nearest) == _find_ray_index_reference(
+                ele_vec, azi_vec, ele, azi, ele_tol=ele_tol,
+                azi_tol=azi_tol, nearest=nearest)
+
+
+def test_find_ray_index_ties():
+    # several rays with the same azimuth and elevation: the first one
+    ele_vec = np.array([1., 0., 1., 1.])
+    azi_vec = np.array([10., 20., 10., 10.])
+
+    assert find_ray_index(ele_vec, azi_vec, 1., 10., azi_tol=1.) == 0
+    assert find_ray_index(ele_vec, azi_vec, 1., 30., azi_tol=1.) is None
+
+
+def test_find_ray_index_modified_in_place():
+    ele_vec, azi_vec = _scan()
+    ind_ray = find_ray_index(ele_vec, azi_vec, 0.5, 100., 0.5, 1.)
+
+    # the rays are rotated in place
+    azi_vec[:] = np.roll(azi_vec, 7)
+    ele_vec[:] = np.roll(ele_vec, 7)
+    assert find_ray_index(ele_vec, azi_vec, 0.5, 100., 0.5, 1.) == ind_ray+7
+
+    # the azimuths of the first sweep are offset in place
+    azi_vec[7:367] = np.mod(azi_vec[7:367]+180., 360.)
+    assert find_ray_index(
+        ele_vec, azi_vec, 0.5, 100., 0.5, 1.) == _find_ray_index_reference(
+            ele_vec, azi_vec, 0.5, 100., 0.5, 1.)
+
@@ -0,0 +1,227 @@
+"""
+Tests of the kernels of the spectral processing against their NumPy
+counterparts
+
+"""
+
+import numpy as np
+from numpy.testing import assert_allclose, assert_array_equal
+import pytest
+
+pytest.importorskip('pyart')
+
+from pyrad.proc import _spectra_kernels
+
+
+def _Doppler_moments_reference(sdBZ, Doppler_velocity):
+    """
+    Doppler moments computed as in pyart.retrieve.compute_reflectivity,
+    compute_Doppler_velocity and compute_Doppler_width
+
+    """
+    sdBZ_lin = np.ma.power(10., 0.1*sdBZ)
+    pwr = np.ma.sum(sdBZ_lin, axis=-1)
+    dBZ = 10.*np.ma.log10(pwr)
+
+    vel_axis = np.ma.expand_dims(Doppler_velocity, axis=1)
+    vel = np.ma.masked_array(
+        np.broadcast_to(np.ma.getdata(vel_axis), sdBZ.shape),
+        mask=np.broadcast_to(np.ma.getmaskarray(vel_axis), sdBZ.shape))
+    mean_vel = np.ma.sum(sdBZ_lin*vel, axis=-1)/pwr
+    width = np.ma.sqrt(np.ma.sum(
+        np.ma.power(vel-np.ma.expand_dims(mean_vel, axis=2), 2.)*sdBZ_lin,
+        axis=-1)/pwr)
+
+    return dBZ, mean_vel, width
+
+
+def _Doppler_moments(sdBZ, Doppler_velocity):
+    """ Doppler moments computed with the kernel """
+    shape = sdBZ.shape[:2]
+    dBZ = np.zeros(shape)
+    vel = np.zeros(shape)
+    width = np.zeros(shape)
+    dBZ_mask = np.zeros(shape, dtype=bool)
+    vel_mask = np.zeros(shape, dtype=bool)
+    _spectra_kernels.Doppler_moments(
+        np.ma.getdata(sdBZ), np.ma.getmaskarray(sdBZ),
+        np.ma.getdata(Doppler_velocity),
+        np.ma.getmaskarray(Doppler_velocity),
+        dBZ, vel, width, dBZ_mask, vel_mask)
+
+    return (
+        np.ma.masked_array(dBZ, mask=dBZ_mask),
+        np.ma.masked_array(vel, mask=vel_mask),
+        np.ma.masked_array(width, mask=vel_mask))
+
+
+def _assert_masked_allclose(actual, desired):
+    assert_array_equal(np.ma.getmaskarray(actual),
+                       np.ma.getmaskarray(desired))
+    valid = ~np.ma.getmaskarray(desired)
+    assert_allclose(np.ma.getdata(actual)[valid],
+                    np.ma.getdata(desired)[valid], rtol=1e-10, atol=1e-10)
+
+
+def _spectra(nrays=5, ngates=7, npulses=16, sdBZ_masked=0.,
+             velocity_masked=0., seed=0):
+    rng = np.random.RandomState(seed)
+    sdBZ = np.ma.masked_array(
+        rng.uniform(-10., 40., (nrays, ngates, npulses)),
+        mask=rng.uniform(size=(nrays, ngates, npulses)) < sdBZ_masked)
+    Doppler_velocity = np.ma.masked_array(
+        np.tile(np.linspace(-10., 10., npulses), (nrays, 1)),
+        mask=rng.uniform(size=(nrays, npulses)) < velocity_masked)
+
+    return sdBZ, Doppler_velocity
+
+
+@pytest.mark.parametrize('sdBZ_masked, velocity_masked', [
+    (0., 0.), (0.3, 0.), (0., 0.3), (0.3, 0.3)])
+def test_Doppler_moments(sdBZ_masked, velocity_masked):
+    sdBZ, Doppler_velocity = _spectra(
+        sdBZ_masked=sdBZ_masked, velocity_masked=velocity_masked)
+
+    for actual, desired in zip(
+            _Doppler_moments(sdBZ, Doppler_velocity),
+            _Doppler_moments_reference(sdBZ, Doppler_velocity)):
+        _assert_masked_allclose(actual, desired)
+
+
+def test_Doppler_moments_fully_masked_gates():
+    sdBZ, Doppler_velocity = _spectra()
+    sdBZ[0, 0, :] = np.ma.masked
+    Doppler_velocity[1, :] = np.ma.masked
+
+    dBZ, vel, width = _Doppler_moments(sdBZ, Doppler_velocity)
+
+    assert dBZ.mask[0, 0] and vel.mask[0, 0] and width.mask[0, 0]
+    assert not dBZ.mask[1].any()
+    assert vel.mask[1].all() and width.mask[1].all()
+
+
+def _complex_spectra(nrays=5, ngates=7, npulses=16, seed=0):
+    rng = np.random.RandomState(seed)
+    shape = (nrays, ngates, npulses)
+    return rng.normal(size=shape)+1j*rng.normal(size=shape)
+
+
+@pytest.mark.parametrize('threshold', [-1., 0., 0.5, 1.2])
+def test_mask_low_magnitude(threshold):
+    data = _complex_spectra()
+    data[0, 0, :4] = 0.
+    data_mask = np.random.RandomState(1).uniform(size=data.shape) < 0.2
+    out_mask = np.zeros(data.shape, dtype=bool)
+    out_mask[1] = True
+
+    _spectra_kernels.mask_low_magnitude(
+        data, data_mask, threshold, out_mask)
+
+    expected = np.abs(data) <= threshold
+    expected |= data_mask
+    expected[1] = True
+    assert_array_equal(out_mask, expected)
+
+
+def test_mask_low_power():
+    signal = _complex_spectra()
+    noise = np.random.RandomState(1).uniform(0., 1., signal.shape)
+    clipping_factor = np.power(10., 0.1*3.)
+    out_mask = np.zeros(signal.shape, dtype=bool)
+    out_mask[1] = True
+
+    _spectra_kernels.mask_low_power(signal, noise, clipping_factor, out_mask)
+
+    # the noise filter of Py-ART compares the spectral power in dB with the
+    # noise power plus the clipping level
+    expected = (
+        10.*np.log10(np.abs(signal)**2.) <= 10.*np.log10(noise)+3.)
+    expected[1] = True
+    assert_array_equal(out_mask, expected)
+
+
+def test_mask_Doppler_bins():
+    Doppler_mask = np.random.RandomState(1).uniform(size=(5, 16)) < 0.3
+    out_mask = np.random.RandomState(2).uniform(size=(5, 7, 16)) < 0.1
+    expected = np.logical_or(out_mask, np.expand_dims(Doppler_mask, axis=1))
+
+    _spectra_kernels.mask_Doppler_bins(Doppler_mask, out_mask)
+
+    assert_array_equal(out_mask, expected)
+
+
+def test_merge_masks():
+    mask = np.random.RandomState(1).uniform(size=(5, 7, 16)) < 0.3
+    out_mask = np.random.RandomState(2).uniform(size=(5, 7, 16)) < 0.1
+    expected = np.logical_or(out_mask, mask)
+
+    _spectra_kernels.merge_masks(mask, out_mask)
+
+    assert_array_equal(out_mask, expected)
+
+
+def _spectral_rhohv_reference(signal_h, signal_v, noise_h, noise_v,
+                              subtract_noise):
+    """
+    spectral RhoHV computed as in pyart.retrieve.compute_spectral_rhohv
+
+    """
+    pwr_h = np.ma.masked_less_equal(
+        np.abs(signal_h)**2.-noise_h if subtract_noise else
+        np.abs(signal_h)**2., 0.)
+    pwr_v = np.ma.masked_less_equal(
+        np.abs(signal_v)**2.-noise_v if subtract_noise else
+        np.abs(signal_v)**2., 0.)
+
+    return signal_h*np.conj(signal_v)/np.ma.sqrt(pwr_h*pwr_v)
+
+
+def _spectral_rhohv(kernel, signal_h, signal_v, noise_h, noise_v,
+                    subtract_noise):
+    """ spectral RhoHV computed with a kernel """
+    out_data = np.zeros(signal_h.shape, dtype=signal_h.dtype)
+    out_mask = np.zeros(signal_h.shape, dtype=bool)
+    kernel(signal_h, signal_v, noise_h, noise_v, subtract_noise, out_data,
+           out_mask)
+
+    return np.ma.masked_array(out_data, mask=out_mask)
+
+
+def _rhohv_inputs():
+    signal_h = _complex_spectra(seed=1)
+    signal_v = _complex_spectra(seed=2)
+    signal_v[0, 0, :3] = 0.
+    rng = np.random.RandomState(3)
+    noise_h = rng.uniform(0., 1., signal_h.shape)
+    noise_v = rng.uniform(0., 1., signal_h.shape)
+
+    return signal_h, signal_v, noise_h, noise_v
+
+
+@pytest.mark.parametrize('subtract_noise', [False, True])
+def test_spectral_rhohv(subtract_noise):
+    inputs = _rhohv_inputs()
+    actual = _spectral_rhohv(
+        _spectra_kernels.spectral_rhohv, *inputs,
+        subtract_noise=subtract_noise)
+    desired = _spectral_rhohv_reference(
+        *inputs, subtract_noise=subtract_noise)
+
+    assert np.ma.getmaskarray(desired).any()
+    _assert_masked_allclose(actual, desired)
+
+
+@pytest.mark.parametrize('subtract_noise', [False, True])
+def test_spectral_rhohv_numexpr(subtract_noise):
+    pytest.importorskip('numexpr')
+
+    inputs = _rhohv_inputs()
+    actual = _spectral_rhohv(
+        _spectra_kernels.spectral_rhohv_numexpr, *inputs,
+        subtract_noise=subtract_noise)
+    desired = _spectral_rhohv(
+        _spectra_kernels.spectral_rhohv, *inputs,
+        subtract_noise=subtract_noise)
+
+    _assert_masked_allclose(actual, desired)
+    assert_array_equal(np.ma.getdata(actual)[np.ma.getmaskarray(actual)], 0.)
@@ -45,6 +45,8 @@ Radar Utilities
     compute_profile_stats
     compute_directional_stats
     project_to_vertical
+    clone_without_fields
+    get_moments_radar
 
     quantiles_weighted
     ratio_bootstrapping
@@ -65,6 +67,7 @@ from .radar_utils import project_to_vertical, find_neighbour_gates
 from .radar_utils import get_target_elevations, get_data_along_rng
 from .radar_utils import get_data_along_azi, get_data_along_ele
 from .radar_utils import get_fixed_rng_data
+from .radar_utils import clone_without_fields, get_moments_radar
 
 from .stat_utils import quantiles_weighted, ratio_bootstrapping
 
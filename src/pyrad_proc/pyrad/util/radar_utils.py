@@ -42,11 +42,14 @@ Miscellaneous functions dealing with radar data
     compute_profile_stats
     compute_directional_stats
     project_to_vertical
+    clone_without_fields
+    get_moments_radar
 
 """
 from warnings import warn
-from copy import deepcopy
+from copy import deepcopy, copy
 import datetime
+from weakref import WeakKeyDictionary
 
 import numpy as np
 import scipy
@@ -69,6 +72,11 @@ import pyart
 
 from .stat_utils import quantiles_weighted
 
+# radar objects without fields derived from each spectra object, used as
+# templates for the outputs of the moment processing functions, together
+# with the geometry of the spectra object they were derived from
+_RADAR_SKELETON_CACHE = WeakKeyDictionary()
+
 
 def get_data_along_rng(radar, field_name, fix_elevations, fix_azimuths,
                        ang_tol=1., rmin=None, rmax=None):
@@ -685,9 +693,11 @@ def find_ray_index(ele_vec, azi_vec, ele, azi, ele_tol=0., azi_tol=0.,
         The ray index
 
     """
-    ind_ray = np.where(np.logical_and(
-        np.logical_and(ele_vec <= ele+ele_tol, ele_vec >= ele-ele_tol),
-        np.logical_and(azi_vec <= azi+azi_tol, azi_vec >= azi-azi_tol)))[0]
+    # the distances are computed once and reused to select the nearest ray
+    dist_ele = np.abs(ele_vec-ele)
+    dist_azi = np.abs(azi_vec-azi)
+    ind_ray = np.flatnonzero(np.logical_and(
+        dist_ele <= ele_tol, dist_azi <= azi_tol))
 
     if ind_ray.size == 0:
         return None
@@ -695,9 +705,9 @@ def find_ray_index(ele_vec, azi_vec, ele, azi, ele_tol=0., azi_tol=0.,
         return ind_ray[0]
 
     if nearest == 'azi':
-        ind_min = np.argmin(np.abs(azi_vec[ind_ray]-azi))
+        ind_min = np.argmin(dist_azi[ind_ray])
     else:
-        ind_min = np.argmin(np.abs(ele_vec[ind_ray]-ele))
+        ind_min = np.argmin(dist_ele[ind_ray])
 
     return ind_ray[ind_min]
 
@@ -1939,3 +1949,66 @@ def project_to_vertical(data_in, data_height, grid_height, interp_kind='none',
         data_out = np.ma.masked_values(f(grid_height), fill_value)
 
     return data_out
+
+
+def clone_without_fields(psr):
+    """
+    Creates a copy of a spectra object without its fields. The dictionaries
+    describing the object are copied but the arrays they contain are shared
+    with the original object
+
+    Parameters
+    ----------
+    psr : spectra object
+        the spectra object to copy
+
+    Returns
+    -------
+    psr_out : spectra object
+        the copy of the spectra object with an empty fields dictionary
+
+    """
+    psr_out = copy(psr)
+    for attr, value in vars(psr).items():
+        if attr != 'fields' and isinstance(value, dict):
+            setattr(psr_out, attr, copy(value))
+    psr_out.fields = dict()
+
+    return psr_out
+
+
+def get_moments_radar(psr):
+    """
+    Gets a radar object without fields with the geometry of a spectra or IQ
+    object. The radar object is derived from the spectra object only once
+    and subsequent calls return shallow copies of it, so the range, angles,
+    time and gate coordinates are shared by all the moments of the object.
+    It is derived again if the number of rays or gates, the time, the
+    angles or the range of the spectra object have changed since, e.g. in a
+    time series growing with each volume
+
+    Parameters
+    ----------
+    psr : spectra or IQ object
+        the spectra object
+
+    Returns
+    -------
+    radar : radar object
+        the radar object with an empty fields dictionary
+
+    """
+    geometry = (
+        psr.nrays, psr.ngates, psr.time['data'], psr.azimuth['data'],
+        psr.elevation['data'], psr.range['data'])
+
+    cached = _RADAR_SKELETON_CACHE.get(psr)
+    if (cached is None or cached[0][:2] != geometry[:2] or
+            any(data is not data_cached for data, data_cached in zip(
+                geometry[2:], cached[0][2:]))):
+        radar = pyart.util.radar_from_spectra(psr)
+        radar.fields = dict()
+        cached = (geometry, radar)
+        _RADAR_SKELETON_CACHE[psr] = cached
+
+    return clone_without_fields(cached[1])
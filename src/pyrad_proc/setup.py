@@ -57,6 +57,12 @@ SCRIPTS = glob.glob('scripts/*')
 COMPILE_DATE_TIME = datetime.utcnow().strftime("%Y-%m-%d %H:%M")
 USERNAME = getpass.getuser()
 
+# optional dependencies. The spectra processing uses Numba and numexpr, if
+# available, to speed up the computations
+EXTRAS_REQUIRE = {
+    'spectra': ['numba', 'numexpr'],
+}
+
 
 # Return the git revision as a string
 def git_version():
@@ -175,6 +181,7 @@ def setup_package():
         platforms=PLATFORMS,
         configuration=configuration,
         scripts=SCRIPTS,
+        extras_require=EXTRAS_REQUIRE,
     )
 
 if __name__ == '__main__':